@@ -0,0 +1,133 @@
+"""
+Load test scenarios for the TalentBridge API.
+
+Seed the database first (`manage.py seed_benchmark_data`), start the API,
+then run for example:
+
+    pip install locust
+    locust -f benchmarks/locustfile.py --host http://127.0.0.1:8000 \
+        --headless -u 200 -r 20 -t 5m --csv results/run
+
+Seeded users are numbered from 0; set BENCHMARK_EMPLOYERS and
+BENCHMARK_CANDIDATES if you seeded other counts than the defaults. The
+throttle rates in settings apply, so raise them for load tests.
+"""
+import os
+import random
+
+from locust import HttpUser, between, task
+
+PASSWORD = os.getenv('BENCHMARK_PASSWORD', 'benchmark-password')
+EMPLOYERS = int(os.getenv('BENCHMARK_EMPLOYERS', 50))
+CANDIDATES = int(os.getenv('BENCHMARK_CANDIDATES', 2000))
+SEARCH_TERMS = ['python', 'django', 'react developer', 'data analyst', 'designer', 'aws']
+LOCATIONS = ['Nairobi', 'Lagos', 'Accra', 'Kigali', 'Remote']
+
+
+class Visitor(HttpUser):
+    """Anonymous browsing and searching of the job board."""
+    weight = 5
+    wait_time = between(1, 3)
+
+    def on_start(self):
+        self.job_ids = []
+
+    def browse_page(self, params, name):
+        response = self.client.get('/api/v1/jobs/', params=params, name=name)
+        if response.ok:
+            self.job_ids = [job['id'] for job in response.json()['results']] or self.job_ids
+
+    @task(5)
+    def browse(self):
+        self.browse_page({'page': random.randint(1, 20)}, '/api/v1/jobs/?page=[n]')
+
+    @task(2)
+    def browse_filtered(self):
+        self.browse_page(
+            {'location': random.choice(LOCATIONS), 'min_salary': random.choice([30000, 60000, 100000])},
+            '/api/v1/jobs/?location&min_salary',
+        )
+
+    @task(3)
+    def search(self):
+        self.browse_page({'search': random.choice(SEARCH_TERMS)}, '/api/v1/jobs/?search')
+
+    @task(3)
+    def job_detail(self):
+        if self.job_ids:
+            self.client.get(f'/api/v1/jobs/{random.choice(self.job_ids)}/', name='/api/v1/jobs/[id]/')
+
+
+class Candidate(Visitor):
+    """A logged-in candidate browsing, bookmarking and applying."""
+    weight = 3
+
+    def on_start(self):
+        super().on_start()
+        email = f'bench-candidate-{random.randrange(CANDIDATES)}@example.com'
+        response = self.client.post('/api/v1/auth/login/', json={'email': email, 'password': PASSWORD})
+        response.raise_for_status()
+        self.client.headers['Authorization'] = f"Bearer {response.json()['access']}"
+
+    @task(2)
+    def recommended(self):
+        self.client.get('/api/v1/jobs/recommended/')
+
+    @task(2)
+    def my_applications(self):
+        self.client.get('/api/v1/jobs/applications/me/')
+
+    @task(1)
+    def bookmarks(self):
+        self.client.get('/api/v1/jobs/bookmarks/')
+
+    @task(2)
+    def toggle_bookmark(self):
+        if self.job_ids:
+            self.client.post(f'/api/v1/jobs/{random.choice(self.job_ids)}/bookmark/', name='/api/v1/jobs/[id]/bookmark/')
+
+    @task(1)
+    def apply(self):
+        if not self.job_ids:
+            return
+        with self.client.post(
+            f'/api/v1/jobs/{random.choice(self.job_ids)}/apply/',
+            json={'cover_letter': 'I would love to join your team.'},
+            name='/api/v1/jobs/[id]/apply/', catch_response=True,
+        ) as response:
+            # Applying twice to the same job is rejected; that is expected here.
+            if response.status_code == 400:
+                response.success()
+
+
+class Employer(HttpUser):
+    """A logged-in employer on the dashboard."""
+    weight = 1
+    wait_time = between(2, 5)
+
+    def on_start(self):
+        email = f'bench-employer-{random.randrange(EMPLOYERS)}@example.com'
+        response = self.client.post('/api/v1/auth/login/', json={'email': email, 'password': PASSWORD})
+        response.raise_for_status()
+        self.client.headers['Authorization'] = f"Bearer {response.json()['access']}"
+        self.job_ids = []
+
+    @task(3)
+    def my_jobs(self):
+        response = self.client.get('/api/v1/jobs/my-jobs/')
+        if response.ok:
+            self.job_ids = [job['id'] for job in response.json()['results']] or self.job_ids
+
+    @task(2)
+    def stats(self):
+        self.client.get('/api/v1/jobs/my-jobs/stats/')
+
+    @task(3)
+    def applications(self):
+        if self.job_ids:
+            ordering = random.choice(['', '-match_score'])
+            self.client.get(
+                f'/api/v1/jobs/{random.choice(self.job_ids)}/applications/',
+                params={'ordering': ordering} if ordering else None,
+                name='/api/v1/jobs/[id]/applications/',
+            )
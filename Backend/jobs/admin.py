@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Job, Application
+from .models import Job, Application, OutboxEvent
 
 @admin.register(Job)
 class JobAdmin(admin.ModelAdmin):
@@ -12,4 +12,10 @@ class JobAdmin(admin.ModelAdmin):
 class ApplicationAdmin(admin.ModelAdmin):
     list_display = ('job', 'candidate', 'status', 'created_at')
     list_filter = ('status', 'created_at')
-    search_fields = ('job__title', 'candidate__email')
\ No newline at end of file
+    search_fields = ('job__title', 'candidate__email')
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ('topic', 'created_at', 'dispatched_at', 'attempts')
+    list_filter = ('topic', 'dispatched_at')
+    search_fields = ('topic', 'last_error')
@@ -1,5 +1,11 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class JobsConfig(AppConfig):
     name = 'jobs'
+
+    def ready(self):
+        from . import notifications, resumes, signals  # noqa: F401  (registers handlers)
+        from .search import install_sqlite_search
+        post_migrate.connect(install_sqlite_search, sender=self)
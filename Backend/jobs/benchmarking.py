@@ -0,0 +1,436 @@
+"""
+Reproducible API benchmarks (see the seed_benchmark_data and benchmark_api
+management commands, and benchmarks/locustfile.py for load tests).
+
+`seed()` fills the database with a deterministic data set through
+bulk_create. `run()` replays fixed request scenarios against it in-process
+with Django's test client and reports latency percentiles and queries per
+request as a JSON-serializable dict, so reports from two commits (or from
+SQLite and PostgreSQL) can be compared with `compare()`.
+"""
+import platform
+import random
+import statistics
+import subprocess
+import time
+from contextlib import ExitStack
+from datetime import timedelta
+from unittest import mock
+
+import django
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, reset_queries
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce, TruncDate
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from django_redis import get_redis_connection
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import AccessToken
+
+from talent_bridge.query_inspection import inspect_queries
+from users.authentication import add_claims
+from users.models import CandidateProfile, EmployerProfile
+from . import user_state
+from .models import Application, Bookmark, Job, JobDailyApplicationCount, JobStatistics
+from .serializers import ApplicationSerializer, CandidateApplicationSerializer, CompactJobSerializer, JobSerializer
+from .statistics import create_statistics
+
+User = get_user_model()
+
+# Every seeded user logs in with this password (locust uses it too).
+PASSWORD = 'benchmark-password'
+EMPLOYER_PREFIX = 'bench-employer-'
+CANDIDATE_PREFIX = 'bench-candidate-'
+EMPLOYER_EMAIL = EMPLOYER_PREFIX + '{}@example.com'
+CANDIDATE_EMAIL = CANDIDATE_PREFIX + '{}@example.com'
+
+TITLES = ['Backend Engineer', 'Frontend Developer', 'Data Analyst', 'Product Designer',
+          'DevOps Engineer', 'Mobile Developer', 'QA Engineer', 'Project Manager']
+SKILLS = ['Python', 'Django', 'React', 'TypeScript', 'PostgreSQL', 'AWS', 'Docker', 'Figma', 'SQL', 'Kotlin']
+LOCATIONS = ['Nairobi', 'Lagos', 'Accra', 'Kigali', 'Remote']
+
+
+def seed(employers=50, jobs=5000, candidates=2000, applications=20000, bookmarks=10000,
+         batch_size=2000, random_seed=42, log=print):
+    """
+    Inserts a deterministic data set and brings the denormalized counters
+    (applications_count, bookmark_count, JobStatistics) in line with it.
+    Seeded users get the addresses EMPLOYER_EMAIL / CANDIDATE_EMAIL,
+    numbered from 0, and PASSWORD; running it again numbers the new users
+    after the existing ones.
+    """
+    rng = random.Random(random_seed)
+    now = timezone.now()
+    password = make_password(PASSWORD)
+    employer_offset = User.objects.filter(email__startswith=EMPLOYER_PREFIX).count()
+    candidate_offset = User.objects.filter(email__startswith=CANDIDATE_PREFIX).count()
+
+    employer_users = User.objects.bulk_create([
+        User(username=EMPLOYER_EMAIL.format(employer_offset + i), email=EMPLOYER_EMAIL.format(employer_offset + i),
+             password=password, is_employer=True)
+        for i in range(employers)
+    ], batch_size=batch_size)
+    EmployerProfile.objects.bulk_create([
+        EmployerProfile(user=user, company_name=f'Company {n}', industry='Technology')
+        for n, user in enumerate(employer_users)
+    ], batch_size=batch_size)
+    candidate_users = User.objects.bulk_create([
+        User(username=CANDIDATE_EMAIL.format(candidate_offset + i), email=CANDIDATE_EMAIL.format(candidate_offset + i),
+             password=password, is_candidate=True)
+        for i in range(candidates)
+    ], batch_size=batch_size)
+    CandidateProfile.objects.bulk_create([
+        CandidateProfile(user=user, title=rng.choice(TITLES), skills=', '.join(rng.sample(SKILLS, 3)))
+        for user in candidate_users
+    ], batch_size=batch_size)
+    log(f"Seeded {employers} employers and {candidates} candidates")
+
+    job_ids = []
+    for start in range(0, jobs, batch_size):
+        batch = []
+        for i in range(start, min(start + batch_size, jobs)):
+            employer = employer_users[i % employers]
+            skills = rng.sample(SKILLS, 4)
+            batch.append(Job(
+                employer=employer,
+                title=f'{rng.choice(TITLES)} {i}',
+                company_name=f'Company {i % employers}',
+                description=f"Join us to build products with {', '.join(skills)}. " * 5,
+                requirements=', '.join(skills),
+                location=rng.choice(LOCATIONS),
+                salary=rng.randint(20, 200) * 1000,
+                job_type=rng.choice(Job.JobType.values),
+                remote_status=rng.choice(Job.RemoteStatus.values),
+                experience_level=rng.choice(Job.ExperienceLevel.values),
+                is_active=rng.random() < 0.9,
+                # Some deadlines have passed, for the expired job sweep.
+                deadline=now + timedelta(days=rng.randint(-30, 90)) if rng.random() < 0.5 else None,
+            ))
+        created = Job.objects.bulk_create(batch)
+        create_statistics(created)
+        job_ids += [job.pk for job in created]
+        log(f"Seeded {len(job_ids)}/{jobs} jobs")
+
+    # Sampled without replacement, so the (job, user) pairs are unique.
+    def pairs(count):
+        total = len(job_ids) * len(candidate_users)
+        for index in rng.sample(range(total), min(count, total)):
+            yield job_ids[index % len(job_ids)], candidate_users[index // len(job_ids)].pk
+
+    statuses = Application.Status.values
+    rows = [
+        Application(job_id=job_id, candidate_id=candidate_id, cover_letter='I would love to join.',
+                    status=rng.choice(statuses))
+        for job_id, candidate_id in pairs(applications)
+    ]
+    Application.objects.bulk_create(rows, batch_size=batch_size)
+    log(f"Seeded {len(rows)} applications")
+
+    rows = [Bookmark(job_id=job_id, user_id=user_id) for job_id, user_id in pairs(bookmarks)]
+    Bookmark.objects.bulk_create(rows, batch_size=batch_size)
+    log(f"Seeded {len(rows)} bookmarks")
+
+    recount(job_ids)
+    log("Updated job counters")
+
+
+def recount(job_ids, batch_size=2000):
+    """Recomputes the counters that bulk_create bypassed for these jobs."""
+    def count(model, **filters):
+        return Coalesce(Subquery(
+            model.objects.filter(job=OuterRef('pk'), **filters)
+            .values('job').annotate(total=Count('pk')).values('total')
+        ), 0)
+
+    for start in range(0, len(job_ids), batch_size):
+        ids = job_ids[start:start + batch_size]
+        Job.objects.filter(pk__in=ids).update(
+            applications_count=count(Application), bookmark_count=count(Bookmark),
+        )
+        JobStatistics.objects.filter(job_id__in=ids).update(**{
+            field: Coalesce(Subquery(
+                Application.objects.filter(job=OuterRef('job'), status=status)
+                .values('job').annotate(total=Count('pk')).values('total')
+            ), 0)
+            for status, field in JobStatistics.STATUS_FIELDS.items()
+        })
+
+        JobDailyApplicationCount.objects.filter(job_id__in=ids).delete()
+        JobDailyApplicationCount.objects.bulk_create([
+            JobDailyApplicationCount(job_id=row['job'], employer_id=row['job__employer'], date=row['date'], count=row['count'])
+            for row in Application.objects.filter(job_id__in=ids)
+            .values('job', 'job__employer', date=TruncDate('created_at'))
+            .annotate(count=Count('pk'))
+        ])
+
+
+class Scenario:
+    """
+    A request repeated by run(). `path` may use {job}, {application} and
+    {page_job} (a different job the candidate has not applied to each time).
+    `undo` is a `(method, path, data)` request sent after each run, untimed,
+    to put the data back.
+    """
+
+    def __init__(self, name, path, user=None, method='get', data=None, undo=None):
+        self.name = name
+        self.path = path
+        self.user = user
+        self.method = method
+        self.data = data
+        self.undo = undo
+
+
+SCENARIOS = [
+    Scenario('browse: job board', '/api/v1/jobs/'),
+    Scenario('browse: job board, page 5', '/api/v1/jobs/?page=5'),
+    Scenario('browse: job board, cursor', '/api/v1/jobs/?pagination=cursor'),
+    Scenario('browse: job board, filtered', '/api/v1/jobs/?location=Nairobi&min_salary=50000&job_type=Full-Time'),
+    Scenario('browse: job detail', '/api/v1/jobs/{job}/'),
+    Scenario('search: full text', '/api/v1/jobs/?search=python%20django'),
+    Scenario('search: fuzzy location', '/api/v1/jobs/?location=Nairbi&fuzzy=true'),
+    Scenario('candidate: job board', '/api/v1/jobs/', user='candidate'),
+    Scenario('candidate: recommended', '/api/v1/jobs/recommended/', user='candidate'),
+    Scenario('candidate: my applications', '/api/v1/jobs/applications/me/', user='candidate'),
+    Scenario('candidate: bookmarks', '/api/v1/jobs/bookmarks/', user='candidate'),
+    # Toggling twice leaves the bookmark as it was.
+    Scenario('bookmark: toggle', '/api/v1/jobs/{job}/bookmark/', user='candidate', method='post',
+             undo=('post', '/api/v1/jobs/{job}/bookmark/', None)),
+    Scenario('apply: new application', '/api/v1/jobs/{page_job}/apply/', user='candidate', method='post',
+             data={'cover_letter': 'Benchmark application.'}),
+    Scenario('dashboard: my jobs', '/api/v1/jobs/my-jobs/', user='employer'),
+    Scenario('dashboard: stats', '/api/v1/jobs/my-jobs/stats/', user='employer'),
+    Scenario('dashboard: applications', '/api/v1/jobs/{job}/applications/', user='employer'),
+    Scenario('dashboard: applications by match', '/api/v1/jobs/{job}/applications/?ordering=-match_score',
+             user='employer'),
+    Scenario('dashboard: update application', '/api/v1/jobs/applications/{application}/', user='employer',
+             method='patch', data={'status': Application.Status.ACCEPTED},
+             undo=('patch', '/api/v1/jobs/applications/{application}/', {'status': Application.Status.PENDING})),
+]
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, round(fraction * len(ordered)) - 1))]
+
+
+def summarize(timings, queries):
+    return {
+        'requests': len(timings),
+        'p50_ms': round(percentile(timings, 0.50), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'p99_ms': round(percentile(timings, 0.99), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'queries_per_request': round(statistics.fmean(queries), 2),
+        'max_queries': max(queries),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _fixtures():
+    """Picks the seeded job with the most pending applications and the candidate with the most history."""
+    job = (
+        Job.objects.filter(is_active=True, statistics__pending_count__gt=0, employer__email__startswith=EMPLOYER_PREFIX)
+        .order_by('-applications_count', 'id').first()
+    )
+    candidate = (
+        User.objects.filter(email__startswith=CANDIDATE_PREFIX)
+        .annotate(applied=Count('applications')).order_by('-applied', 'id').first()
+    )
+    if job is None or candidate is None:
+        return None
+    applied = set(Application.objects.filter(candidate=candidate).values_list('job_id', flat=True))
+    open_jobs = (job_id for job_id in Job.objects.filter(is_active=True).order_by('id').values_list('id', flat=True)
+                 if job_id not in applied)
+    request = Request(APIRequestFactory().get('/api/v1/jobs/'))
+    request.user = candidate
+    return {
+        'request': request,
+        'job': job,
+        'employer': job.employer,
+        'candidate': candidate,
+        'application': Application.objects.filter(job=job, status=Application.Status.PENDING).order_by('id').first(),
+        'open_jobs': open_jobs,
+    }
+
+
+def _other_users():
+    """How many users were not created by seed()."""
+    return User.objects.exclude(email__startswith=EMPLOYER_PREFIX).exclude(email__startswith=CANDIDATE_PREFIX).count()
+
+
+def _clear_request_caches():
+    """Drops cached job board responses and per-user job state, and nothing else."""
+    cache.delete_pattern('jobs:response:*')
+    redis = get_redis_connection('default')
+    keys = list(redis.scan_iter(match=user_state.STATE_KEY.format('*'), count=1000))
+    if keys:
+        redis.delete(*keys)
+
+
+SERIALIZER_PAGE_SIZES = (10, 100)
+
+
+def _serializer_benchmarks(fixtures):
+    jobs = Job.objects.filter(is_active=True).select_related('employer').order_by('-created_at', '-id')
+    compact_jobs = CompactJobSerializer.optimize_queryset(jobs, fixtures['request'])
+    applications = Application.objects.select_related('candidate', 'job').order_by('-created_at', '-id')
+    for size in SERIALIZER_PAGE_SIZES:
+        yield f'serializer: JobSerializer x{size}', JobSerializer, list(jobs[:size])
+        yield f'serializer: CompactJobSerializer x{size}', CompactJobSerializer, list(compact_jobs[:size])
+        yield f'serializer: ApplicationSerializer x{size}', ApplicationSerializer, list(applications[:size])
+        yield (f'serializer: CandidateApplicationSerializer x{size}', CandidateApplicationSerializer,
+               list(applications[:size]))
+
+
+def run(requests=100, warmup=5, scenarios=None, clear_cache=False, force=False, log=print):
+    """
+    Runs every scenario `warmup + requests` times and returns the report.
+    Throttling is disabled for the run, and the test client's host is
+    allowed. With `clear_cache`, cached job board responses and per-user
+    job state are deleted before every request, measuring the cold path;
+    the rest of the cache is left alone. Applications created by the
+    apply scenario are deleted afterwards.
+
+    The scenarios write to the configured database and cache, so unless
+    `force` is set the run is refused when the database holds users that
+    seed() did not create.
+
+    Each scenario's first request runs under query inspection, and its
+    repeated (N+1) and slow queries are listed in the report.
+
+    Each serializer is also timed on its own, from already loaded rows to
+    rendered JSON, for pages of SERIALIZER_PAGE_SIZES.
+    """
+    fixtures = _fixtures()
+    if fixtures is None:
+        raise ValueError("No benchmark data found; run seed_benchmark_data first.")
+    if not force:
+        other_users = _other_users()
+        if other_users:
+            raise ValueError(
+                f"The database holds {other_users} users besides the benchmark data; "
+                "run against a dedicated database or pass --i-know."
+            )
+
+    clients = {None: APIClient()}
+    for role in ('candidate', 'employer'):
+        client = APIClient()
+        token = add_claims(AccessToken.for_user(fixtures[role]), fixtures[role])
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        clients[role] = client
+
+    created = []
+
+    def send(scenario, inspect=False):
+        """Sends one request of the scenario; returns (ms, queries, inspection report)."""
+        params = {'job': fixtures['job'].pk, 'application': fixtures['application'].pk}
+        if '{page_job}' in scenario.path:
+            params['page_job'] = next(fixtures['open_jobs'])
+        client = clients[scenario.user]
+        if clear_cache:
+            _clear_request_caches()
+
+        # The capture slices the connection's bounded query log by
+        # position; start every request from an empty log.
+        reset_queries()
+        with ExitStack() as stack:
+            captured = stack.enter_context(CaptureQueriesContext(connection))
+            inspector = stack.enter_context(inspect_queries()) if inspect else None
+            start = time.perf_counter()
+            response = getattr(client, scenario.method)(scenario.path.format(**params), scenario.data, format='json')
+            elapsed = (time.perf_counter() - start) * 1000
+        if response.status_code >= 400:
+            raise RuntimeError(f"{scenario.name}: HTTP {response.status_code} {response.content[:200]!r}")
+        if scenario.method == 'post' and scenario.path.endswith('/apply/'):
+            created.append(response.data['id'])
+        if scenario.undo:
+            method, path, data = scenario.undo
+            getattr(client, method)(path.format(**params), data, format='json')
+        return elapsed, len(captured), inspector.report() if inspector else None
+
+    results = {}
+    allowed_hosts = override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'])
+    with allowed_hosts, mock.patch.object(APIView, 'get_throttles', return_value=[]):
+        for scenario in scenarios or SCENARIOS:
+            # One untimed request under query inspection (it captures a
+            # stack per query), then the warmup and timed ones.
+            _, _, inspection = send(scenario, inspect=True)
+            timings, queries = [], []
+            for iteration in range(warmup + requests):
+                elapsed, count, _ = send(scenario)
+                if iteration >= warmup:
+                    timings.append(elapsed)
+                    queries.append(count)
+
+            result = results[scenario.name] = summarize(timings, queries)
+            result['repeated_queries'] = [
+                {'sql': finding['sql'], 'count': finding['count'], 'locations': finding['locations']}
+                for finding in inspection['repeated_queries']
+            ]
+            result['slow_queries'] = [
+                {'sql': finding['sql'], 'duration_ms': finding['duration_ms'], 'location': finding['location']}
+                for finding in inspection['slow_queries']
+            ]
+            log(f"{scenario.name}: p50 {result['p50_ms']} ms, {result['queries_per_request']} queries"
+                + (f", {len(result['repeated_queries'])} repeated query shapes" if result['repeated_queries'] else ""))
+
+    for application in Application.objects.filter(pk__in=created):
+        application.delete()
+
+    for name, serializer_class, instances in _serializer_benchmarks(fixtures):
+        timings, queries = [], []
+        for iteration in range(warmup + requests):
+            reset_queries()
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                data = serializer_class(instances, many=True, context={'request': fixtures['request']}).data
+                JSONRenderer().render(data)
+                elapsed = (time.perf_counter() - start) * 1000
+            if iteration >= warmup:
+                timings.append(elapsed)
+                queries.append(len(captured))
+        results[name] = summarize(timings, queries)
+        log(f"{name}: p50 {results[name]['p50_ms']} ms")
+
+    return {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'requests': requests,
+            'warmup': warmup,
+            'clear_cache': clear_cache,
+            'jobs': Job.objects.count(),
+            'applications': Application.objects.count(),
+        },
+        'results': results,
+    }
+
+
+def compare(baseline, current, metrics=('p50_ms', 'p95_ms', 'p99_ms', 'queries_per_request')):
+    """Yields `(scenario, metric, baseline value, current value)` for scenarios in both reports."""
+    for name, result in current['results'].items():
+        before = baseline['results'].get(name)
+        if before is None:
+            continue
+        for metric in metrics:
+            yield name, metric, before[metric], result[metric]
@@ -0,0 +1,116 @@
+import hashlib
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django_redis.exceptions import ConnectionInterrupted
+from rest_framework.response import Response
+
+from talent_bridge.metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = 'jobs:generation'
+
+
+def get_generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # Seed from the clock rather than 1 so that an evicted counter never
+        # comes back at a value that old cache entries were stored under.
+        cache.add(GENERATION_KEY, int(time.time() * 1000), timeout=None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def bump_generation():
+    """Invalidates every cached job board response in one step."""
+    try:
+        try:
+            cache.incr(GENERATION_KEY)
+        except ValueError:
+            get_generation()
+    except ConnectionInterrupted:
+        # Job writes must not fail with the cache; entries expire on their own.
+        logger.warning("Could not invalidate cached job responses", exc_info=True)
+
+
+def _etag_matches(request, etag):
+    header = request.META.get('HTTP_IF_NONE_MATCH', '')
+    candidates = [tag.strip().removeprefix('W/') for tag in header.split(',')]
+    return etag in candidates or '*' in candidates
+
+
+class CachedResponseMixin:
+    """
+    Caches anonymous GET responses in Redis, keyed on the job cache
+    generation, the accepted renderer and the normalized `cache_query_params`.
+    Bumping the generation (see jobs.signals) invalidates all of them at
+    once. Responses carry an ETag, and a matching If-None-Match gets a 304.
+    If the cache is unavailable, requests are served uncached.
+
+    Job edits bump the generation, but the applications_count and
+    bookmark_count counters (moved with F() updates) do not: anonymous
+    visitors may see them up to `cache_timeout` seconds behind.
+    """
+    cache_query_params = ()
+    cache_timeout = getattr(settings, 'JOB_RESPONSE_CACHE_TIMEOUT', 300)
+
+    def get(self, request, *args, **kwargs):
+        self.response_cache_key = None
+        if request.user.is_authenticated:
+            return super().get(request, *args, **kwargs)
+
+        try:
+            self.response_cache_key = self.get_response_cache_key(request)
+            cached = cache.get(self.response_cache_key)
+        except ConnectionInterrupted:
+            logger.warning("Job response cache unavailable, serving uncached", exc_info=True)
+            self.response_cache_key = cached = None
+        record_cache(hit=cached is not None)
+        if cached is None:
+            return super().get(request, *args, **kwargs)
+
+        content, content_type, etag = cached
+        response = HttpResponse(content, content_type=content_type)
+        response['ETag'] = etag
+        return response
+
+    def get_response_cache_key(self, request):
+        params = []
+        for name in sorted(self.cache_query_params):
+            values = [value.strip() for value in request.query_params.getlist(name)]
+            params.extend((name, value) for value in values if value)
+
+        fingerprint = '|'.join([
+            request.accepted_renderer.format,
+            repr(sorted(self.kwargs.items())),
+            repr(params),
+        ])
+        digest = hashlib.md5(fingerprint.encode()).hexdigest()
+        return f'jobs:response:{get_generation()}:{self.__class__.__name__}:{digest}'
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key = getattr(self, 'response_cache_key', None)
+        if key is None or response.status_code != 200:
+            return response
+
+        if isinstance(response, Response):
+            response.render()
+            etag = '"%s"' % hashlib.md5(response.content).hexdigest()
+            response['ETag'] = etag
+            try:
+                cache.set(key, (response.content, response['Content-Type'], etag), self.cache_timeout)
+            except ConnectionInterrupted:
+                logger.warning("Could not cache the job response", exc_info=True)
+
+        if _etag_matches(request, response['ETag']):
+            not_modified = HttpResponseNotModified()
+            not_modified['ETag'] = response['ETag']
+            response = not_modified
+        patch_vary_headers(response, ['Accept', 'Authorization'])
+        return response
@@ -0,0 +1,116 @@
+"""
+Read-only fast path for the busiest list endpoints, enabled with
+API_FAST_SERIALIZERS (see settings).
+
+Each class produces exactly what its ModelSerializer would, but from
+`.values()` rows, building plain dicts instead of instantiating models and
+running every field's to_representation. The mirrored serializer still
+decides which fields are returned, including `?fields=`.
+"""
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from talent_bridge.metrics import timer
+
+from . import user_state
+from .serializers import CandidateApplicationSerializer, CompactJobSerializer, JobSummarySerializer
+
+
+class ValuesSerializer:
+    """Base for the fast serializers; subclasses define `to_representation(rows)`."""
+    serializer_class = None
+    # Output field -> values() lookups, for fields that do not read a column
+    # of their own name. An empty list means nothing is read.
+    field_lookups = {}
+    # Always read: the primary key and the keyset pagination cursor.
+    required_lookups = ('id', 'created_at')
+
+    def __init__(self, request):
+        self.request = request
+        self.fields = list(self.serializer_class(context={'request': request}).fields)
+        self.datetime_field = serializers.DateTimeField()
+
+    def values(self, queryset):
+        lookups = list(self.required_lookups)
+        for name in self.fields:
+            lookups += [lookup for lookup in self.field_lookups.get(name, [name]) if lookup not in lookups]
+        return queryset.values(*lookups)
+
+    def format_datetime(self, value):
+        return None if value is None else self.datetime_field.to_representation(value)
+
+
+class FastJobSerializer(ValuesSerializer):
+    """
+    CompactJobSerializer for job board pages. Expects a queryset that went
+    through CompactJobSerializer.optimize_queryset(), which adds `summary`.
+    """
+    serializer_class = CompactJobSerializer
+    field_lookups = {
+        'employer_email': ['employer__email'],
+        'days_ago': ['created_at'],
+        'is_bookmarked': [],
+        'has_applied': [],
+    }
+
+    def to_representation(self, rows):
+        rows = list(rows)
+        bookmarked = applied = set()
+        if {'is_bookmarked', 'has_applied'} & set(self.fields) and self.request.user.is_authenticated:
+            bookmarked, applied = user_state.lookup(self.request.user.pk, [row['id'] for row in rows])
+
+        now = timezone.now()
+        computed = {
+            'employer_email': lambda row: row['employer__email'],
+            'days_ago': lambda row: (now - row['created_at']).days,
+            'created_at': lambda row: self.format_datetime(row['created_at']),
+            'is_bookmarked': lambda row: row['id'] in bookmarked,
+            'has_applied': lambda row: row['id'] in applied,
+        }
+        getters = [(name, computed.get(name) or (lambda row, name=name: row[name])) for name in self.fields]
+        return [{name: get(row) for name, get in getters} for row in rows]
+
+
+class FastCandidateApplicationSerializer(ValuesSerializer):
+    """CandidateApplicationSerializer for a candidate's own applications."""
+    serializer_class = CandidateApplicationSerializer
+    job_fields = JobSummarySerializer.Meta.fields
+    field_lookups = {'job': [f'job__{field}' for field in job_fields]}
+
+    def to_representation(self, rows):
+        result = []
+        for row in rows:
+            item = {}
+            for name in self.fields:
+                if name == 'job':
+                    item['job'] = {field: row[f'job__{field}'] for field in self.job_fields}
+                elif name == 'created_at':
+                    item['created_at'] = self.format_datetime(row['created_at'])
+                else:
+                    item[name] = row[name]
+            result.append(item)
+        return result
+
+
+class FastListMixin:
+    """
+    Serves GET lists through `fast_serializer_class` when
+    API_FAST_SERIALIZERS is on. Filtering, ordering and pagination are
+    unchanged; the paginators accept dict rows.
+    """
+    fast_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        if not settings.API_FAST_SERIALIZERS or self.fast_serializer_class is None:
+            return super().list(request, *args, **kwargs)
+
+        serializer = self.fast_serializer_class(request)
+        queryset = serializer.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        with timer('serializer'):
+            data = serializer.to_representation(queryset if page is None else page)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
@@ -1,15 +1,56 @@
+import operator
+from functools import reduce
+
 import django_filters
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connections
+from django.db.models import F, TextField
+from django.db.models.functions import Cast, Upper
+from rest_framework.settings import api_settings
 from .models import Job
 
 class JobFilter(django_filters.FilterSet):
-    title = django_filters.CharFilter(lookup_expr='icontains')
-    location = django_filters.CharFilter(lookup_expr='icontains')
-    ccompany = django_filters.CharFilter(field_name='company_name', lookup_expr='icontains')
-    
+    # On PostgreSQL these are backed by pg_trgm GIN indexes on UPPER(column::text),
+    # the exact expression Django emits for icontains.
+    title = django_filters.CharFilter(method='filter_text')
+    location = django_filters.CharFilter(method='filter_text')
+    ccompany = django_filters.CharFilter(field_name='company_name', method='filter_text')
+
+    # Match near-misses ("Nairbi") by trigram word similarity and rank by it
+    fuzzy = django_filters.BooleanFilter(method='filter_fuzzy')
+
     # Range filters for salary
     min_salary = django_filters.NumberFilter(field_name='salary', lookup_expr='gte')
     max_salary = django_filters.NumberFilter(field_name='salary', lookup_expr='lte')
 
     class Meta:
         model = Job
-        fields = ['job_type', 'remote_status', 'experience_level']
\ No newline at end of file
+        fields = ['job_type', 'remote_status', 'experience_level']
+
+    def filter_queryset(self, queryset):
+        self.similarities = []
+        queryset = super().filter_queryset(queryset)
+
+        ordering = self.request.query_params.get(api_settings.ORDERING_PARAM) if self.request else None
+        if self.similarities and not ordering:
+            queryset = queryset.annotate(
+                similarity=reduce(operator.add, self.similarities)
+            ).order_by('-similarity', '-created_at')
+        return queryset
+
+    def filter_fuzzy(self, queryset, name, value):
+        # Read by filter_text; on its own this filter does nothing.
+        return queryset
+
+    def filter_text(self, queryset, name, value):
+        fuzzy = self.form.cleaned_data.get('fuzzy')
+        if not fuzzy or connections[queryset.db].vendor != 'postgresql':
+            return queryset.filter(**{f'{name}__icontains': value})
+
+        # `column %> value` (word_similarity above pg_trgm.word_similarity_threshold)
+        # can use the same trigram index as icontains.
+        indexed = f'{name}_trgm'
+        self.similarities.append(TrigramWordSimilarity(value, name))
+        return queryset.alias(**{
+            indexed: Upper(Cast(F(name), output_field=TextField())),
+        }).filter(**{f'{indexed}__trigram_word_similar': value.upper()})
@@ -0,0 +1,77 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs import benchmarking
+
+
+class Command(BaseCommand):
+    help = (
+        "Replays the browse, search, apply, bookmark and dashboard scenarios in-process "
+        "and times each serializer, then prints a JSON report of p50/p95/p99 latency "
+        "and queries per request, plus any repeated (N+1) or slow queries. Run "
+        "seed_benchmark_data first, on a dedicated database. Pass --compare with an "
+        "earlier report to see the change per scenario."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100, help="Timed requests per scenario.")
+        parser.add_argument('--warmup', type=int, default=5, help="Untimed requests per scenario first.")
+        parser.add_argument('--scenario', action='append', help="Only run scenarios whose name contains this.")
+        parser.add_argument(
+            '--clear-cache', action='store_true',
+            help="Delete cached job board responses and user job state before every request.",
+        )
+        parser.add_argument(
+            '--i-know', action='store_true',
+            help="Run even though the database holds more than the benchmark data. Scenarios write to it.",
+        )
+        parser.add_argument('--output', help="Write the report to this file instead of stdout.")
+        parser.add_argument('--compare', help="A previous report to compare against.")
+        parser.add_argument(
+            '--fail-on-repeated-queries', action='store_true',
+            help="Exit with an error if a scenario runs one query shape QUERY_INSPECTION_REPEAT_THRESHOLD times.",
+        )
+
+    def handle(self, *args, **options):
+        scenarios = benchmarking.SCENARIOS
+        if options['scenario']:
+            scenarios = [s for s in scenarios if any(part in s.name for part in options['scenario'])]
+
+        try:
+            report = benchmarking.run(
+                requests=options['requests'],
+                warmup=options['warmup'],
+                scenarios=scenarios,
+                clear_cache=options['clear_cache'],
+                force=options['i_know'],
+                log=self.stderr.write,
+            )
+        except (ValueError, RuntimeError) as exc:
+            raise CommandError(exc)
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+            self.stderr.write(f"Compared with {baseline['meta'].get('commit') or options['compare']}:")
+            for name, metric, before, after in benchmarking.compare(baseline, report):
+                change = f"{(after - before) / before:+.0%}" if before else "n/a"
+                self.stderr.write(f"  {name} {metric}: {before} -> {after} ({change})")
+
+        repeated = {
+            name: result['repeated_queries']
+            for name, result in report['results'].items() if result.get('repeated_queries')
+        }
+        for name, findings in repeated.items():
+            for finding in findings:
+                locations = ', '.join(f"{location} ({count}x)" for location, count in finding['locations'].items())
+                self.stderr.write(f"{name}: {finding['count']}x {finding['sql'][:120]} from {locations}")
+        if repeated and options['fail_on_repeated_queries']:
+            raise CommandError(f"Repeated queries in: {', '.join(repeated)}")
@@ -0,0 +1,76 @@
+import statistics
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from jobs.fast_serializers import FastCandidateApplicationSerializer, FastJobSerializer
+from jobs.models import Application, Job
+from jobs.serializers import CandidateApplicationSerializer, CompactJobSerializer
+from talent_bridge.renderers import ORJSONRenderer
+
+
+class Command(BaseCommand):
+    help = (
+        "Times a page of the job board and of a candidate's applications from queryset "
+        "to JSON bytes, through the ModelSerializers and JSONRenderer and through "
+        "jobs.fast_serializers and ORJSONRenderer, and checks both give the same output. "
+        "Run seed_benchmark_data first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-sizes', type=int, nargs='+', default=[10, 100])
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        candidate = Application.objects.values_list('candidate_id', flat=True).first()
+        if candidate is None:
+            raise CommandError("No applications to benchmark; seed some data first.")
+
+        request = Request(APIRequestFactory().get('/api/jobs/'))
+        request.user = AnonymousUser()
+
+        jobs = CompactJobSerializer.optimize_queryset(
+            Job.objects.filter(is_active=True).order_by('-created_at', '-id'), request
+        )
+        applications = Application.objects.filter(candidate_id=candidate).select_related('job').order_by('-created_at', '-id')
+
+        for page_size in options['page_sizes']:
+            self.compare(
+                f"job board, {page_size} jobs", request, jobs[:page_size],
+                CompactJobSerializer, FastJobSerializer, options['repeat'],
+            )
+            self.compare(
+                f"candidate applications, {page_size} rows", request, applications[:page_size],
+                CandidateApplicationSerializer, FastCandidateApplicationSerializer, options['repeat'],
+            )
+
+    def compare(self, name, request, queryset, serializer_class, fast_serializer_class, repeat):
+        def standard():
+            data = serializer_class(queryset.all(), many=True, context={'request': request}).data
+            return JSONRenderer().render(data)
+
+        def fast():
+            serializer = fast_serializer_class(request)
+            return ORJSONRenderer().render(serializer.to_representation(serializer.values(queryset.all())))
+
+        if standard() != fast():
+            raise CommandError(f"{name}: the fast path output differs from the serializer output.")
+
+        standard_ms = self.median_ms(standard, repeat)
+        fast_ms = self.median_ms(fast, repeat)
+        self.stdout.write(
+            f"{name}: serializer + JSONRenderer {standard_ms:.2f} ms, "
+            f"fast path + ORJSONRenderer {fast_ms:.2f} ms ({standard_ms / fast_ms:.1f}x)"
+        )
+
+    def median_ms(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,70 @@
+import re
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from jobs import benchmarking
+from jobs.models import Application, Job
+
+# PostgreSQL prints "Seq Scan on jobs_job", SQLite a bare "SCAN jobs_job"
+# (an ordered index walk shows up as "SCAN jobs_job USING INDEX ...").
+SEQUENTIAL_SCAN = re.compile(r'Seq Scan|\bSCAN \w+\s*$', re.MULTILINE)
+
+
+class Command(BaseCommand):
+    help = (
+        "Prints EXPLAIN plans for the job listing access paths and flags any that "
+        "still fall back to a sequential scan. Use --seed to generate data first, "
+        "e.g. `--seed 1000000` to check the plans at production scale."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, help="Number of benchmark jobs to insert first.")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--analyze', action='store_true', help="Run EXPLAIN ANALYZE (PostgreSQL only).")
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            self.seed(options['seed'], options['batch_size'])
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        explain_options = {'analyze': True} if options['analyze'] and connection.vendor == 'postgresql' else {}
+        sequential = []
+        for name, queryset in self.access_paths():
+            plan = queryset.explain(**explain_options)
+            if SEQUENTIAL_SCAN.search(plan):
+                sequential.append(name)
+
+            self.stdout.write(self.style.MIGRATE_HEADING(f"== {name}"))
+            self.stdout.write(plan)
+            self.stdout.write('')
+
+        if sequential:
+            self.stdout.write(self.style.WARNING(f"Sequential scans: {', '.join(sequential)}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("All access paths use an index."))
+
+    def access_paths(self):
+        now = timezone.now()
+        employer = Job.objects.values_list('employer_id', flat=True).first()
+        candidate = Application.objects.values_list('candidate_id', flat=True).first()
+        recent = ('-created_at', '-id')
+
+        return [
+            ("job board, newest first", Job.objects.filter(is_active=True).order_by(*recent)[:10]),
+            ("job board, salary range", Job.objects.filter(
+                is_active=True, salary__gte=80000, salary__lte=90000,
+            ).order_by('salary')[:10]),
+            ("employer dashboard", Job.objects.filter(employer_id=employer).order_by(*recent)[:10]),
+            ("expired job sweep", Job.objects.filter(is_active=True, deadline__lt=now).values('id')),
+            ("candidate applications", Application.objects.filter(candidate_id=candidate).order_by(*recent)[:10]),
+        ]
+
+    def seed(self, count, batch_size):
+        benchmarking.seed(
+            employers=100, jobs=count, candidates=1000, applications=count, bookmarks=0,
+            batch_size=batch_size, log=self.stdout.write,
+        )
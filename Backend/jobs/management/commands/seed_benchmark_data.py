@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from jobs import benchmarking
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds a deterministic benchmark data set (employers, jobs, candidates, "
+        "applications and bookmarks) with bulk_create. Seeded users log in with "
+        f"the password '{benchmarking.PASSWORD}'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employers', type=int, default=50)
+        parser.add_argument('--jobs', type=int, default=5000)
+        parser.add_argument('--candidates', type=int, default=2000)
+        parser.add_argument('--applications', type=int, default=20000)
+        parser.add_argument('--bookmarks', type=int, default=10000)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=42, help="Random seed; the same seed gives the same data.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            benchmarking.seed(
+                employers=options['employers'],
+                jobs=options['jobs'],
+                candidates=options['candidates'],
+                applications=options['applications'],
+                bookmarks=options['bookmarks'],
+                batch_size=options['batch_size'],
+                random_seed=options['seed'],
+                log=self.stdout.write,
+            )
+        self.stdout.write(self.style.SUCCESS("Benchmark data seeded."))
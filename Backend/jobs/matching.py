@@ -0,0 +1,104 @@
+"""
+Candidate-to-job match scoring.
+
+Each job's applicants are scored against the job in one go: the job and
+every applicant document are turned into a sparse TF-IDF matrix (sublinear
+term frequency, smoothed IDF over that corpus, L2-normalized rows) and the
+score is the cosine similarity with the job vector, i.e. one sparse
+matrix-vector product. Scores are computed by the `score_job_applications`
+task and stored on `Application.match_score`, so ranking applicants is an
+indexed ORDER BY.
+"""
+import re
+
+import numpy as np
+from scipy import sparse
+
+TOKEN_RE = re.compile(r'[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9+#]+)*')
+
+STOP_WORDS = frozenset("""
+    a about above after all also an and any are as at be been being but by
+    can could did do does etc for from had has have having he her here his
+    how i if in into is it its me more most my no not of on or our out over
+    she should so some such than that the their them then there these they
+    this those through to too under up very was we were what when where
+    which while who will with would you your years year experience work
+    working strong good great ability team
+""".split())
+
+# Requirements say what the employer is screening for; the description is
+# mostly context, so its terms count for less.
+REQUIREMENTS_WEIGHT = 2
+SKILLS_WEIGHT = 2
+
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall((text or '').lower()) if token not in STOP_WORDS]
+
+
+def job_document(job):
+    return tokenize(job.requirements) * REQUIREMENTS_WEIGHT + tokenize(job.title) + tokenize(job.description)
+
+
+def candidate_document(resume_text, skills, title=''):
+    return tokenize(skills) * SKILLS_WEIGHT + tokenize(title) + tokenize(resume_text)
+
+
+def _counts(documents, vocabulary, grow):
+    indices, indptr = [], [0]
+    for tokens in documents:
+        if grow:
+            indices.extend(vocabulary.setdefault(token, len(vocabulary)) for token in tokens)
+        else:
+            indices.extend(vocabulary[token] for token in tokens if token in vocabulary)
+        indptr.append(len(indices))
+
+    counts = sparse.csr_matrix(
+        (np.ones(len(indices), dtype=np.float64), np.asarray(indices, dtype=np.int64), np.asarray(indptr)),
+        shape=(len(documents), len(vocabulary)),
+    )
+    counts.sum_duplicates()
+
+    # Sublinear tf so one term repeated many times cannot dominate.
+    counts.data = 1.0 + np.log(counts.data)
+    return counts
+
+
+def _weigh(counts, idf):
+    weighted = counts.multiply(idf).tocsr()
+    norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return (sparse.diags(1.0 / norms) @ weighted).tocsr()
+
+
+def fit_tfidf(documents):
+    """
+    Builds an L2-normalized TF-IDF CSR matrix, one row per document.
+    Returns `(matrix, vocabulary, idf)`; see transform_tfidf.
+    """
+    vocabulary = {}
+    counts = _counts(documents, vocabulary, grow=True)
+    document_frequency = np.bincount(counts.indices, minlength=len(vocabulary))
+    idf = np.log((1 + len(documents)) / (1 + document_frequency)) + 1.0
+    return _weigh(counts, idf), vocabulary, idf
+
+
+def transform_tfidf(documents, vocabulary, idf):
+    """Rows for new documents in a fitted space; unknown terms are dropped."""
+    return _weigh(_counts(documents, vocabulary, grow=False), idf)
+
+
+def tfidf_matrix(documents):
+    """Builds an L2-normalized TF-IDF CSR matrix, one row per document."""
+    return fit_tfidf(documents)[0]
+
+
+def score_documents(job_tokens, candidate_tokens):
+    """
+    Returns the cosine similarity (0..1) between the job and each candidate
+    document, in order.
+    """
+    if not candidate_tokens:
+        return np.zeros(0)
+    matrix = tfidf_matrix([job_tokens, *candidate_tokens])
+    return (matrix[1:] @ matrix[0].T).toarray().ravel()
@@ -0,0 +1,62 @@
+# Generated by Django 6.0.2 on 2026-10-18 16:35
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# SQLite gets its FTS5 index from the post_migrate hook in jobs.search instead.
+POSTGRES_FORWARD_SQL = [
+    """
+    CREATE OR REPLACE FUNCTION jobs_job_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.company_name, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(NEW.requirements, '')), 'C') ||
+            setweight(to_tsvector('english', coalesce(NEW.description, '')), 'D');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER jobs_job_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, company_name, requirements, description, search_vector
+    ON jobs_job FOR EACH ROW EXECUTE FUNCTION jobs_job_search_vector_update()
+    """,
+    # Fires the trigger once for every existing row to backfill the column.
+    "UPDATE jobs_job SET title = title",
+    "CREATE INDEX jobs_job_search_vector_gin ON jobs_job USING gin (search_vector)",
+]
+
+POSTGRES_REVERSE_SQL = [
+    "DROP INDEX IF EXISTS jobs_job_search_vector_gin",
+    "DROP TRIGGER IF EXISTS jobs_job_search_vector_trigger ON jobs_job",
+    "DROP FUNCTION IF EXISTS jobs_job_search_vector_update()",
+]
+
+
+def run_postgres_sql(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0010_alter_application_resume_alter_job_company_name_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(
+            run_postgres_sql(POSTGRES_FORWARD_SQL),
+            run_postgres_sql(POSTGRES_REVERSE_SQL),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 6.0.2 on 2026-10-18 16:35
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_applications_count(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    Application = apps.get_model('jobs', 'Application')
+    counts = (
+        Application.objects.filter(job=OuterRef('pk'))
+        .values('job')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    Job.objects.update(applications_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0011_job_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='applications_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_applications_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 6.0.2 on 2026-10-18 16:40
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# Expression indexes on UPPER(column::text) so Django's icontains
+# (UPPER(col::text) LIKE UPPER('%term%')) and the fuzzy filter can use them.
+TRIGRAM_COLUMNS = ['title', 'location', 'company_name']
+
+
+def run_postgres_sql(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0014_job_filter_indexes'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(
+            run_postgres_sql([
+                f"CREATE INDEX jobs_job_{column}_trgm ON jobs_job USING gin (UPPER({column}::text) gin_trgm_ops)"
+                for column in TRIGRAM_COLUMNS
+            ]),
+            run_postgres_sql([
+                f"DROP INDEX IF EXISTS jobs_job_{column}_trgm" for column in TRIGRAM_COLUMNS
+            ]),
+        ),
+    ]
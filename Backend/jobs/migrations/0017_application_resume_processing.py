@@ -0,0 +1,29 @@
+# Generated by Django 6.0.2 on 2026-10-18 16:44
+
+import jobs.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0016_outboxevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='application',
+            name='resume_status',
+            field=models.CharField(blank=True, choices=[('PENDING', 'Pending'), ('READY', 'Ready'), ('REJECTED', 'Rejected')], max_length=10),
+        ),
+        migrations.AddField(
+            model_name='application',
+            name='resume_text',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AlterField(
+            model_name='application',
+            name='resume',
+            field=models.FileField(blank=True, max_length=255, null=True, storage=jobs.storage.resume_storage, upload_to='resumes/%Y/%m/%d/'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0.2 on 2026-10-18 16:48
+
+from django.db import migrations, models
+
+# Serves JobApplicationsView ?ordering=-match_score, which puts unscored
+# (NULL) applications last. PostgreSQL sorts NULLs first on DESC, so the
+# index spells NULLS LAST out; SQLite already sorts them last and rejects
+# NULLS LAST in an index definition.
+INDEX_NAME = 'application_job_match_idx'
+
+
+def create_index(apps, schema_editor):
+    nulls = ' NULLS LAST' if schema_editor.connection.vendor == 'postgresql' else ''
+    schema_editor.execute(
+        f"CREATE INDEX {INDEX_NAME} ON jobs_application (job_id, match_score DESC{nulls}, id DESC)"
+    )
+
+
+def drop_index(apps, schema_editor):
+    schema_editor.execute(f"DROP INDEX IF EXISTS {INDEX_NAME}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0017_application_resume_processing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='application',
+            name='match_score',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(create_index, drop_index),
+    ]
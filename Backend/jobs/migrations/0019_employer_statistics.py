@@ -0,0 +1,87 @@
+# Generated by Django 6.0.2 on 2026-10-18 16:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+
+
+def backfill_statistics(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    Application = apps.get_model('jobs', 'Application')
+    JobStatistics = apps.get_model('jobs', 'JobStatistics')
+    JobDailyApplicationCount = apps.get_model('jobs', 'JobDailyApplicationCount')
+
+    jobs = Job.objects.annotate(
+        pending=Count('applications', filter=Q(applications__status='PENDING'), distinct=True),
+        accepted=Count('applications', filter=Q(applications__status='ACCEPTED'), distinct=True),
+        rejected=Count('applications', filter=Q(applications__status='REJECTED'), distinct=True),
+        bookmarked=Count('bookmarks', distinct=True),
+    ).values_list('id', 'employer_id', 'pending', 'accepted', 'rejected', 'bookmarked')
+    JobStatistics.objects.bulk_create(
+        [
+            JobStatistics(
+                job_id=job_id, employer_id=employer_id, pending_count=pending,
+                accepted_count=accepted, rejected_count=rejected, bookmark_count=bookmarked,
+            )
+            for job_id, employer_id, pending, accepted, rejected, bookmarked in jobs.iterator(chunk_size=2000)
+        ],
+        batch_size=1000,
+    )
+
+    daily = (
+        Application.objects.annotate(date=TruncDate('created_at'))
+        .values('job_id', 'job__employer_id', 'date')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    JobDailyApplicationCount.objects.bulk_create(
+        [
+            JobDailyApplicationCount(
+                job_id=row['job_id'], employer_id=row['job__employer_id'], date=row['date'], count=row['count'],
+            )
+            for row in daily.iterator(chunk_size=2000)
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0018_application_match_score'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobDailyApplicationCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('employer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_application_counts', to='jobs.job')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['employer', 'date'], name='jobdaily_employer_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('job', 'date'), name='jobdaily_job_date_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='JobStatistics',
+            fields=[
+                ('job', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='statistics', serialize=False, to='jobs.job')),
+                ('pending_count', models.PositiveIntegerField(default=0)),
+                ('accepted_count', models.PositiveIntegerField(default=0)),
+                ('rejected_count', models.PositiveIntegerField(default=0)),
+                ('bookmark_count', models.PositiveIntegerField(default=0)),
+                ('employer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['employer'], name='jobstats_employer_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_statistics, migrations.RunPython.noop),
+    ]
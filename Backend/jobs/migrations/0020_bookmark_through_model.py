@@ -0,0 +1,76 @@
+# Generated by Django 6.0.2 on 2026-10-18 16:54
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_bookmark_count(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    Bookmark = apps.get_model('jobs', 'Bookmark')
+    counts = (
+        Bookmark.objects.filter(job=OuterRef('pk'))
+        .order_by()
+        .values('job')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    Job.objects.update(bookmark_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0019_employer_statistics'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Bookmark takes over the table Django created for the plain M2M
+        # (jobs_job_bookmarks with its (job_id, user_id) unique index), so
+        # only the state changes here; the database keeps its rows.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='Bookmark',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='jobs.job')),
+                        ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                    ],
+                    options={
+                        'db_table': 'jobs_job_bookmarks',
+                        'unique_together': {('job', 'user')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='job',
+                    name='bookmarks',
+                    field=models.ManyToManyField(blank=True, related_name='bookmarked_jobs', through='jobs.Bookmark', to=settings.AUTH_USER_MODEL),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='bookmark',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='bookmark',
+            index=models.Index(fields=['user', '-created_at'], name='bookmark_user_recent_idx'),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='bookmark_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_bookmark_count, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='jobstatistics',
+            name='bookmark_count',
+        ),
+    ]
@@ -1,5 +1,8 @@
 from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+from .storage import resume_storage
 from django.conf import settings
+from django.utils import timezone
 from rest_framework.exceptions import ValidationError
 
 class Job(models.Model):
@@ -51,32 +54,188 @@ class Job(models.Model):
     
     bookmarks = models.ManyToManyField(
         settings.AUTH_USER_MODEL, 
+        through='Bookmark',
         related_name='bookmarked_jobs', 
         blank=True
     )
 
+    # Denormalized by jobs.signals when applications are created or deleted.
+    applications_count = models.PositiveIntegerField(default=0, editable=False)
+    # Denormalized by BookmarkJobView (and jobs.signals for other bookmark changes).
+    bookmark_count = models.PositiveIntegerField(default=0, editable=False)
+
+    # Weighted full-text index, maintained by a database trigger on PostgreSQL.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination paths: the public board and the employer dashboard.
+            models.Index(
+                fields=['-created_at', '-id'],
+                condition=models.Q(is_active=True),
+                name='job_active_recent_idx',
+            ),
+            models.Index(fields=['employer', '-created_at', '-id'], name='job_employer_recent_idx'),
+            # JobFilter min_salary/max_salary and ?ordering=salary on the public board.
+            models.Index(
+                fields=['salary'],
+                condition=models.Q(is_active=True),
+                name='job_active_salary_idx',
+            ),
+            # deactivate_expired_jobs only ever looks at active jobs with a deadline.
+            models.Index(
+                fields=['deadline'],
+                condition=models.Q(is_active=True, deadline__isnull=False),
+                name='job_active_deadline_idx',
+            ),
+        ]
+
+    # Kept up to date with F() updates, never through save().
+    counter_fields = ('applications_count', 'bookmark_count')
+
     def __str__(self):
         return f"{self.title} at {self.company_name}"
 
+    def save(self, *args, **kwargs):
+        # A full save of a loaded job would write back the counters as they
+        # were when it was read, losing applications and bookmarks made since.
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.counter_fields and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+
+class Bookmark(models.Model):
+    """A user's bookmark on a job; the through table of Job.bookmarks."""
+    job = models.ForeignKey(Job, on_delete=models.CASCADE)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        # Keeps the table created for the original auto-generated M2M.
+        db_table = 'jobs_job_bookmarks'
+        unique_together = ('job', 'user')
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='bookmark_user_recent_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} bookmarked job #{self.job_id}"
+
 class Application(models.Model):
     class Status(models.TextChoices):
         PENDING = 'PENDING', 'Pending'
         ACCEPTED = 'ACCEPTED', 'Accepted'
         REJECTED = 'REJECTED', 'Rejected'
 
+    class ResumeStatus(models.TextChoices):
+        PENDING = 'PENDING', 'Pending'
+        READY = 'READY', 'Ready'
+        REJECTED = 'REJECTED', 'Rejected'
+
     job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='applications')
     candidate = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='applications')
     cover_letter = models.TextField(blank=True)
     status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
     created_at = models.DateTimeField(auto_now_add=True)
-    resume = models.FileField(upload_to='resumes/%Y/%m/%d/', null=True, blank=True)
+    resume = models.FileField(upload_to='resumes/%Y/%m/%d/', storage=resume_storage, max_length=255, null=True, blank=True)
+    # Filled in by the process_resume task once the upload has been checked.
+    resume_status = models.CharField(max_length=10, choices=ResumeStatus.choices, blank=True)
+    resume_text = models.TextField(blank=True)
+    # Fit against the job (0..1), precomputed by jobs.tasks.score_job_applications.
+    # NULL means not scored yet. Indexed as (job, match_score DESC NULLS LAST, id DESC)
+    # in migration 0018; SQLite cannot declare NULLS LAST on an index.
+    match_score = models.FloatField(null=True, blank=True, editable=False)
     
     class Meta:
         unique_together = ('job', 'candidate')
+        indexes = [
+            models.Index(fields=['job', '-created_at', '-id'], name='application_job_recent_idx'),
+            models.Index(fields=['candidate', '-created_at', '-id'], name='application_cand_recent_idx'),
+        ]
 
     def __str__(self):
         return f"{self.candidate.email} applied to {self.job.title}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets jobs.signals move the dashboard counters when the status changes.
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
     
     def transition_to(self, new_status):
         self.status = new_status
-        self.save()
\ No newline at end of file
+        self.save()
+
+class JobStatistics(models.Model):
+    """
+    Per-job application counters for the employer dashboard, maintained by
+    jobs.signals. Bookmarks are counted on Job.bookmark_count.
+    """
+    job = models.OneToOneField(Job, on_delete=models.CASCADE, primary_key=True, related_name='statistics')
+    # Copied from the job so a dashboard reads one index range per employer.
+    employer = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    pending_count = models.PositiveIntegerField(default=0)
+    accepted_count = models.PositiveIntegerField(default=0)
+    rejected_count = models.PositiveIntegerField(default=0)
+
+    STATUS_FIELDS = {
+        Application.Status.PENDING: 'pending_count',
+        Application.Status.ACCEPTED: 'accepted_count',
+        Application.Status.REJECTED: 'rejected_count',
+    }
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['employer'], name='jobstats_employer_idx'),
+        ]
+
+    def __str__(self):
+        return f"Statistics for job #{self.job_id}"
+
+class JobDailyApplicationCount(models.Model):
+    """Applications received per job per day, maintained by jobs.signals."""
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='daily_application_counts')
+    employer = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    date = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'date'], name='jobdaily_job_date_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['employer', 'date'], name='jobdaily_employer_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.count} applications to job #{self.job_id} on {self.date}"
+
+class OutboxEvent(models.Model):
+    """
+    Side-effect written in the same transaction as the change that caused it
+    and delivered later by the relay task (see jobs.outbox).
+    """
+    topic = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    dispatched_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    # Pushed back after each failed attempt (see jobs.outbox.relay).
+    available_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['available_at', 'id'],
+                condition=models.Q(dispatched_at__isnull=True),
+                name='outbox_pending_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} #{self.pk}"
@@ -0,0 +1,154 @@
+"""
+Coalesces new-application events into per-employer digest emails.
+
+ApplyJobView records an `application.created` outbox event, which the
+outbox relay pushes onto a Redis list per employer. The periodic
+`flush_application_notifications` task drains the lists of every employer
+that has not had a digest within APPLICATION_DIGEST_INTERVAL and hands the
+digests to `send_application_digests`, which sends a whole batch over one
+SMTP connection.
+
+Draining renames an employer's list to a processing key of its own, which
+is only deleted once the digest has been sent. If the send task cannot be
+queued or runs out of retries, the events go back to the front of the
+pending list and the employer is due again at the next flush. Processing
+keys are indexed by when they were claimed, and a flush also requeues any
+older than APPLICATION_DIGEST_REQUEUE_AFTER, whose send task died without
+doing either.
+"""
+import json
+import time
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.template.loader import get_template
+from django_redis import get_redis_connection
+
+from .outbox import handler
+
+FROM_EMAIL = "Talent Bridge <noreply@talentbridge.com>"
+EMPLOYERS_KEY = 'jobs:notifications:employers'
+PENDING_KEY = 'jobs:notifications:pending:{}'
+PROCESSING_PREFIX = 'jobs:notifications:processing:'
+PROCESSING_KEY = PROCESSING_PREFIX + '{}:{}'
+# Processing keys by the time they were claimed.
+PROCESSING_INDEX_KEY = 'jobs:notifications:processing'
+# Only a backstop: abandoned keys are requeued long before they expire.
+PROCESSING_KEY_TTL = 7 * 24 * 60 * 60
+SENT_KEY = 'jobs:notifications:sent:{}'
+
+
+@handler('application.created')
+def queue_application_notifications(events):
+    pipe = get_redis_connection('default').pipeline()
+    for event in events:
+        employer_email = event['employer_email']
+        pipe.rpush(PENDING_KEY.format(employer_email), json.dumps({
+            'job_title': event['job_title'],
+            'candidate_email': event['candidate_email'],
+        }))
+        pipe.sadd(EMPLOYERS_KEY, employer_email)
+    pipe.execute()
+
+
+def collect_digests():
+    """
+    Moves the pending events of every employer that is due a digest to a
+    processing key. Returns a list of `(employer_email, events, key)`.
+    """
+    redis = get_redis_connection('default')
+    interval = settings.APPLICATION_DIGEST_INTERVAL
+    digests = []
+
+    for employer_email in redis.smembers(EMPLOYERS_KEY):
+        employer_email = employer_email.decode()
+        # Per-employer rate limit: at most one digest per interval. Events
+        # stay queued until the employer is due again.
+        if not redis.set(SENT_KEY.format(employer_email), 1, nx=True, ex=interval):
+            continue
+
+        # An event pushed after this still re-adds the employer to the set.
+        key = PROCESSING_KEY.format(employer_email, uuid.uuid4().hex)
+        pipe = redis.pipeline(transaction=True)
+        pipe.srem(EMPLOYERS_KEY, employer_email)
+        pipe.rename(PENDING_KEY.format(employer_email), key)
+        pipe.lrange(key, 0, -1)
+        pipe.expire(key, PROCESSING_KEY_TTL)
+        pipe.zadd(PROCESSING_INDEX_KEY, {key: time.time()})
+        # RENAME fails when nothing is pending; the LRANGE then returns [].
+        events = pipe.execute(raise_on_error=False)[2]
+
+        if events:
+            digests.append((employer_email, [json.loads(event) for event in events], key))
+        else:
+            redis.zrem(PROCESSING_INDEX_KEY, key)
+    return digests
+
+
+def digests_sent(digests):
+    keys = [digest[2] for digest in digests if len(digest) > 2]
+    if keys:
+        pipe = get_redis_connection('default').pipeline(transaction=True)
+        pipe.delete(*keys)
+        pipe.zrem(PROCESSING_INDEX_KEY, *keys)
+        pipe.execute()
+
+
+def restore_digests(digests):
+    """Puts the events of unsent digests back in front of the pending lists."""
+    pipe = get_redis_connection('default').pipeline(transaction=True)
+    for employer_email, events, *key in digests:
+        pipe.lpush(PENDING_KEY.format(employer_email), *[json.dumps(event) for event in reversed(events)])
+        pipe.sadd(EMPLOYERS_KEY, employer_email)
+        pipe.delete(SENT_KEY.format(employer_email), *key)
+        if key:
+            pipe.zrem(PROCESSING_INDEX_KEY, *key)
+    pipe.execute()
+
+
+def requeue_abandoned_digests():
+    """
+    Restores the events of processing keys claimed more than
+    APPLICATION_DIGEST_REQUEUE_AFTER seconds ago. Returns how many.
+    """
+    redis = get_redis_connection('default')
+    cutoff = time.time() - settings.APPLICATION_DIGEST_REQUEUE_AFTER
+    abandoned = []
+    for key in redis.zrangebyscore(PROCESSING_INDEX_KEY, '-inf', cutoff):
+        key = key.decode()
+        pipe = redis.pipeline(transaction=True)
+        pipe.lrange(key, 0, -1)
+        pipe.delete(key)
+        pipe.zrem(PROCESSING_INDEX_KEY, key)
+        events, _, claimed = pipe.execute()
+        # Unclaimed means a send or restore got there first.
+        if events and claimed:
+            employer_email = key.removeprefix(PROCESSING_PREFIX).rsplit(':', 1)[0]
+            abandoned.append((employer_email, [json.loads(event) for event in events]))
+
+    if abandoned:
+        restore_digests(abandoned)
+    return len(abandoned)
+
+
+def build_digest_message(employer_email, events):
+    jobs = defaultdict(list)
+    for event in events:
+        jobs[event['job_title']].append(event['candidate_email'])
+
+    if len(events) == 1:
+        subject = f"New Application: {events[0]['job_title']}"
+    else:
+        subject = f"{len(events)} New Applications on Talent Bridge"
+
+    # get_template() goes through Django's cached template loader, so each
+    # template is only compiled once per process.
+    context = {'total': len(events), 'jobs': list(jobs.items())}
+    text_content = get_template('jobs/emails/new_applications.txt').render(context)
+    html_content = get_template('jobs/emails/new_applications.html').render(context)
+
+    msg = EmailMultiAlternatives(subject, text_content, FROM_EMAIL, [employer_email])
+    msg.attach_alternative(html_content, "text/html")
+    return msg
@@ -0,0 +1,107 @@
+"""
+Transactional outbox.
+
+Call `emit()` inside the transaction that makes a change; the event row
+commits or rolls back together with it. The `relay_outbox` task then
+delivers pending events in batches to the handlers registered for their
+topic. Delivery is at-least-once, so handlers must tolerate repeats.
+
+A failed event is retried after OUTBOX_RETRY_DELAY seconds, doubling with
+each attempt, and is given up on after `max_attempts`. Events of topics
+without a handler in this process are left pending, not failed.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+_handlers = {}
+
+
+def handler(topic):
+    """
+    Registers a function as the handler for `topic`. Handlers receive the
+    payloads of a whole batch at once so they can dispatch in bulk.
+    """
+    def register(func):
+        _handlers[topic] = func
+        return func
+    return register
+
+
+def emit(topic, **payload):
+    return OutboxEvent.objects.create(topic=topic, payload=payload)
+
+
+def emit_many(topic, payloads):
+    return OutboxEvent.objects.bulk_create(
+        [OutboxEvent(topic=topic, payload=payload) for payload in payloads]
+    )
+
+
+def relay(batch_size=100, max_attempts=5, failed=None):
+    """
+    Delivers one batch of pending events. Returns how many were claimed.
+
+    Rows are claimed with SKIP LOCKED, so several relays can run side by
+    side without delivering the same batch twice. The ids of events that
+    fail are added to `failed`, and events already in it are not claimed
+    again, so one run never spends several attempts on the same event.
+    """
+    failed = set() if failed is None else failed
+    now = timezone.now()
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True)
+            .filter(dispatched_at__isnull=True, attempts__lt=max_attempts, available_at__lte=now,
+                    topic__in=list(_handlers))
+            .exclude(pk__in=failed)
+            .order_by('available_at', 'id')[:batch_size]
+        )
+
+        by_topic = defaultdict(list)
+        for event in events:
+            by_topic[event.topic].append(event)
+
+        delivered = []
+        for topic, topic_events in by_topic.items():
+            if _deliver(topic, topic_events):
+                delivered += topic_events
+            elif len(topic_events) > 1:
+                # One at a time, so a bad event only fails itself.
+                delivered += [event for event in topic_events if _deliver(topic, [event])]
+
+        OutboxEvent.objects.filter(pk__in=[event.pk for event in delivered]).update(
+            dispatched_at=timezone.now(), attempts=F('attempts') + 1
+        )
+        delivered_ids = {event.pk for event in delivered}
+        for event in events:
+            if event.pk not in delivered_ids:
+                failed.add(event.pk)
+                delay = settings.OUTBOX_RETRY_DELAY * 2 ** event.attempts
+                OutboxEvent.objects.filter(pk=event.pk).update(
+                    attempts=F('attempts') + 1, last_error=event.last_error,
+                    available_at=now + timedelta(seconds=delay),
+                )
+
+    return len(events)
+
+
+def _deliver(topic, events):
+    try:
+        with transaction.atomic():
+            _handlers[topic]([event.payload for event in events])
+    except Exception as exc:
+        logger.exception("Outbox delivery failed for %s %s events", len(events), topic)
+        for event in events:
+            event.last_error = repr(exc)
+        return False
+    return True
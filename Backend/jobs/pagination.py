@@ -0,0 +1,113 @@
+import base64
+import binascii
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Forward-only keyset pagination over `(created_at, id)`, newest first.
+
+    Each page is a bounded index range scan that starts right after the
+    last row of the previous page, so deep pages cost the same as the first
+    one and no COUNT(*) is ever run. Querysets in any other order (search
+    relevance, `?ordering=`, match score) are refused with a 400 rather than
+    silently re-sorted.
+    """
+    page_size = PageNumberPagination.page_size
+    cursor_query_param = 'cursor'
+    ordering = ('-created_at', '-id')
+    invalid_cursor_message = 'Invalid cursor'
+    unsupported_ordering_message = 'Cursor pagination only supports newest-first ordering; use page numbers instead.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        if tuple(queryset.query.order_by) not in ((), self.ordering, self.ordering[:1]):
+            raise ValidationError({self.cursor_query_param: self.unsupported_ordering_message})
+        position = self.decode_cursor(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            created_at, pk = position
+            queryset = queryset.filter(created_at__lte=created_at).filter(
+                Q(created_at__lt=created_at) | Q(id__lt=pk)
+            )
+
+        # Fetch one extra row to find out whether there is a next page.
+        results = list(queryset[:self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), 'page')
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def encode_cursor(self, item):
+        if isinstance(item, dict):
+            created_at, pk = item['created_at'], item['id']
+        else:
+            created_at, pk = item.created_at, item.pk
+        token = f'{created_at.isoformat()}|{pk}'
+        return base64.urlsafe_b64encode(token.encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            token = base64.urlsafe_b64decode(encoded.encode()).decode()
+            created_at, pk = token.rsplit('|', 1)
+            created_at = parse_datetime(created_at)
+            pk = int(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return created_at, pk
+
+
+class ListingPagination(PageNumberPagination):
+    """
+    Page-number pagination by default. Clients that send `?pagination=cursor`
+    (or follow a `?cursor=` link) get KeysetPagination for that request instead.
+    """
+    mode_query_param = 'pagination'
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if (request.query_params.get(self.mode_query_param) == 'cursor'
+                or self.keyset_class.cursor_query_param in request.query_params):
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,378 @@
+"""
+Offline job-to-job recommendation index.
+
+Similarity between two jobs blends
+  - co-occurrence: cosine similarity of the sets of candidates who applied
+    to or bookmarked each job, and
+  - text: cosine similarity of their TF-IDF vectors (see jobs.matching).
+
+For every job the top RECOMMENDATION_NEIGHBORS active jobs are stored in
+Redis as one packed numpy record array of (job id, score). `rebuild()`
+recomputes everything and runs daily; `refresh()` runs every few minutes
+and only recomputes the jobs marked dirty by jobs.signals, merging them
+into their neighbors' lists. Serving a feed is a handful of MGETs and an
+array merge, with no model computation on the request path; if Redis is
+down the feed falls back to the newest jobs.
+"""
+import logging
+import uuid
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+from scipy import sparse
+
+from .matching import fit_tfidf, job_document, transform_tfidf
+from .models import Application, Bookmark, Job
+from .outbox import handler
+
+logger = logging.getLogger(__name__)
+
+NEIGHBORS_KEY = 'jobs:recs:neighbors:{}'
+POPULAR_KEY = 'jobs:recs:popular'
+DIRTY_KEY = 'jobs:recs:dirty'
+VERSION_KEY = 'jobs:recs:version'
+UPDATES_KEY = 'jobs:recs:updates:{}'
+
+NEIGHBOR_DTYPE = np.dtype([('id', '<i4'), ('score', '<f4')])
+
+COOCCURRENCE_WEIGHT = 0.6
+TEXT_WEIGHT = 0.4
+# How much each kind of interaction counts when seeding a candidate's feed.
+APPLICATION_SEED_WEIGHT = 1.0
+BOOKMARK_SEED_WEIGHT = 0.5
+MAX_SEEDS = 50
+POPULAR_SIZE = 200
+BLOCK_SIZE = 256
+
+
+def _redis():
+    return get_redis_connection('default')
+
+
+def mark_dirty(job_ids):
+    """Queues jobs for the next incremental refresh. Never fails the caller."""
+    if not job_ids:
+        return
+    try:
+        _redis().sadd(DIRTY_KEY, *job_ids)
+    except RedisError:
+        logger.warning("Could not mark jobs %s for recommendation refresh", job_ids, exc_info=True)
+
+
+@handler('job.deactivated')
+def drop_deactivated_jobs(events):
+    # A refresh drops closed jobs from their neighbors' lists.
+    mark_dirty([event['job_id'] for event in events])
+
+
+def _document(row):
+    _, _, title, description, requirements = row
+    return job_document(Job(title=title, description=description, requirements=requirements))
+
+
+def _pairs(job_ids):
+    pairs = set(Application.objects.filter(job_id__in=job_ids).values_list('candidate_id', 'job_id'))
+    pairs.update(Bookmark.objects.filter(job_id__in=job_ids).values_list('user_id', 'job_id'))
+    return pairs
+
+
+class SimilarityModel:
+    """
+    Sparse feature matrices over every job that can appear in the index:
+    active jobs plus recent ones, so a candidate's closed applications still
+    seed their feed. Only active jobs are ever returned as neighbors.
+
+    Fitting reads every job and interaction, so a worker keeps its model
+    for the rest of the rebuild it belongs to (see `_fitted_model`) and
+    `update()` patches in only the jobs that changed, using the vocabulary
+    and IDF weights fixed at fit time.
+    """
+
+    def __init__(self, version=None):
+        self.version = version
+        # How many entries of the version's update log this model includes.
+        self.applied = 0
+
+        since = timezone.now() - timedelta(days=settings.RECOMMENDATION_HISTORY_DAYS)
+        jobs = list(
+            Job.objects.filter(Q(is_active=True) | Q(created_at__gte=since))
+            .order_by('id')
+            .values_list('id', 'is_active', 'title', 'description', 'requirements')
+        )
+        self.job_ids = np.array([row[0] for row in jobs], dtype=np.int32)
+        self.active = np.array([row[1] for row in jobs], dtype=bool)
+        self.position = {job_id: i for i, job_id in enumerate(self.job_ids.tolist())}
+
+        text, self.vocabulary, self.idf = fit_tfidf([_document(row) for row in jobs])
+        self.text = text.astype(np.float32)
+
+        pairs = _pairs(self.position)
+        self.users = {}
+        self.pair_users = np.array([self.users.setdefault(user_id, len(self.users)) for user_id, _ in pairs],
+                                   dtype=np.int64)
+        self.pair_jobs = np.array([self.position[job_id] for _, job_id in pairs], dtype=np.int64)
+        self._prepare()
+
+    def _prepare(self):
+        matrix = sparse.csr_matrix(
+            (np.ones(len(self.pair_users), dtype=np.float32), (self.pair_users, self.pair_jobs)),
+            shape=(len(self.users), len(self.job_ids)),
+        )
+        # L2-normalize each job's column so X.T @ X is a cosine similarity.
+        norms = np.sqrt(np.asarray(matrix.sum(axis=0)).ravel())
+        norms[norms == 0] = 1.0
+        self.interactions = (matrix @ sparse.diags(1.0 / norms)).tocsc()
+        self.interactions_t = self.interactions.T.tocsr()
+        self.text_t = self.text.T.tocsr()
+
+    def update(self, job_ids):
+        """
+        Re-reads the given jobs and their interactions. Returns the row
+        positions of the ones that still exist; deleted jobs keep an empty
+        row so positions stay stable.
+        """
+        job_ids = set(job_ids)
+        jobs = list(
+            Job.objects.filter(pk__in=job_ids)
+            .order_by('id')
+            .values_list('id', 'is_active', 'title', 'description', 'requirements')
+        )
+        added = [row[0] for row in jobs if row[0] not in self.position]
+        if added:
+            self.position.update((job_id, len(self.job_ids) + i) for i, job_id in enumerate(added))
+            self.job_ids = np.concatenate([self.job_ids, np.array(added, dtype=np.int32)])
+            self.active = np.concatenate([self.active, np.zeros(len(added), dtype=bool)])
+            self.text.resize((len(self.job_ids), self.text.shape[1]))
+
+        changed = np.array([self.position[job_id] for job_id in job_ids if job_id in self.position], dtype=np.int64)
+        positions = np.array([self.position[row[0]] for row in jobs], dtype=np.int64)
+        self.active[changed] = False
+        self.active[positions] = [row[1] for row in jobs]
+
+        # Zero the old rows and scatter the new ones into place.
+        keep = np.ones(len(self.job_ids), dtype=np.float32)
+        keep[changed] = 0
+        scatter = sparse.csr_matrix(
+            (np.ones(len(jobs), dtype=np.float32), (positions, np.arange(len(jobs)))),
+            shape=(len(self.job_ids), len(jobs)),
+        )
+        rows = transform_tfidf([_document(row) for row in jobs], self.vocabulary, self.idf).astype(np.float32)
+        self.text = (sparse.diags(keep) @ self.text + scatter @ rows).tocsr()
+
+        pairs = _pairs(job_ids)
+        stale = np.isin(self.pair_jobs, changed)
+        users = [self.users.setdefault(user_id, len(self.users)) for user_id, _ in pairs]
+        self.pair_users = np.concatenate([self.pair_users[~stale], np.array(users, dtype=np.int64)])
+        self.pair_jobs = np.concatenate([
+            self.pair_jobs[~stale], np.array([self.position[job_id] for _, job_id in pairs], dtype=np.int64),
+        ])
+        self._prepare()
+        return positions
+
+    def neighbors(self, positions):
+        """Yields `(job_id, packed neighbor array)` for the given row positions."""
+        k = settings.RECOMMENDATION_NEIGHBORS
+
+        for start in range(0, len(positions), BLOCK_SIZE):
+            block = positions[start:start + BLOCK_SIZE]
+            # Both products stay sparse: only jobs sharing a term or a
+            # candidate with the block get a score at all.
+            scores = (
+                TEXT_WEIGHT * (self.text[block] @ self.text_t)
+                + COOCCURRENCE_WEIGHT * (self.interactions_t[block] @ self.interactions)
+            ).tocsr()
+
+            for row, position in enumerate(block):
+                row_start, row_end = scores.indptr[row], scores.indptr[row + 1]
+                candidates = scores.indices[row_start:row_end]
+                values = scores.data[row_start:row_end]
+                keep = self.active[candidates] & (candidates != position) & (values > 0)
+                candidates, values = candidates[keep], values[keep]
+                if len(values) > k:
+                    top = np.argpartition(-values, k - 1)[:k]
+                    candidates, values = candidates[top], values[top]
+
+                order = np.argsort(-values, kind='stable')
+                packed = np.empty(len(order), dtype=NEIGHBOR_DTYPE)
+                packed['id'] = self.job_ids[candidates[order]]
+                packed['score'] = values[order]
+                yield int(self.job_ids[position]), packed
+
+    def popular(self):
+        """Active jobs with the most interactions, for candidates with no history."""
+        counts = np.diff(self.interactions.indptr).astype(np.float32)
+        counts[~self.active] = -1
+        order = np.argsort(-counts, kind='stable')[:POPULAR_SIZE]
+        return self.job_ids[order[counts[order] >= 0]]
+
+
+# The model this worker process fitted, reused across refreshes.
+_model = None
+
+
+def _fitted_model(redis, version):
+    """
+    Returns this process's model for the current rebuild `version`, caught
+    up with the jobs other processes refreshed since it was fitted. Only the
+    first refresh after a rebuild fits a new one.
+    """
+    global _model
+    updates = UPDATES_KEY.format(version.decode())
+    if _model is None or _model.version != version:
+        # Anything logged before the fit is already in the data it reads.
+        applied = redis.llen(updates)
+        _model = SimilarityModel(version)
+        _model.applied = applied
+
+    pending = redis.lrange(updates, _model.applied, -1)
+    if pending:
+        _model.update(int(job_id) for job_id in pending)
+        _model.applied += len(pending)
+    return _model
+
+
+def _store(pipe, job_id, packed):
+    pipe.set(NEIGHBORS_KEY.format(job_id), packed.tobytes(), ex=settings.RECOMMENDATION_INDEX_TTL)
+
+
+def rebuild():
+    """Recomputes the neighbor list of every job. Returns how many were stored."""
+    global _model
+    model = SimilarityModel(uuid.uuid4().hex.encode())
+    redis = _redis()
+    # Anything marked dirty before this point is covered by the rebuild.
+    redis.delete(DIRTY_KEY)
+
+    pipe = redis.pipeline(transaction=False)
+    stored = 0
+    for job_id, packed in model.neighbors(np.arange(len(model.job_ids))):
+        _store(pipe, job_id, packed)
+        stored += 1
+        if stored % 1000 == 0:
+            pipe.execute()
+    pipe.set(POPULAR_KEY, model.popular().astype('<i4').tobytes(), ex=settings.RECOMMENDATION_INDEX_TTL)
+    pipe.set(VERSION_KEY, model.version, ex=settings.RECOMMENDATION_INDEX_TTL)
+    pipe.execute()
+    _model = model
+    return stored
+
+
+def refresh(batch_size=1000):
+    """
+    Recomputes the jobs marked dirty since the last run and merges them into
+    the lists of the jobs they now neighbor. Returns how many were refreshed.
+    """
+    redis = _redis()
+    popular, version = redis.mget([POPULAR_KEY, VERSION_KEY])
+    if popular is None or version is None:
+        return rebuild()
+
+    dirty = [int(job_id) for job_id in redis.spop(DIRTY_KEY, batch_size) or []]
+    if not dirty:
+        return 0
+
+    model = _fitted_model(redis, version)
+    positions = model.update(dirty)
+    # Logged so the models of other worker processes pick these rows up too.
+    updates = UPDATES_KEY.format(version.decode())
+    pipe = redis.pipeline()
+    pipe.rpush(updates, *dirty)
+    pipe.expire(updates, settings.RECOMMENDATION_INDEX_TTL)
+    logged, _ = pipe.execute()
+    if logged - len(dirty) == model.applied:
+        model.applied = logged
+
+    updated = dict(model.neighbors(positions))
+
+    # Similarity is symmetric, so a refreshed job also belongs in the lists
+    # of its new neighbors. Entries that should drop out are left for the
+    # daily rebuild.
+    affected = sorted({int(neighbor) for packed in updated.values() for neighbor in packed['id']} - set(updated))
+    current = {}
+    if affected:
+        current = dict(zip(affected, redis.mget([NEIGHBORS_KEY.format(job_id) for job_id in affected])))
+
+    k = settings.RECOMMENDATION_NEIGHBORS
+    pipe = redis.pipeline(transaction=False)
+    for job_id, packed in updated.items():
+        _store(pipe, job_id, packed)
+
+    for job_id, raw in current.items():
+        if raw is None:
+            continue
+        neighbors = np.frombuffer(raw, dtype=NEIGHBOR_DTYPE)
+        neighbors = neighbors[~np.isin(neighbors['id'], list(updated))]
+        additions = [
+            (other_id, packed['score'][packed['id'] == job_id][0])
+            for other_id, packed in updated.items() if job_id in packed['id'] and model.active[model.position[other_id]]
+        ]
+        merged = np.concatenate([neighbors, np.array(additions, dtype=NEIGHBOR_DTYPE)])
+        merged = merged[np.argsort(-merged['score'], kind='stable')][:k]
+        _store(pipe, job_id, merged)
+
+    pipe.execute()
+    return len(updated)
+
+
+def _ranked(seeds):
+    redis = _redis()
+    ids = np.empty(0, dtype=np.int32)
+    if seeds:
+        raw = redis.mget([NEIGHBORS_KEY.format(job_id) for job_id, _ in seeds])
+        lists = [(np.frombuffer(value, dtype=NEIGHBOR_DTYPE), weight) for value, (_, weight) in zip(raw, seeds) if value]
+        if lists:
+            candidates = np.concatenate([neighbors['id'] for neighbors, _ in lists])
+            scores = np.concatenate([neighbors['score'] * weight for neighbors, weight in lists])
+            unique, inverse = np.unique(candidates, return_inverse=True)
+            totals = np.bincount(inverse, weights=scores)
+            ids = unique[np.argsort(-totals, kind='stable')]
+
+    popular = redis.get(POPULAR_KEY)
+    if popular:
+        ids = np.concatenate([ids, np.frombuffer(popular, dtype='<i4')])
+    return ids
+
+
+def recommend(user, limit):
+    """
+    Returns up to `limit` active Job objects for `user`, best first, from
+    the stored neighbor lists of the jobs they applied to or bookmarked.
+    """
+    applied = list(
+        Application.objects.filter(candidate=user).order_by('-created_at').values_list('job_id', flat=True)
+    )
+    bookmarked = list(
+        Bookmark.objects.filter(user=user).order_by('-created_at').values_list('job_id', flat=True)
+    )
+    seen = set(applied) | set(bookmarked)
+    seeds = (
+        [(job_id, APPLICATION_SEED_WEIGHT) for job_id in applied[:MAX_SEEDS]]
+        + [(job_id, BOOKMARK_SEED_WEIGHT) for job_id in bookmarked[:MAX_SEEDS]]
+    )
+
+    try:
+        ids = _ranked(seeds)
+    except RedisError:
+        # Without the index, the newest jobs still make a usable feed.
+        logger.warning("Recommendation index unavailable, serving the newest jobs", exc_info=True)
+        return list(
+            Job.objects.select_related('employer')
+            .filter(is_active=True).exclude(pk__in=seen)
+            .order_by('-created_at', '-id')[:limit]
+        )
+
+    ranked = []
+    for job_id in ids.tolist():
+        if job_id not in seen:
+            seen.add(job_id)
+            ranked.append(job_id)
+    # Fetch a little extra to cover jobs closed since the last refresh.
+    ranked = ranked[:limit * 2]
+
+    jobs = Job.objects.select_related('employer').filter(pk__in=ranked, is_active=True).in_bulk()
+    return [jobs[job_id] for job_id in ranked if job_id in jobs][:limit]
@@ -0,0 +1,84 @@
+"""
+Background processing for uploaded resumes: validation, virus-scan hooks
+and text extraction. ApplyJobView records an `application.resume_attached`
+outbox event and the relay hands it to the `process_resume` Celery task.
+"""
+import io
+import os
+import re
+import zipfile
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .outbox import handler
+
+try:
+    import pypdf
+except ImportError:  # pragma: no cover - text extraction is best effort
+    pypdf = None
+
+# Leading bytes every file of the given type must start with.
+MAGIC_NUMBERS = {
+    '.pdf': b'%PDF',
+    '.docx': b'PK\x03\x04',
+}
+
+
+class ResumeRejected(Exception):
+    """Raised by validation or a scan hook to refuse a resume."""
+
+
+@handler('application.resume_attached')
+def queue_resume_processing(events):
+    from .tasks import process_resume
+
+    for event in events:
+        process_resume.delay(event['application_id'])
+
+
+def validate_resume(name, content):
+    extension = os.path.splitext(name)[1].lower()
+    if extension not in settings.RESUME_ALLOWED_EXTENSIONS:
+        raise ResumeRejected(f"Unsupported file type '{extension}'.")
+
+    if len(content) > settings.RESUME_MAX_UPLOAD_SIZE:
+        raise ResumeRejected("Resume exceeds the maximum upload size.")
+
+    magic = MAGIC_NUMBERS.get(extension)
+    if magic and not content.startswith(magic):
+        raise ResumeRejected(f"File content does not match '{extension}'.")
+
+
+def scan_resume(name, content):
+    """
+    Runs every hook listed in RESUME_SCAN_HOOKS, e.g. a ClamAV client. Each
+    hook is called as `hook(name, content)` and raises ResumeRejected to
+    refuse the file.
+    """
+    for path in settings.RESUME_SCAN_HOOKS:
+        import_string(path)(name, content)
+
+
+def extract_text(name, content):
+    extension = os.path.splitext(name)[1].lower()
+
+    if extension == '.pdf':
+        if pypdf is None:
+            return ''
+        try:
+            reader = pypdf.PdfReader(io.BytesIO(content))
+            return '\n'.join(page.extract_text() or '' for page in reader.pages)
+        except pypdf.errors.PyPdfError:
+            raise ResumeRejected("Resume is not a readable PDF.")
+
+    if extension == '.docx':
+        try:
+            with zipfile.ZipFile(io.BytesIO(content)) as archive:
+                xml = archive.read('word/document.xml').decode('utf-8', errors='ignore')
+        except (zipfile.BadZipFile, KeyError):
+            raise ResumeRejected("Resume is not a readable Word document.")
+        xml = re.sub(r'</w:p>', '\n', xml)
+        return re.sub(r'<[^>]+>', '', xml)
+
+    return content.decode('utf-8', errors='ignore')
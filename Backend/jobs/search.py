@@ -0,0 +1,140 @@
+import logging
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import F
+from django.db.models.expressions import RawSQL
+from django.db.utils import OperationalError
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CONFIG = 'english'
+FTS_TABLE = 'jobs_job_fts'
+
+# bm25() column weights for the FTS5 table, mirroring the A/B/C/D weights
+# used for the PostgreSQL search vector.
+FTS_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+
+SQLITE_FTS_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, company_name, requirements, description,
+        content='jobs_job', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON jobs_job BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, company_name, requirements, description)
+        VALUES (new.id, new.title, new.company_name, new.requirements, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON jobs_job BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, company_name, requirements, description)
+        VALUES ('delete', old.id, old.title, old.company_name, old.requirements, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF title, company_name, requirements, description ON jobs_job BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, company_name, requirements, description)
+        VALUES ('delete', old.id, old.title, old.company_name, old.requirements, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, title, company_name, requirements, description)
+        VALUES (new.id, new.title, new.company_name, new.requirements, new.description);
+    END
+    """,
+    # Re-index from scratch: SQLite drops the triggers whenever a migration
+    # rebuilds jobs_job, so rows written in between would otherwise be missed.
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+_sqlite_fts_ready = {}
+
+
+def install_sqlite_search(using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    post_migrate hook that (re)creates the FTS5 index used for job search
+    on SQLite development databases.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+
+    try:
+        with connection.cursor() as cursor:
+            for statement in SQLITE_FTS_SQL:
+                cursor.execute(statement)
+    except OperationalError as exc:
+        logger.warning("SQLite FTS5 unavailable, job search falls back to LIKE scans: %s", exc)
+        return
+
+    _sqlite_fts_ready.pop(connection.settings_dict['NAME'], None)
+
+
+def sqlite_fts_available(connection):
+    name = connection.settings_dict['NAME']
+    if name not in _sqlite_fts_ready:
+        _sqlite_fts_ready[name] = FTS_TABLE in connection.introspection.table_names()
+    return _sqlite_fts_ready[name]
+
+
+def search_tokens(terms):
+    """Strips search terms down to plain word tokens safe for tsquery/FTS5 syntax."""
+    return [token for term in terms for token in re.findall(r'\w+', term)]
+
+
+class JobSearchFilter(filters.SearchFilter):
+    """
+    Full-text search over the job index.
+
+    PostgreSQL matches against the weighted `search_vector` column (GIN
+    indexed), SQLite against the `jobs_job_fts` FTS5 table. Any other
+    backend falls back to the regular icontains search over `search_fields`.
+    Every term is prefix matched, and results are ordered by relevance
+    unless the client asks for an explicit `ordering`.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        tokens = search_tokens(self.get_search_terms(request))
+        if not tokens:
+            return super().filter_queryset(request, queryset, view)
+
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql':
+            queryset = self.postgres_search(queryset, tokens)
+        elif connection.vendor == 'sqlite' and sqlite_fts_available(connection):
+            queryset = self.sqlite_search(queryset, tokens)
+        else:
+            return super().filter_queryset(request, queryset, view)
+
+        if not request.query_params.get(api_settings.ORDERING_PARAM):
+            queryset = queryset.order_by('-search_rank', '-created_at')
+        return queryset
+
+    def postgres_search(self, queryset, tokens):
+        query = SearchQuery(
+            ' & '.join(f'{token}:*' for token in tokens),
+            search_type='raw',
+            config=SEARCH_CONFIG,
+        )
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        )
+
+    def sqlite_search(self, queryset, tokens):
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        weights = ', '.join(str(weight) for weight in FTS_WEIGHTS)
+        table = queryset.model._meta.db_table
+        return queryset.filter(
+            pk__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (match,))
+        ).annotate(
+            # bm25() is "lower is better", so negate it to sort like SearchRank.
+            search_rank=RawSQL(
+                f"SELECT -bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id",
+                (match,),
+            )
+        )
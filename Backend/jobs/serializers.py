@@ -1,34 +1,131 @@
+from django.db.models.functions import Substr
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
 from .models import Job, Application
+from . import user_state
+from .storage import resume_storage, upload_prefix
+from talent_bridge.metrics import TimedSerializerMixin
 
-class JobSerializer(serializers.ModelSerializer):
+class SparseFieldsetMixin:
+    """
+    Lets clients ask for a subset of fields on reads with `?fields=id,title`.
+    Unknown names are ignored.
+
+    `optimize_queryset()` narrows a queryset to the columns those fields
+    read. Fields that read other columns than their own name are listed in
+    `Meta.field_columns` (an empty list means the primary key is enough).
+    """
+    fields_query_param = 'fields'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = self.requested_fields(self.context.get('request'))
+        if requested:
+            for name in set(self.fields) - requested:
+                self.fields.pop(name)
+
+    @classmethod
+    def requested_fields(cls, request):
+        if request is None or request.method not in SAFE_METHODS:
+            return None
+        raw = request.query_params.get(cls.fields_query_param)
+        if not raw:
+            return None
+        return {name.strip() for name in raw.split(',') if name.strip()}
+
+    @classmethod
+    def optimize_queryset(cls, queryset, request):
+        names = set(cls.Meta.fields)
+        requested = cls.requested_fields(request)
+        if requested:
+            names &= requested
+
+        field_columns = getattr(cls.Meta, 'field_columns', {})
+        columns = {'id'}
+        for name in names:
+            columns.update(field_columns.get(name, [name]))
+
+        related = {column.rsplit('__', 1)[0] for column in columns if '__' in column}
+        queryset = queryset.select_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+        return cls.annotate_queryset(queryset.only(*columns), names)
+
+    @classmethod
+    def annotate_queryset(cls, queryset, names):
+        return queryset
+
+class JobListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    """
+    Looks up which of the listed jobs the requesting user has bookmarked or
+    applied to in one call (see jobs.user_state), for JobSerializer's
+    is_bookmarked and has_applied.
+    """
+    def to_representation(self, data):
+        jobs = list(data.all() if hasattr(data, 'all') else data)
+        request = self.context.get('request')
+        wanted = {'is_bookmarked', 'has_applied'} & set(self.child.fields)
+        if wanted and request is not None and request.user.is_authenticated:
+            self.context['bookmarked_ids'], self.context['applied_ids'] = user_state.lookup(
+                request.user.pk, [job.pk for job in jobs]
+            )
+        return super().to_representation(jobs)
+
+class JobSerializer(TimedSerializerMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     employer_email = serializers.EmailField(source='employer.email', read_only=True)
     days_ago = serializers.SerializerMethodField()
-    applications_count = serializers.SerializerMethodField()
+    is_bookmarked = serializers.SerializerMethodField()
+    has_applied = serializers.SerializerMethodField()
 
     class Meta:
         model = Job
+        list_serializer_class = JobListSerializer
         fields = [
             'id', 'title', 'company_name', 'location', 
             'job_type', 'remote_status', 'salary_range',
             'description', 'experience_level', 'salary', 'requirements', 
             'employer_email', 'days_ago', 'created_at', 
-            'is_active', 'applications_count'
+            'is_active', 'applications_count', 'bookmark_count', 'is_bookmarked', 'has_applied'
         ]
-        read_only_fields = ['employer', 'created_at', 'updated_at']
+        read_only_fields = ['employer', 'created_at', 'updated_at', 'applications_count', 'bookmark_count']
 
         extra_kwargs = {
             'company_name': {'required': False} 
         }
 
+        field_columns = {
+            'employer_email': ['employer__email'],
+            'days_ago': ['created_at'],
+            'is_bookmarked': [],
+            'has_applied': [],
+        }
+
     def get_days_ago(self, obj):
         """Calculates how many days ago the job was posted"""
         from django.utils import timezone
         delta = timezone.now() - obj.created_at
         return delta.days
-    
-    def get_applications_count(self, obj):
-        return obj.applications.count()
+
+    def _user_state(self, obj):
+        """
+        The requesting user's (bookmarked ids, applied ids), or None for
+        anonymous users so cached public responses stay shareable.
+        """
+        request = self.context.get('request')
+        if request is None or not request.user.is_authenticated:
+            return None
+        if 'bookmarked_ids' not in self.context:
+            # A single job (detail view): look up just this one.
+            self.context['bookmarked_ids'], self.context['applied_ids'] = user_state.lookup(request.user.pk, [obj.pk])
+        return self.context['bookmarked_ids'], self.context['applied_ids']
+
+    def get_is_bookmarked(self, obj):
+        state = self._user_state(obj)
+        return state is not None and obj.pk in state[0]
+
+    def get_has_applied(self, obj):
+        state = self._user_state(obj)
+        return state is not None and obj.pk in state[1]
     
     def create(self, validated_data):
         """
@@ -44,23 +141,72 @@ class JobSerializer(serializers.ModelSerializer):
         
         return super().create(validated_data)
     
-class ApplicationSerializer(serializers.ModelSerializer):
+class CompactJobSerializer(JobSerializer):
+    """
+    Job board card: the full description and requirements are left out
+    (and never read from the database); `summary` carries the start of the
+    description. JobDetailView serves the full text.
+    """
+    summary_length = 300
+    summary = serializers.CharField(read_only=True)
+
+    class Meta(JobSerializer.Meta):
+        fields = [
+            'id', 'title', 'company_name', 'location',
+            'job_type', 'remote_status', 'salary_range',
+            'summary', 'experience_level', 'salary',
+            'employer_email', 'days_ago', 'created_at',
+            'is_active', 'applications_count', 'bookmark_count', 'is_bookmarked', 'has_applied'
+        ]
+        field_columns = {**JobSerializer.Meta.field_columns, 'summary': []}
+
+    @classmethod
+    def annotate_queryset(cls, queryset, names):
+        if 'summary' in names:
+            queryset = queryset.annotate(summary=Substr('description', 1, cls.summary_length))
+        return queryset
+
+class ApplicationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     candidate_email = serializers.EmailField(source='candidate.email', read_only=True)
     job_title = serializers.CharField(source='job.title', read_only=True)
+    resume_key = serializers.CharField(write_only=True, required=False, max_length=255)
 
     class Meta:
         model = Application
-        fields = ['id', 'job', 'job_title', 'candidate_email', 'cover_letter', 'resume', 'status', 'created_at']
+        fields = [
+            'id', 'job', 'job_title', 'candidate_email', 'cover_letter', 'resume',
+            'resume_key', 'resume_status', 'match_score', 'status', 'created_at'
+        ]
         
-        read_only_fields = ['candidate', 'job', 'created_at'] 
+        read_only_fields = ['candidate', 'job', 'created_at', 'resume_status', 'match_score'] 
+
+    def validate_resume_key(self, value):
+        """
+        The key must come from an upload target issued to this user, and the
+        file must already be in storage.
+        """
+        request = self.context.get('request')
+        if not value.startswith(upload_prefix(request.user)) or '..' in value:
+            raise serializers.ValidationError("Invalid resume key.")
+        if not resume_storage().exists(value):
+            raise serializers.ValidationError("Resume has not been uploaded yet.")
+        return value
+
+    def create(self, validated_data):
+        resume_key = validated_data.pop('resume_key', None)
+        if resume_key:
+            validated_data['resume'] = resume_key
+        if validated_data.get('resume'):
+            validated_data['resume_status'] = Application.ResumeStatus.PENDING
+        return super().create(validated_data)
 
-class JobSummarySerializer(serializers.ModelSerializer):
+class JobSummarySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Simple serializer to show job details inside an application"""
     class Meta:
         model = Job
         fields = ['id', 'title', 'company_name', 'location', 'job_type', 'remote_status']
 
-class CandidateApplicationSerializer(serializers.ModelSerializer):
+class CandidateApplicationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for candidates to see their own applications"""
     job = JobSummarySerializer(read_only=True) 
     
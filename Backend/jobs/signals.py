@@ -0,0 +1,122 @@
+from django.contrib.auth.signals import user_logged_in
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from . import statistics, user_state
+from .cache import bump_generation
+from .models import Application, Bookmark, Job
+from .recommendations import mark_dirty
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def invalidate_job_responses(sender, **kwargs):
+    bump_generation()
+
+
+@receiver(post_save, sender=Application)
+def increment_applications_count(sender, instance, created, **kwargs):
+    if created:
+        Job.objects.filter(pk=instance.job_id).update(applications_count=F('applications_count') + 1)
+
+
+@receiver(post_delete, sender=Application)
+def decrement_applications_count(sender, instance, **kwargs):
+    Job.objects.filter(pk=instance.job_id, applications_count__gt=0).update(
+        applications_count=F('applications_count') - 1
+    )
+
+
+@receiver(post_save, sender=Job)
+def create_job_statistics(sender, instance, created, **kwargs):
+    if created:
+        statistics.create_statistics([instance])
+
+
+@receiver(post_save, sender=Application)
+def update_application_statistics(sender, instance, created, **kwargs):
+    if created:
+        statistics.application_added(instance)
+    else:
+        # _loaded_status is set by Application.from_db (e.g. before transition_to).
+        loaded_status = getattr(instance, '_loaded_status', None)
+        if loaded_status and loaded_status != instance.status:
+            statistics.status_changed(instance.job_id, loaded_status, instance.status)
+    instance._loaded_status = instance.status
+
+
+@receiver(post_delete, sender=Application)
+def remove_application_statistics(sender, instance, **kwargs):
+    statistics.application_removed(instance)
+
+
+@receiver(m2m_changed, sender=Job.bookmarks.through)
+def count_added_bookmarks(sender, instance, action, reverse, pk_set, **kwargs):
+    # The M2M managers (job.bookmarks / user.bookmarked_jobs, e.g. from the
+    # admin or shell) bulk-insert without post_save. pk_set only holds the
+    # rows that were actually inserted.
+    if action != 'post_add':
+        return
+    if reverse:
+        statistics.bookmarks_changed(pk_set, 1)
+    else:
+        statistics.bookmarks_changed([instance.pk], len(pk_set))
+
+
+@receiver(post_delete, sender=Bookmark)
+def count_removed_bookmark(sender, instance, **kwargs):
+    # Every delete path ends here, one row at a time: BookmarkJobView,
+    # remove()/clear() on the M2M managers and cascades from a deleted user.
+    statistics.bookmarks_changed([instance.job_id], -1)
+
+
+@receiver(post_save, sender=Job)
+def refresh_job_recommendations(sender, instance, **kwargs):
+    transaction.on_commit(lambda: mark_dirty([instance.pk]))
+
+
+@receiver(post_save, sender=Application)
+def refresh_applied_job_recommendations(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: mark_dirty([instance.job_id]))
+
+
+@receiver(m2m_changed, sender=Job.bookmarks.through)
+def refresh_bookmarked_job_recommendations(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove'):
+        return
+    job_ids = list(pk_set) if reverse else [instance.pk]
+    transaction.on_commit(lambda: mark_dirty(job_ids))
+
+
+@receiver(user_logged_in)
+def warm_user_job_state(sender, user, **kwargs):
+    user_state.warm(user.pk)
+
+
+@receiver(post_save, sender=Application)
+def record_applied_job(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: user_state.application_added(instance.candidate_id, instance.job_id))
+
+
+@receiver(post_delete, sender=Application)
+def forget_applied_job(sender, instance, **kwargs):
+    transaction.on_commit(lambda: user_state.application_removed(instance.candidate_id, instance.job_id))
+
+
+@receiver(m2m_changed, sender=Job.bookmarks.through)
+def forget_bookmark_state(sender, instance, action, reverse, pk_set, **kwargs):
+    # BookmarkJobView updates the state itself; changes through the M2M
+    # managers just drop the affected users' sets.
+    if action == 'pre_clear' and not reverse:
+        user_ids = list(sender.objects.filter(job_id=instance.pk).values_list('user_id', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        user_ids = [instance.pk] if reverse else list(pk_set)
+    elif action == 'post_clear' and reverse:
+        user_ids = [instance.pk]
+    else:
+        return
+    transaction.on_commit(lambda: [user_state.forget(user_id) for user_id in user_ids])
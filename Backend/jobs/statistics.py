@@ -0,0 +1,128 @@
+"""
+Employer dashboard statistics.
+
+JobStatistics and JobDailyApplicationCount are summary tables kept up to
+date by jobs.signals with single-row F() updates (bookmarks are counted on
+Job.bookmark_count), so a dashboard is a few
+indexed reads per employer instead of an aggregate over every application.
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import Job, JobDailyApplicationCount, JobStatistics
+
+
+def create_statistics(jobs):
+    """Adds empty counters for new jobs, including bulk-created ones."""
+    JobStatistics.objects.bulk_create(
+        [JobStatistics(job_id=job.pk, employer_id=job.employer_id) for job in jobs],
+        ignore_conflicts=True,
+    )
+
+
+def _upsert(queryset, changes, create):
+    """
+    Applies `changes` to the row matched by `queryset`, creating it with
+    `create()` first if it does not exist yet.
+    """
+    if queryset.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            create()
+    except IntegrityError:
+        # Created concurrently; the update below applies to that row.
+        pass
+    queryset.update(**changes)
+
+
+def _adjust(job_id, **deltas):
+    queryset = JobStatistics.objects.filter(pk=job_id)
+    if any(delta < 0 for delta in deltas.values()):
+        # Never take a counter below zero if an event is replayed.
+        for field, delta in deltas.items():
+            if delta < 0:
+                queryset = queryset.filter(**{f'{field}__gte': -delta})
+        queryset.update(**{field: F(field) + delta for field, delta in deltas.items()})
+        return
+
+    _upsert(
+        queryset,
+        {field: F(field) + delta for field, delta in deltas.items()},
+        lambda: create_statistics(Job.objects.filter(pk=job_id).only('employer_id')),
+    )
+
+
+def _adjust_daily(job_id, date, delta):
+    queryset = JobDailyApplicationCount.objects.filter(job_id=job_id, date=date)
+    if delta < 0:
+        queryset.filter(count__gte=-delta).update(count=F('count') + delta)
+        return
+
+    def create():
+        employer_id = Job.objects.values_list('employer_id', flat=True).get(pk=job_id)
+        JobDailyApplicationCount.objects.create(job_id=job_id, employer_id=employer_id, date=date)
+
+    _upsert(queryset, {'count': F('count') + delta}, create)
+
+
+def application_added(application):
+    _adjust(application.job_id, **{JobStatistics.STATUS_FIELDS[application.status]: 1})
+    _adjust_daily(application.job_id, timezone.localdate(application.created_at), 1)
+
+
+def application_removed(application):
+    _adjust(application.job_id, **{JobStatistics.STATUS_FIELDS[application.status]: -1})
+    _adjust_daily(application.job_id, timezone.localdate(application.created_at), -1)
+
+
+def status_changed(job_id, old_status, new_status):
+    _adjust(job_id, **{JobStatistics.STATUS_FIELDS[old_status]: -1, JobStatistics.STATUS_FIELDS[new_status]: 1})
+
+
+def bookmarks_changed(job_ids, delta):
+    if not delta or not job_ids:
+        return
+    queryset = Job.objects.filter(pk__in=job_ids)
+    if delta < 0:
+        queryset = queryset.filter(bookmark_count__gte=-delta)
+    queryset.update(bookmark_count=F('bookmark_count') + delta)
+
+
+def employer_dashboard(employer, days):
+    """Per-job counters, employer-wide totals and the last `days` of daily counts."""
+    jobs = [
+        {
+            'job_id': stats.job_id,
+            'title': stats.job.title,
+            'is_active': stats.job.is_active,
+            'applications': stats.pending_count + stats.accepted_count + stats.rejected_count,
+            'pending': stats.pending_count,
+            'accepted': stats.accepted_count,
+            'rejected': stats.rejected_count,
+            'bookmarks': stats.job.bookmark_count,
+        }
+        for stats in JobStatistics.objects.filter(employer=employer)
+        .select_related('job')
+        .only('job__title', 'job__is_active', 'job__bookmark_count', *JobStatistics.STATUS_FIELDS.values())
+        .order_by('-job__created_at', '-job_id')
+    ]
+
+    totals = {
+        'jobs': len(jobs),
+        'active_jobs': sum(job['is_active'] for job in jobs),
+    }
+    for key in ('applications', 'pending', 'accepted', 'rejected', 'bookmarks'):
+        totals[key] = sum(job[key] for job in jobs)
+
+    since = timezone.localdate() - timedelta(days=days - 1)
+    daily = list(
+        JobDailyApplicationCount.objects.filter(employer=employer, date__gte=since)
+        .values('date')
+        .annotate(count=Sum('count'))
+        .order_by('date')
+    )
+    return {'totals': totals, 'jobs': jobs, 'daily_applications': daily}
@@ -0,0 +1,66 @@
+"""
+Storage for candidate resumes.
+
+Resumes live on the backend configured by RESUME_STORAGE: the local
+filesystem by default, or any django-storages S3-compatible bucket (AWS,
+MinIO) in production. Clients upload straight to storage through a
+short-lived upload target, so the API only ever records the object key.
+Local upload links work once: their nonce is consumed by the first PUT.
+"""
+import uuid
+from functools import cache
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache as default_cache
+from django.urls import reverse
+from django.utils.module_loading import import_string
+from django.utils.text import get_valid_filename
+
+UPLOAD_TOKEN_SALT = 'jobs.resume-upload'
+UPLOAD_NONCE_KEY = 'jobs:resume-upload:{}'
+
+
+@cache
+def resume_storage():
+    config = settings.RESUME_STORAGE
+    return import_string(config['BACKEND'])(**config.get('OPTIONS', {}))
+
+
+def upload_prefix(user):
+    return f'resumes/uploads/{user.pk}/'
+
+
+def create_upload_target(request, user, filename):
+    """
+    Reserves a fresh object key for `user` and returns where to PUT the file:
+    a presigned URL on S3-compatible storage, or the signed local upload
+    endpoint otherwise.
+    """
+    key = f'{upload_prefix(user)}{uuid.uuid4().hex}/{get_valid_filename(filename)[-100:]}'
+    expires_in = settings.RESUME_UPLOAD_URL_EXPIRY
+    storage = resume_storage()
+
+    if hasattr(storage, 'bucket'):
+        upload_url = storage.url(key, expire=expires_in, http_method='PUT')
+    else:
+        nonce = uuid.uuid4().hex
+        default_cache.set(UPLOAD_NONCE_KEY.format(nonce), 1, expires_in)
+        token = signing.dumps({'key': key, 'nonce': nonce}, salt=UPLOAD_TOKEN_SALT)
+        upload_url = request.build_absolute_uri(reverse('resume-direct-upload', args=[token]))
+
+    return {'key': key, 'upload_url': upload_url, 'method': 'PUT', 'expires_in': expires_in}
+
+
+def consume_upload_token(token):
+    """
+    Returns the object key a local upload token was issued for, or None if
+    the token is invalid, expired or already used.
+    """
+    try:
+        data = signing.loads(token, salt=UPLOAD_TOKEN_SALT, max_age=settings.RESUME_UPLOAD_URL_EXPIRY)
+    except signing.BadSignature:
+        return None
+    if 'nonce' not in data or not default_cache.delete(UPLOAD_NONCE_KEY.format(data['nonce'])):
+        return None
+    return data['key']
@@ -0,0 +1,79 @@
+"""
+Helpers for streaming bulk data in and out of the API without holding the
+whole payload in memory.
+"""
+import codecs
+import csv
+import json
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+CSV_CONTENT_TYPES = {'text/csv'}
+NDJSON_CONTENT_TYPES = {'application/x-ndjson', 'application/ndjson', 'application/jsonl'}
+
+
+class Echo:
+    """A file-like object whose write() hands the value straight back, for csv.writer."""
+    def write(self, value):
+        return value
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def iter_request_lines(request):
+    """Decodes the raw request body line by line, as it arrives."""
+    if request.stream is None:
+        return iter(())
+    return codecs.iterdecode(iter(request.stream.readline, b''), 'utf-8')
+
+
+def read_csv_rows(request):
+    """
+    Yields `(line_number, row)` for each CSV record, keyed by the header row.
+    Empty cells are dropped so that model defaults apply.
+    """
+    reader = csv.DictReader(iter_request_lines(request))
+    for row in reader:
+        yield reader.line_num, {key: value for key, value in row.items() if key and value not in ('', None)}
+
+
+def read_ndjson_rows(request):
+    """Yields `(line_number, row)` for each JSON object line; blank lines are skipped."""
+    for line_number, line in enumerate(iter_request_lines(request), start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_number, row
+
+
+def csv_response(filename, header, rows):
+    writer = csv.writer(Echo())
+
+    def content():
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(content(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+def ndjson_response(filename, rows):
+    encoder = DjangoJSONEncoder()
+    response = StreamingHttpResponse(
+        (encoder.encode(row) + '\n' for row in rows),
+        content_type='application/x-ndjson',
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}.ndjson"'
+    return response
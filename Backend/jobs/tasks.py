@@ -1,53 +1,266 @@
+import logging
+import time
+
 from celery import shared_task
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
-from .models import Job, Application
+from django.conf import settings
+from django.db import transaction
+from django.core.mail import get_connection
+from .models import Job, Application, OutboxEvent
+from .cache import bump_generation
+from .notifications import (
+    build_digest_message, collect_digests, digests_sent, requeue_abandoned_digests, restore_digests,
+)
+from .resumes import ResumeRejected, extract_text, scan_resume, validate_resume
+from .matching import candidate_document, job_document, score_documents
+from . import recommendations
+from . import outbox
+from datetime import timedelta
 from django.utils import timezone
 
+logger = logging.getLogger(__name__)
+
 @shared_task(bind=True, max_retries=3)
 def send_application_notification(self, employer_email, job_title, candidate_email):
     """
-    Sends a professional email notification to the employer.
-    Includes retry logic in case the email server is temporarily down.
-    """
-    subject = f"New Application: {job_title}"
-    from_email = "Talent Bridge <noreply@talentbridge.com>"
-    
-    # Text version for simple email clients
-    text_content = f"Hi! A new candidate ({candidate_email}) has applied for your position: {job_title}."
-    
-    # HTML version for a professional look
-    html_content = f"""
-        <h3>New Application Received!</h3>
-        <p>You have a new applicant for <strong>{job_title}</strong>.</p>
-        <p><strong>Candidate Email:</strong> {candidate_email}</p>
-        <p>Log in to your dashboard to review their cover letter and profile.</p>
-        <br>
-        <p>Best regards,<br>Talent Bridge Team</p>
+    Sends a single new-application email to the employer.
+    Kept for tasks already queued; new applications go through the digest pipeline.
     """
-    
+    msg = build_digest_message(employer_email, [{'job_title': job_title, 'candidate_email': candidate_email}])
+
     try:
-        msg = EmailMultiAlternatives(subject, text_content, from_email, [employer_email])
-        msg.attach_alternative(html_content, "text/html")
         msg.send()
     except Exception as exc:
         # If the email fails (e.g., network issue), try again in 5 minutes
         raise self.retry(exc=exc, countdown=300)
+
+
+@shared_task
+def relay_outbox():
+    """
+    Runs every few seconds to deliver committed outbox events in batches.
+    """
+    batch_size = settings.OUTBOX_BATCH_SIZE
+    delivered = 0
+    failed = set()
+
+    # Bounded so a backlog cannot keep one run going forever.
+    for _ in range(settings.OUTBOX_MAX_BATCHES_PER_RUN):
+        claimed = outbox.relay(batch_size=batch_size, failed=failed)
+        delivered += claimed
+        if claimed < batch_size:
+            break
+
+    return f"Relayed {delivered - len(failed)} outbox events, {len(failed)} failed."
+
+
+@shared_task
+def prune_outbox():
+    """
+    Runs daily to delete delivered outbox events past the retention window.
+    """
+    cutoff = timezone.now() - timedelta(days=settings.OUTBOX_RETENTION_DAYS)
+    deleted, _ = OutboxEvent.objects.filter(dispatched_at__lt=cutoff).delete()
+    return f"Pruned {deleted} outbox events."
+
+
+@shared_task
+def flush_application_notifications():
+    """
+    Runs periodically to turn queued application events into per-employer
+    digests, handing them to the mailer in batches. Digests whose send task
+    died first go back in the queue.
+    """
+    requeue_abandoned_digests()
+    digests = collect_digests()
+    batch_size = settings.APPLICATION_DIGEST_BATCH_SIZE
+
+    for start in range(0, len(digests), batch_size):
+        try:
+            send_application_digests.delay(digests[start:start + batch_size])
+        except Exception:
+            restore_digests(digests[start:])
+            raise
+
+    return f"Queued {len(digests)} application digests."
+
+
+@shared_task(bind=True, max_retries=3)
+def send_application_digests(self, digests):
+    """
+    Sends a batch of digest emails over a single SMTP connection.
+    Includes retry logic in case the email server is temporarily down.
+    """
+    messages = [build_digest_message(employer_email, events) for employer_email, events, *_ in digests]
+
+    try:
+        with get_connection() as connection:
+            connection.send_messages(messages)
+    except Exception as exc:
+        if self.request.retries >= self.max_retries:
+            # Requeued for the next flush rather than dropped.
+            restore_digests(digests)
+            raise
+        # If the email fails (e.g., network issue), try again in 5 minutes
+        raise self.retry(exc=exc, countdown=300)
+    digests_sent(digests)
     
+@shared_task(bind=True, max_retries=3)
+def process_resume(self, application_id):
+    """
+    Validates, scans and extracts the text of an application's resume.
+    Rejected files are deleted from storage.
+    """
+    application = Application.objects.filter(pk=application_id).only('resume', 'resume_status').first()
+    if application is None or application.resume_status != Application.ResumeStatus.PENDING:
+        return "Nothing to process."
+
+    name = application.resume.name
+    storage = application.resume.storage
+    try:
+        with storage.open(name, 'rb') as f:
+            # Reads one byte past the limit so oversized files are caught.
+            content = f.read(settings.RESUME_MAX_UPLOAD_SIZE + 1)
+    except OSError as exc:
+        if self.request.retries >= self.max_retries:
+            # Never uploaded, or gone: reject it rather than leave it PENDING,
+            # which match scoring would keep skipping.
+            logger.warning("Could not read resume %s of application %s", name, application_id, exc_info=True)
+            Application.objects.filter(pk=application_id).update(
+                resume=None, resume_status=Application.ResumeStatus.REJECTED, resume_text='',
+            )
+            return f"Rejected resume for application {application_id}: {exc}"
+        raise self.retry(exc=exc, countdown=60)
+
+    try:
+        validate_resume(name, content)
+        scan_resume(name, content)
+        text = extract_text(name, content)
+    except ResumeRejected as exc:
+        Application.objects.filter(pk=application_id).update(
+            resume=None, resume_status=Application.ResumeStatus.REJECTED, resume_text='',
+        )
+        storage.delete(name)
+        return f"Rejected resume for application {application_id}: {exc}"
+
+    Application.objects.filter(pk=application_id).update(
+        resume_status=Application.ResumeStatus.READY, resume_text=text.replace('\x00', ''),
+        match_score=None,
+    )
+    return f"Processed resume for application {application_id}."
+
+
+@shared_task
+def score_job_applications(job_id):
+    """
+    Scores every application for a job against its requirements and
+    description. All applicants are scored together so they share one IDF.
+    """
+    job = Job.objects.filter(pk=job_id).only('title', 'description', 'requirements').first()
+    if job is None:
+        return "Job not found."
+
+    rows = list(
+        Application.objects.filter(job_id=job_id)
+        .order_by('id')
+        .values_list(
+            'id', 'resume_text', 'candidate__candidate_profile__skills', 'candidate__candidate_profile__title',
+        )
+    )
+    scores = score_documents(
+        job_document(job),
+        [candidate_document(resume_text, skills, title) for _, resume_text, skills, title in rows],
+    )
+
+    applications = [Application(pk=pk, match_score=round(float(score), 6)) for (pk, *_), score in zip(rows, scores)]
+    Application.objects.bulk_update(applications, ['match_score'], batch_size=500)
+    return f"Scored {len(applications)} applications for job {job_id}."
+
+
+@shared_task
+def score_pending_applications():
+    """
+    Runs every minute to score jobs that have new or changed applications.
+    Scoring per job rather than per application means a burst of applicants
+    costs one pass.
+    """
+    job_ids = list(
+        Application.objects.filter(match_score__isnull=True)
+        # Wait for the resume text before scoring.
+        .exclude(resume_status=Application.ResumeStatus.PENDING)
+        .values_list('job_id', flat=True)
+        .distinct()
+        .order_by('job_id')[:settings.MATCH_SCORING_JOBS_PER_RUN]
+    )
+    for job_id in job_ids:
+        score_job_applications(job_id)
+
+    return f"Scored applications for {len(job_ids)} jobs."
+
+
+@shared_task
+def refresh_recommendations():
+    """
+    Runs every few minutes to recompute the recommendation neighbors of jobs
+    that changed or gained applications or bookmarks.
+    """
+    refreshed = recommendations.refresh(batch_size=settings.RECOMMENDATION_REFRESH_BATCH_SIZE)
+    return f"Refreshed recommendations for {refreshed} jobs."
+
+
+@shared_task
+def rebuild_recommendations():
+    """
+    Runs daily to recompute the whole recommendation index.
+    """
+    stored = recommendations.rebuild()
+    return f"Rebuilt recommendations for {stored} jobs."
+
+
 @shared_task
 def deactivate_expired_jobs():
     """
-    Runs periodically to close jobs that have passed their deadline.
+    Runs periodically (every JOB_EXPIRY_SWEEP_INTERVAL seconds) to close
+    jobs that have passed their deadline.
+
+    Jobs are closed in short transactions of JOB_EXPIRY_BATCH_SIZE rows
+    taken off the deadline index with SKIP LOCKED, so a sweep never blocks
+    employers editing their jobs, and overlapping sweeps split the work
+    instead of waiting on each other. Each closed job records a
+    `job.deactivated` outbox event.
     """
+    started = time.monotonic()
     now = timezone.now()
-    
-    # Find all active jobs where the deadline is in the past
-    expired_jobs = Job.objects.filter(is_active=True, deadline__lt=now)
-    count = expired_jobs.count()
-    
-    if count > 0:
-        expired_jobs.update(is_active=False)
-        return f"Successfully closed {count} expired jobs."
-    
-    return "No expired jobs found."
\ No newline at end of file
+    batch_size = settings.JOB_EXPIRY_BATCH_SIZE
+    closed = batches = 0
+
+    # Bounded so a large backlog is spread over several runs.
+    while batches < settings.JOB_EXPIRY_MAX_BATCHES:
+        with transaction.atomic():
+            job_ids = list(
+                Job.objects.select_for_update(skip_locked=True)
+                .filter(is_active=True, deadline__lt=now)
+                .order_by('deadline')
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not job_ids:
+                break
+
+            Job.objects.filter(pk__in=job_ids).update(is_active=False, updated_at=now)
+            outbox.emit_many('job.deactivated', [{'job_id': job_id, 'reason': 'deadline'} for job_id in job_ids])
+
+        closed += len(job_ids)
+        batches += 1
+        if len(job_ids) < batch_size:
+            break
+
+    if closed:
+        # update() skips post_save, so invalidate the job board explicitly
+        bump_generation()
+
+    logger.info(
+        "Expired job sweep finished",
+        extra={'closed': closed, 'batches': batches, 'duration_ms': round((time.monotonic() - started) * 1000)},
+    )
+    if closed:
+        return f"Successfully closed {closed} expired jobs."
+    return "No expired jobs found."
@@ -1,3 +1,819 @@
-from django.test import TestCase
+import copy
+import json
+import tempfile
+import threading
+from functools import partial
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError, connection, connections, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from django_redis import get_redis_connection
+from django_redis.exceptions import ConnectionInterrupted
+from redis.exceptions import RedisError
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+from . import notifications, outbox, recommendations, statistics, tasks, user_state
+from .cache import get_generation
+from .models import Application, Bookmark, Job, JobDailyApplicationCount, JobStatistics, OutboxEvent
+from .storage import resume_storage
+
+User = get_user_model()
+
+
+class JobsTestCase(TestCase):
+    """Users, jobs and an API client, with the cache empty and throttling off."""
+
+    def setUp(self):
+        cache.clear()
+        throttles = mock.patch.object(APIView, 'get_throttles', return_value=[])
+        throttles.start()
+        self.addCleanup(throttles.stop)
+        self.employer = self.create_user('employer@example.com', is_employer=True)
+        self.candidate = self.create_user('candidate@example.com', is_candidate=True)
+        self.client = APIClient()
+
+    def create_user(self, email, **kwargs):
+        return User.objects.create_user(username=email, email=email, password='password123', **kwargs)
+
+    def create_job(self, **kwargs):
+        fields = {
+            'employer': self.employer, 'title': 'Role', 'company_name': 'Acme',
+            'description': 'Build things.', 'requirements': 'Python', 'location': 'Nairobi',
+        }
+        return Job.objects.create(**{**fields, **kwargs})
+
+    def ids(self, response):
+        return [job['id'] for job in response.data['results']]
+
+
+class JobSearchTests(JobsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.in_title = self.create_job(title='Python Developer', requirements='SQL')
+        self.in_description = self.create_job(title='Data Analyst', description='Some Python scripting.', requirements='SQL')
+        self.unrelated = self.create_job(title='Accountant', requirements='Excel')
+
+    def test_matches_are_ranked_by_relevance(self):
+        response = self.client.get('/api/v1/jobs/', {'search': 'python'})
+        self.assertEqual(self.ids(response), [self.in_title.pk, self.in_description.pk])
+
+    def test_terms_are_prefix_matched_and_combined(self):
+        self.assertEqual(self.ids(self.client.get('/api/v1/jobs/', {'search': 'pyth'})), [self.in_title.pk, self.in_description.pk])
+        self.assertEqual(self.ids(self.client.get('/api/v1/jobs/', {'search': 'python analyst'})), [self.in_description.pk])
+
+    def test_explicit_ordering_overrides_relevance(self):
+        response = self.client.get('/api/v1/jobs/', {'search': 'python', 'ordering': '-created_at'})
+        self.assertEqual(self.ids(response), [self.in_description.pk, self.in_title.pk])
+
+    def test_query_syntax_is_not_interpreted(self):
+        response = self.client.get('/api/v1/jobs/', {'search': '"python" (*) -'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(self.ids(response)), {self.in_title.pk, self.in_description.pk})
+
+    def test_edits_are_reindexed(self):
+        self.unrelated.title = 'Python Accountant'
+        self.unrelated.save()
+        self.assertIn(self.unrelated.pk, self.ids(self.client.get('/api/v1/jobs/', {'search': 'python'})))
+
+
+class JobResponseCacheTests(JobsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.job = self.create_job()
+
+    def test_anonymous_responses_are_cached(self):
+        first = self.client.get('/api/v1/jobs/', {'job_type': 'Full-Time', 'utm_source': 'mail'})
+        # Parameter order, blank values and unrelated parameters share the entry.
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/v1/jobs/?utm_source=ads&search=&job_type=Full-Time')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+        self.assertEqual(self.client.get('/api/v1/jobs/', {'job_type': 'Contract'}).data['count'], 0)
+
+    def test_matching_etag_gets_not_modified(self):
+        etag = self.client.get(f'/api/v1/jobs/{self.job.pk}/')['ETag']
+        response = self.client.get(f'/api/v1/jobs/{self.job.pk}/', HTTP_IF_NONE_MATCH=f'W/{etag}')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(self.client.get(f'/api/v1/jobs/{self.job.pk}/', HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+    def test_job_changes_invalidate_cached_responses(self):
+        self.client.get('/api/v1/jobs/')
+        self.create_job(title='Second Role')
+        self.assertEqual(self.client.get('/api/v1/jobs/').data['count'], 2)
+
+        self.job.delete()
+        self.assertEqual(self.client.get('/api/v1/jobs/').data['count'], 1)
+
+    def test_authenticated_requests_bypass_the_cache(self):
+        self.client.get('/api/v1/jobs/')
+        self.client.force_authenticate(self.candidate)
+        response = self.client.get('/api/v1/jobs/')
+        self.assertNotIn('ETag', response)
+        self.assertIn('is_bookmarked', response.data['results'][0])
+
+    def test_cache_outage_serves_uncached(self):
+        outage = ConnectionInterrupted(connection=None)
+        with mock.patch.object(cache, 'get', side_effect=outage), mock.patch.object(cache, 'set', side_effect=outage):
+            self.assertEqual(self.client.get('/api/v1/jobs/').data['count'], 1)
+        with mock.patch.object(cache, 'incr', side_effect=outage), mock.patch.object(cache, 'get', side_effect=outage):
+            self.create_job(title='Written during the outage')
+
+
+class KeysetPaginationTests(JobsTestCase):
+    def test_cursor_pages_cover_every_job_once(self):
+        jobs = [self.create_job(title=f'Role {i}') for i in range(23)]
+        # Ties on created_at are broken by id.
+        Job.objects.filter(pk__in=[job.pk for job in jobs[5:15]]).update(created_at=jobs[5].created_at)
+
+        seen, url = [], '/api/v1/jobs/?pagination=cursor'
+        while url:
+            response = self.client.get(url)
+            self.assertNotIn('count', response.data)
+            seen += self.ids(response)
+            url = response.data['next']
+        expected = Job.objects.order_by('-created_at', '-id').values_list('id', flat=True)
+        self.assertEqual(seen, list(expected))
+
+    def test_other_orderings_are_refused(self):
+        self.create_job(title='Python Developer')
+        for params in ({'search': 'python'}, {'ordering': 'salary'}, {'title': 'python', 'fuzzy': 'true', 'ordering': 'created_at'}):
+            with self.subTest(**params):
+                response = self.client.get('/api/v1/jobs/', {**params, 'pagination': 'cursor'})
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get('/api/v1/jobs/', {'ordering': '-created_at', 'pagination': 'cursor'}).status_code, 200)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get('/api/v1/jobs/', {'cursor': 'not-a-cursor'}).status_code, 404)
+
+
+class JobBulkImportTests(JobsTestCase):
+    url = '/api/v1/jobs/my-jobs/import/'
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.employer)
+
+    def test_csv_rows_are_imported_and_invalid_rows_reported(self):
+        body = (
+            'title,description,requirements,location,salary\n'
+            'Backend Developer,Build APIs.,Python,Nairobi,1000\n'
+            ',No title.,Python,Nairobi,\n'
+            'Designer,Draw things.,Figma,Remote,not-a-number\n'
+            'Tester,Break things.,Patience,Mombasa,\n'
+        )
+        response = self.client.post(self.url, body, content_type='text/csv')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['failed']), (2, 2))
+        self.assertEqual([error['line'] for error in response.data['errors']], [3, 4])
+        self.assertIn('title', response.data['errors'][0]['errors'])
+
+        jobs = Job.objects.filter(employer=self.employer).order_by('id')
+        self.assertEqual([job.title for job in jobs], ['Backend Developer', 'Tester'])
+        self.assertEqual(jobs[1].salary, 0)
+        self.assertTrue(all(hasattr(job, 'statistics') for job in jobs))
+
+    def test_ndjson_chunks_are_committed_independently(self):
+        row = '{"title": "Role %s", "description": "d", "requirements": "r", "location": "Nairobi"}'
+        lines = [row % i for i in range(5)] + ['not json', '["a list"]', '', row % 5]
+        with mock.patch('jobs.views.JobBulkImportView.chunk_size', 2):
+            response = self.client.post(self.url, '\n'.join(lines), content_type='application/x-ndjson')
+        self.assertEqual((response.data['created'], response.data['failed']), (6, 2))
+        self.assertEqual([error['line'] for error in response.data['errors']], [6, 7])
+        self.assertEqual(Job.objects.count(), 6)
+
+    def test_imports_invalidate_the_job_board(self):
+        self.client.force_authenticate(None)
+        self.client.get('/api/v1/jobs/')
+        self.client.force_authenticate(self.employer)
+        self.client.post(self.url, '{"title": "T", "description": "d", "requirements": "r", "location": "L"}',
+                         content_type='application/x-ndjson')
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get('/api/v1/jobs/').data['count'], 1)
+
+    def test_nothing_valid_is_a_bad_request(self):
+        response = self.client.post(self.url, 'title\n\n', content_type='text/csv')
+        self.assertEqual((response.status_code, response.data['created']), (400, 0))
+        self.assertEqual(self.client.post(self.url, '{}', content_type='application/xml').status_code, 415)
+
+
+class ApplicationDigestTests(JobsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.redis = get_redis_connection('default')
+        notifications.queue_application_notifications([
+            {'employer_email': 'employer@example.com', 'job_title': 'Role', 'candidate_email': f'c{i}@example.com'}
+            for i in range(3)
+        ])
+
+    def pending(self):
+        return [json.loads(event)['candidate_email']
+                for event in self.redis.lrange(notifications.PENDING_KEY.format('employer@example.com'), 0, -1)]
+
+    def test_events_are_kept_until_the_digest_is_sent(self):
+        [(employer_email, events, key)] = notifications.collect_digests()
+        self.assertEqual(len(events), 3)
+        self.assertEqual((self.pending(), self.redis.llen(key)), ([], 3))
+        # Rate limited until the interval has passed.
+        self.assertEqual(notifications.collect_digests(), [])
+
+        with mock.patch('jobs.tasks.get_connection'):
+            tasks.send_application_digests.apply(args=[[[employer_email, events, key]]])
+        self.assertFalse(self.redis.exists(key))
+
+    def test_unsent_digests_are_requeued(self):
+        digests = notifications.collect_digests()
+        notifications.queue_application_notifications([
+            {'employer_email': 'employer@example.com', 'job_title': 'Role', 'candidate_email': 'late@example.com'},
+        ])
+        with mock.patch('jobs.tasks.get_connection', side_effect=OSError):
+            tasks.send_application_digests.apply(args=[digests], retries=tasks.send_application_digests.max_retries)
+
+        self.assertEqual(self.pending(), ['c0@example.com', 'c1@example.com', 'c2@example.com', 'late@example.com'])
+        self.assertFalse(self.redis.exists(digests[0][2]))
+        self.assertEqual(len(notifications.collect_digests()[0][1]), 4)
+
+    def test_abandoned_digests_are_requeued(self):
+        [(_, _, key)] = notifications.collect_digests()
+        self.assertGreater(self.redis.ttl(key), 0)
+        # Claimed too recently: the send task may still be running.
+        self.assertEqual(notifications.requeue_abandoned_digests(), 0)
+
+        with override_settings(APPLICATION_DIGEST_REQUEUE_AFTER=0):
+            with mock.patch.object(tasks.send_application_digests, 'delay') as send:
+                tasks.flush_application_notifications()
+        self.assertFalse(self.redis.exists(key))
+        [[[employer_email, events, _]]] = send.call_args.args
+        self.assertEqual((employer_email, len(events)), ('employer@example.com', 3))
+
+    def test_digests_are_requeued_when_the_send_task_cannot_be_queued(self):
+        with mock.patch.object(tasks.send_application_digests, 'delay', side_effect=ConnectionError):
+            with self.assertRaises(ConnectionError):
+                tasks.flush_application_notifications()
+        self.assertEqual(len(self.pending()), 3)
+
+
+class OutboxRelayTests(JobsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.delivered = []
+        handlers = mock.patch.dict(outbox._handlers, {'test.event': self.handle}, clear=True)
+        handlers.start()
+        self.addCleanup(handlers.stop)
+
+    def handle(self, payloads):
+        if any(payload.get('poison') for payload in payloads):
+            raise ValueError("bad payload")
+        self.delivered.append([payload['n'] for payload in payloads])
+
+    def test_events_are_delivered_in_batches(self):
+        outbox.emit_many('test.event', [{'n': n} for n in range(3)])
+        self.assertEqual(outbox.relay(), 3)
+        self.assertEqual(self.delivered, [[0, 1, 2]])
+        self.assertFalse(OutboxEvent.objects.filter(dispatched_at__isnull=True).exists())
+        self.assertEqual(outbox.relay(), 0)
+
+    def test_a_poison_event_only_fails_itself(self):
+        outbox.emit_many('test.event', [{'n': 0}, {'n': 1, 'poison': True}, {'n': 2}])
+        outbox.relay()
+        self.assertEqual(self.delivered, [[0], [2]])
+        poison = OutboxEvent.objects.get(dispatched_at__isnull=True)
+        self.assertEqual((poison.payload['n'], poison.attempts), (1, 1))
+        self.assertIn('bad payload', poison.last_error)
+
+    @override_settings(OUTBOX_RETRY_DELAY=30)
+    def test_failed_events_are_retried_with_backoff(self):
+        event = outbox.emit('test.event', n=0, poison=True)
+        for attempt, delay in enumerate([30, 60, 120, 240, 480], start=1):
+            outbox.relay()
+            event.refresh_from_db()
+            self.assertEqual(event.attempts, attempt)
+            self.assertAlmostEqual((event.available_at - timezone.now()).total_seconds(), delay, delta=5)
+            # Not claimable again until the delay has passed.
+            self.assertEqual(outbox.relay(), 0)
+            OutboxEvent.objects.filter(pk=event.pk).update(available_at=timezone.now())
+        # Given up on after max_attempts.
+        self.assertEqual(outbox.relay(), 0)
+
+    @override_settings(OUTBOX_RETRY_DELAY=0, OUTBOX_BATCH_SIZE=1)
+    def test_a_run_attempts_each_event_once(self):
+        outbox.emit('test.event', n=0, poison=True)
+        outbox.emit('test.event', n=1)
+        tasks.relay_outbox()
+        self.assertEqual(self.delivered, [[1]])
+        self.assertEqual(OutboxEvent.objects.get(payload__n=0).attempts, 1)
+
+    def test_topics_without_a_handler_stay_pending(self):
+        event = outbox.emit('unknown.event', n=0)
+        self.assertEqual(outbox.relay(), 0)
+        event.refresh_from_db()
+        self.assertEqual((event.attempts, event.dispatched_at), (0, None))
+
+
+@skipUnless(connection.features.has_select_for_update_skip_locked, "needs SELECT ... FOR UPDATE SKIP LOCKED")
+class OutboxSkipLockedTests(TransactionTestCase):
+    def test_rows_locked_by_another_relay_are_skipped(self):
+        events = outbox.emit_many('test.event', [{'n': n} for n in range(4)])
+        locked, release = threading.Event(), threading.Event()
+
+        def hold_lock():
+            with transaction.atomic():
+                list(OutboxEvent.objects.select_for_update().filter(pk__in=[events[0].pk, events[1].pk]))
+                locked.set()
+                release.wait(10)
+            connections.close_all()
+
+        thread = threading.Thread(target=hold_lock)
+        thread.start()
+        try:
+            locked.wait(10)
+            delivered = []
+            with mock.patch.dict(outbox._handlers, {'test.event': delivered.extend}, clear=True):
+                self.assertEqual(outbox.relay(), 2)
+            self.assertEqual([payload['n'] for payload in delivered], [2, 3])
+        finally:
+            release.set()
+            thread.join()
+
+
+class ApplyJobTests(JobsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.job = self.create_job()
+        self.url = f'/api/v1/jobs/{self.job.pk}/apply/'
+        self.client.force_authenticate(self.candidate)
+
+    def test_apply_records_the_notification(self):
+        response = self.client.post(self.url, {'cover_letter': 'Hello'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        event = OutboxEvent.objects.get(topic='application.created')
+        self.assertEqual(event.payload['application_id'], response.data['id'])
+        self.assertEqual(event.payload['employer_email'], 'employer@example.com')
+
+    def test_second_application_is_refused(self):
+        self.client.post(self.url, {}, format='json')
+        response = self.client.post(self.url, {}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('already applied', str(response.data))
+        self.assertEqual(Application.objects.count(), 1)
+
+    def test_other_integrity_errors_are_not_reported_as_duplicates(self):
+        with mock.patch.object(outbox, 'emit', side_effect=IntegrityError('other constraint')):
+            with self.assertRaises(IntegrityError):
+                self.client.post(self.url, {}, format='json')
+
+        # The job was deleted after it was looked up.
+        with mock.patch.object(outbox, 'emit', side_effect=IntegrityError('fk')), \
+                mock.patch('jobs.views.Job.objects.filter') as jobs:
+            jobs.return_value.exists.return_value = False
+            response = self.client.post(self.url, {}, format='json')
+        self.assertEqual(response.status_code, 404)
+
+    def test_idempotency_key_replays_the_first_response(self):
+        first = self.client.post(self.url, {}, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        with self.assertNumQueries(0):
+            replay = self.client.post(self.url, {}, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual((replay.status_code, replay.data), (201, first.data))
+        self.assertEqual(Application.objects.count(), 1)
+
+    def test_idempotency_key_in_use_is_a_conflict(self):
+        with mock.patch('jobs.views.ApplyJobView.perform_create', side_effect=lambda serializer: self.assertEqual(
+            self.client.post(self.url, {}, format='json', HTTP_IDEMPOTENCY_KEY='abc').status_code, 409,
+        )):
+            self.client.post(self.url, {}, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+
+    def test_failed_requests_release_the_idempotency_key(self):
+        with mock.patch('jobs.views.ApplyJobView.perform_create', side_effect=ValidationError("Try again.")):
+            self.assertEqual(self.client.post(self.url, {}, format='json', HTTP_IDEMPOTENCY_KEY='abc').status_code, 400)
+        self.assertEqual(self.client.post(self.url, {}, format='json', HTTP_IDEMPOTENCY_KEY='abc').status_code, 201)
+
+
+class ResumeUploadTests(JobsTestCase):
+    def setUp(self):
+        super().setUp()
+        media = override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+        media.enable()
+        self.addCleanup(media.disable)
+        self.job = self.create_job()
+        self.client.force_authenticate(self.candidate)
+
+    def upload_target(self, filename='cv.txt'):
+        response = self.client.post('/api/v1/jobs/resumes/uploads/', {'filename': filename, 'size': 100}, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.data
+
+    def upload(self, filename='cv.txt', content=b'Python developer with Django experience.'):
+        target = self.upload_target(filename)
+        response = self.client.put(target['upload_url'], content, content_type='application/octet-stream')
+        self.assertEqual(response.status_code, 204)
+        return target
+
+    def apply(self, key):
+        response = self.client.post(f'/api/v1/jobs/{self.job.pk}/apply/', {'resume_key': key}, format='json')
+        self.assertEqual(response.status_code, 201)
+        return Application.objects.get(pk=response.data['id'])
+
+    def test_upload_links_work_once(self):
+        target = self.upload()
+        response = self.client.put(target['upload_url'], b'Replaced.', content_type='application/octet-stream')
+        self.assertEqual(response.status_code, 400)
+        with resume_storage().open(target['key']) as f:
+            self.assertEqual(f.read(), b'Python developer with Django experience.')
+
+    def test_invalid_upload_links_are_refused(self):
+        target = self.upload_target()
+        put = partial(self.client.put, data=b'cv', content_type='application/octet-stream')
+        self.assertEqual(put(target['upload_url'].replace('/uploads/', '/uploads/x')).status_code, 400)
+        with override_settings(RESUME_UPLOAD_URL_EXPIRY=-1):
+            self.assertEqual(put(target['upload_url']).status_code, 400)
+        self.assertEqual(put(target['upload_url']).status_code, 204)
+
+    def test_resume_keys_must_be_uploaded_by_the_applicant(self):
+        target = self.upload_target()
+        response = self.client.post(f'/api/v1/jobs/{self.job.pk}/apply/', {'resume_key': target['key']}, format='json')
+        self.assertEqual(response.status_code, 400)
+        other = 'resumes/uploads/999/x/cv.txt'
+        response = self.client.post(f'/api/v1/jobs/{self.job.pk}/apply/', {'resume_key': other}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_processed_resumes_are_ready(self):
+        application = self.apply(self.upload()['key'])
+        self.assertEqual(application.resume_status, Application.ResumeStatus.PENDING)
+        tasks.process_resume.apply(args=[application.pk])
+        application.refresh_from_db()
+        self.assertEqual(application.resume_status, Application.ResumeStatus.READY)
+        self.assertIn('Django', application.resume_text)
+
+    def test_invalid_resumes_are_rejected_and_deleted(self):
+        key = self.upload('cv.pdf', b'not a pdf')['key']
+        application = self.apply(key)
+        tasks.process_resume.apply(args=[application.pk])
+        application.refresh_from_db()
+        self.assertEqual((application.resume_status, application.resume.name), (Application.ResumeStatus.REJECTED, None))
+        self.assertFalse(resume_storage().exists(key))
+
+    def test_unreadable_resumes_are_rejected_after_the_last_retry(self):
+        key = self.upload()['key']
+        application = self.apply(key)
+        resume_storage().delete(key)
+        # Eager retries run straight away, up to max_retries.
+        tasks.process_resume.apply(args=[application.pk])
+        application.refresh_from_db()
+        self.assertEqual(application.resume_status, Application.ResumeStatus.REJECTED)
+
+
+class RecommendationTests(JobsTestCase):
+    def setUp(self):
+        super().setUp()
+        model = mock.patch.object(recommendations, '_model', None)
+        model.start()
+        self.addCleanup(model.stop)
+        self.redis = get_redis_connection('default')
+        self.backend = self.create_job(title='Backend Engineer', requirements='Python Django Postgres')
+        self.api = self.create_job(title='API Engineer', requirements='Python Django REST')
+        self.accountant = self.create_job(title='Accountant', description='Balance books.', requirements='Excel ledgers')
+        recommendations.rebuild()
+
+    def neighbors(self, job):
+        raw = self.redis.get(recommendations.NEIGHBORS_KEY.format(job.pk))
+        return np.frombuffer(raw, dtype=recommendations.NEIGHBOR_DTYPE)['id'].tolist()
+
+    def test_only_similar_active_jobs_are_neighbors(self):
+        self.assertEqual(self.neighbors(self.backend), [self.api.pk])
+        self.assertEqual(self.neighbors(self.accountant), [])
+
+    @override_settings(RECOMMENDATION_NEIGHBORS=2)
+    def test_neighbors_are_the_top_scores(self):
+        for title in ('Python Engineer', 'Django Engineer', 'Python Django Engineer'):
+            self.create_job(title=title, requirements='Python Django Postgres')
+        model = recommendations.SimilarityModel()
+        position = model.position[self.backend.pk]
+
+        scores = (recommendations.TEXT_WEIGHT * (model.text @ model.text.T)).toarray()[position]
+        scores[position] = 0
+        [(_, packed)] = model.neighbors(np.array([position]))
+        self.assertEqual(packed['id'].tolist(), model.job_ids[np.argsort(-scores, kind='stable')[:2]].tolist())
+        self.assertTrue(np.allclose(packed['score'], np.sort(scores)[::-1][:2]))
+
+    def test_refresh_updates_the_fitted_model(self):
+        job = self.create_job(title='Django Engineer', requirements='Python Django')
+        recommendations.mark_dirty([job.pk])
+        with mock.patch.object(recommendations, 'fit_tfidf', side_effect=AssertionError("refitted")):
+            self.assertEqual(recommendations.refresh(), 1)
+
+        self.assertCountEqual(self.neighbors(job), [self.backend.pk, self.api.pk])
+        self.assertIn(job.pk, self.neighbors(self.backend))
+
+    def test_other_workers_catch_up_with_refreshed_jobs(self):
+        other_worker = copy.deepcopy(recommendations._model)
+        job = self.create_job(title='Django Engineer', requirements='Python Django')
+        recommendations.mark_dirty([job.pk])
+        recommendations.refresh()
+
+        version = self.redis.get(recommendations.VERSION_KEY)
+        with mock.patch.object(recommendations, '_model', other_worker):
+            model = recommendations._fitted_model(self.redis, version)
+        self.assertIs(model, other_worker)
+        self.assertTrue(model.active[model.position[job.pk]])
+
+    def test_redis_outage_serves_the_newest_jobs(self):
+        self.client.force_authenticate(self.candidate)
+        with mock.patch.object(recommendations, '_redis') as redis:
+            redis.return_value.get.side_effect = RedisError
+            response = self.client.get('/api/v1/jobs/recommended/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([job['id'] for job in response.data], [self.accountant.pk, self.api.pk, self.backend.pk])
+
+
+class JobStatisticsTests(JobsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.job = self.create_job()
+        self.application = Application.objects.create(job=self.job, candidate=self.candidate)
+
+    def counts(self):
+        stats = JobStatistics.objects.get(pk=self.job.pk)
+        daily = JobDailyApplicationCount.objects.filter(job=self.job).values_list('count', flat=True)
+        return stats.pending_count, stats.accepted_count, stats.rejected_count, sum(daily)
+
+    def test_new_applications_are_counted(self):
+        self.assertEqual(self.counts(), (1, 0, 0, 1))
+
+    def test_status_changes_move_the_counts(self):
+        application = Application.objects.get(pk=self.application.pk)
+        application.transition_to(Application.Status.ACCEPTED)
+        self.assertEqual(self.counts(), (0, 1, 0, 1))
+
+        application.cover_letter = 'Updated.'
+        application.save()
+        self.assertEqual(self.counts(), (0, 1, 0, 1))
+
+        application.transition_to(Application.Status.REJECTED)
+        self.assertEqual(self.counts(), (0, 0, 1, 1))
+
+    def test_deletes_are_subtracted_once(self):
+        application = Application.objects.get(pk=self.application.pk)
+        application.delete()
+        self.assertEqual(self.counts(), (0, 0, 0, 0))
+
+        # A replayed removal never takes a counter below zero.
+        statistics.application_removed(application)
+        self.assertEqual(self.counts(), (0, 0, 0, 0))
+
+    def test_employer_dashboard(self):
+        other = self.create_user('other@example.com', is_candidate=True)
+        Application.objects.create(job=self.job, candidate=other)
+        Application.objects.get(pk=self.application.pk).transition_to(Application.Status.ACCEPTED)
+        self.job.bookmarks.add(other)
+
+        self.client.force_authenticate(self.employer)
+        response = self.client.get('/api/v1/jobs/my-jobs/stats/', {'days': 7})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['totals'], {
+            'jobs': 1, 'active_jobs': 1, 'applications': 2, 'pending': 1, 'accepted': 1, 'rejected': 0, 'bookmarks': 1,
+        })
+        self.assertEqual([day['count'] for day in response.data['daily_applications']], [2])
+
+
+class ExpiredJobSweepTests(JobsTestCase):
+    def setUp(self):
+        super().setUp()
+        past = timezone.now() - timezone.timedelta(hours=1)
+        self.expired = [self.create_job(deadline=past) for _ in range(5)]
+        self.open = self.create_job(deadline=timezone.now() + timezone.timedelta(days=1))
+        self.undated = self.create_job()
+
+    def active(self):
+        return set(Job.objects.filter(is_active=True).values_list('pk', flat=True))
+
+    @override_settings(JOB_EXPIRY_BATCH_SIZE=2)
+    def test_expired_jobs_are_closed_in_batches(self):
+        generation = get_generation()
+        with self.assertLogs('jobs.tasks', 'INFO') as logs:
+            self.assertEqual(tasks.deactivate_expired_jobs(), "Successfully closed 5 expired jobs.")
+        self.assertEqual((logs.records[-1].closed, logs.records[-1].batches), (5, 3))
+
+        self.assertEqual(self.active(), {self.open.pk, self.undated.pk})
+        self.assertCountEqual(
+            OutboxEvent.objects.filter(topic='job.deactivated').values_list('payload__job_id', flat=True),
+            [job.pk for job in self.expired],
+        )
+        self.assertGreater(get_generation(), generation)
+
+    @override_settings(JOB_EXPIRY_BATCH_SIZE=2, JOB_EXPIRY_MAX_BATCHES=2)
+    def test_a_run_is_bounded(self):
+        tasks.deactivate_expired_jobs()
+        self.assertEqual(len(self.active()), 3)
+        tasks.deactivate_expired_jobs()
+        self.assertEqual(self.active(), {self.open.pk, self.undated.pk})
+
+    def test_nothing_to_close(self):
+        Job.objects.filter(pk__in=[job.pk for job in self.expired]).delete()
+        generation = get_generation()
+        self.assertEqual(tasks.deactivate_expired_jobs(), "No expired jobs found.")
+        self.assertEqual(get_generation(), generation)
+
+
+class BookmarkTests(JobsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.job = self.create_job()
+        self.url = f'/api/v1/jobs/{self.job.pk}/bookmark/'
+        self.client.force_authenticate(self.candidate)
+
+    def bookmark_count(self):
+        return Job.objects.values_list('bookmark_count', flat=True).get(pk=self.job.pk)
+
+    def test_posts_toggle_the_bookmark(self):
+        self.assertEqual(self.client.post(self.url).status_code, 201)
+        self.assertTrue(Bookmark.objects.filter(job=self.job, user=self.candidate).exists())
+        self.assertEqual(self.bookmark_count(), 1)
+
+        self.assertEqual(self.client.post(self.url).status_code, 200)
+        self.assertFalse(Bookmark.objects.filter(job=self.job, user=self.candidate).exists())
+        self.assertEqual(self.bookmark_count(), 0)
+
+    def test_missing_job(self):
+        self.assertEqual(self.client.post('/api/v1/jobs/0/bookmark/').status_code, 404)
+
+    def test_concurrent_bookmark_is_counted_once(self):
+        with mock.patch.object(Bookmark.objects, 'create', side_effect=IntegrityError):
+            self.assertEqual(self.client.post(self.url).status_code, 201)
+        self.assertEqual(self.bookmark_count(), 0)
+
+    def test_m2m_changes_count_real_rows(self):
+        other = self.create_user('other@example.com', is_candidate=True)
+        third = self.create_user('third@example.com', is_candidate=True)
+        self.job.bookmarks.add(self.candidate, other)
+        self.job.bookmarks.add(self.candidate)
+        self.assertEqual(self.bookmark_count(), 2)
+
+        self.job.bookmarks.remove(self.candidate, third)
+        self.assertEqual(self.bookmark_count(), 1)
+
+        other.bookmarked_jobs.clear()
+        self.assertEqual(self.bookmark_count(), 0)
+
+    def test_deleting_a_user_removes_their_bookmarks_from_the_count(self):
+        self.assertEqual(self.client.post(self.url).status_code, 201)
+        self.candidate.delete()
+        self.assertEqual(self.bookmark_count(), 0)
+
+
+class UserJobStateTests(JobsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.redis = get_redis_connection('default')
+        self.job = self.create_job()
+        self.key = user_state.STATE_KEY.format(self.candidate.pk)
+
+    def test_writes_patch_a_warmed_set(self):
+        user_state.warm(self.candidate.pk)
+        user_state.bookmark_added(self.candidate.pk, self.job.pk)
+        self.assertEqual(user_state.lookup(self.candidate.pk, [self.job.pk]), ({self.job.pk}, set()))
+        self.assertGreater(self.redis.ttl(self.key), 0)
+
+        user_state.bookmark_removed(self.candidate.pk, self.job.pk)
+        self.assertEqual(user_state.lookup(self.candidate.pk, [self.job.pk]), (set(), set()))
+
+    def test_writes_leave_no_key_for_users_without_a_set(self):
+        user_state.bookmark_added(self.candidate.pk, self.job.pk)
+        self.assertFalse(self.redis.exists(self.key))
+
+    def test_warm_reloads_when_written_to_while_loading(self):
+        load = user_state._load
+
+        def load_then_apply(user_id):
+            loaded = load(user_id)
+            if not Application.objects.exists():
+                # Another request applies after this warm() read the database.
+                Application.objects.create(job=self.job, candidate=self.candidate)
+                user_state.application_added(self.candidate.pk, self.job.pk)
+            return loaded
+
+        with mock.patch.object(user_state, '_load', side_effect=load_then_apply):
+            user_state.warm(self.candidate.pk)
+        self.assertEqual(user_state.lookup(self.candidate.pk, [self.job.pk]), (set(), {self.job.pk}))
+
+
+class JobCounterTests(JobsTestCase):
+    def test_job_saves_keep_concurrent_counter_updates(self):
+        job = self.create_job()
+        loaded = Job.objects.get(pk=job.pk)
+        Application.objects.create(job=job, candidate=self.candidate)
+        self.client.force_authenticate(self.candidate)
+        self.client.post(f'/api/v1/jobs/{job.pk}/bookmark/')
+
+        self.client.force_authenticate(self.employer)
+        response = self.client.patch(f'/api/v1/jobs/{job.pk}/', {'title': 'Senior Role'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        loaded.title = 'Lead Role'
+        loaded.save()
+
+        job.refresh_from_db()
+        self.assertEqual((job.title, job.applications_count, job.bookmark_count), ('Lead Role', 1, 1))
+
+
+class QueryCountTests(JobsTestCase):
+    """
+    Every jobs view runs a fixed number of queries, however many rows it
+    returns. Each test requests the same page with one row and with a full
+    page and expects the same count.
+    """
+    # Rows in a full page (ListingPagination's page size) and one more, so
+    # there is a second page.
+    row_counts = (1, 11)
+
+    def create_jobs(self, count):
+        return [self.create_job(title=f'Role {i}') for i in range(count)]
+
+    def create_applications(self, count):
+        jobs = self.create_jobs(count)
+        offset = User.objects.count()
+        candidates = [
+            self.create_user(f'applicant-{offset + i}@example.com', is_candidate=True) for i in range(count)
+        ]
+        return [Application.objects.create(job=jobs[0], candidate=candidate) for candidate in candidates]
+
+    def request(self, method, url, queries, user=None, data=None):
+        # Cached responses and the per-user job state live in the cache;
+        # start each request from the same empty state.
+        cache.clear()
+        self.client.force_authenticate(user)
+        with self.assertNumQueries(queries):
+            response = getattr(self.client, method)(url, data, format='json')
+        self.assertLess(response.status_code, 300, response.content)
+        return response
+
+    def test_job_board(self):
+        for count in self.row_counts:
+            with self.subTest(jobs=count):
+                Job.objects.all().delete()
+                self.create_jobs(count)
+                # COUNT(*) and the page.
+                self.request('get', '/api/v1/jobs/', 2)
+                # Cursor pages skip the count.
+                self.request('get', '/api/v1/jobs/?pagination=cursor', 1)
+                # Warming the user's saved/applied state reads bookmarks and applications.
+                self.request('get', '/api/v1/jobs/', 4, user=self.candidate)
+
+    def test_job_detail(self):
+        job = self.create_jobs(1)[0]
+        self.request('get', f'/api/v1/jobs/{job.pk}/', 1)
+
+    def test_employer_jobs(self):
+        for count in self.row_counts:
+            with self.subTest(jobs=count):
+                Job.objects.all().delete()
+                self.create_jobs(count)
+                # COUNT(*), the page, then the user's saved/applied state.
+                self.request('get', '/api/v1/jobs/my-jobs/', 4, user=self.employer)
+
+    def test_bookmarked_jobs(self):
+        for count in self.row_counts:
+            with self.subTest(jobs=count):
+                Job.objects.all().delete()
+                Bookmark.objects.bulk_create(Bookmark(job=job, user=self.candidate) for job in self.create_jobs(count))
+                # COUNT(*), the page, then the user's saved/applied state.
+                self.request('get', '/api/v1/jobs/bookmarks/', 4, user=self.candidate)
+
+    def test_job_applications(self):
+        for count in self.row_counts:
+            with self.subTest(applications=count):
+                Job.objects.all().delete()
+                job_id = self.create_applications(count)[0].job_id
+                # The job's ownership check, COUNT(*) and the page.
+                self.request('get', f'/api/v1/jobs/{job_id}/applications/', 3, user=self.employer)
+                self.request('get', f'/api/v1/jobs/{job_id}/applications/?ordering=-match_score', 3, user=self.employer)
+
+    def test_candidate_applications(self):
+        for count in self.row_counts:
+            with self.subTest(applications=count):
+                Job.objects.all().delete()
+                for job in self.create_jobs(count):
+                    Application.objects.create(job=job, candidate=self.candidate)
+                self.request('get', '/api/v1/jobs/applications/me/', 2, user=self.candidate)
+
+    def test_application_update(self):
+        application = self.create_applications(1)[0]
+        # The application with its job and candidate, the status update and
+        # the statistics counters.
+        response = self.request(
+            'patch', f'/api/v1/jobs/applications/{application.pk}/', 3,
+            user=self.employer, data={'status': Application.Status.ACCEPTED},
+        )
+        self.assertEqual(response.data['status'], Application.Status.ACCEPTED)
+
+    def test_employer_stats(self):
+        for count in self.row_counts:
+            with self.subTest(jobs=count):
+                Job.objects.all().delete()
+                self.create_jobs(count)
+                self.request('get', '/api/v1/jobs/my-jobs/stats/', 2, user=self.employer)
@@ -3,18 +3,28 @@ from .views import (
     JobListCreateView, JobDetailView, ApplyJobView, 
     JobApplicationsView, ApplicationUpdateView, 
     BookmarkJobView, BookmarkedJobsListView, 
-    CandidateApplicationsListView, EmployerJobListView
+    CandidateApplicationsListView, EmployerJobListView,
+    JobBulkImportView, EmployerJobExportView, JobApplicationsExportView,
+    ResumeUploadTargetView, ResumeDirectUploadView, RecommendedJobsView,
+    EmployerStatsView
 )
 
 urlpatterns = [
     path('', JobListCreateView.as_view(), name='job-list-create'),
     path('<int:pk>/', JobDetailView.as_view(), name='job-detail'),
+    path('recommended/', RecommendedJobsView.as_view(), name='job-recommended'),
     
     path('my-jobs/', EmployerJobListView.as_view(), name='employer-job-list'),
+    path('my-jobs/import/', JobBulkImportView.as_view(), name='employer-job-import'),
+    path('my-jobs/export/', EmployerJobExportView.as_view(), name='employer-job-export'),
+    path('my-jobs/stats/', EmployerStatsView.as_view(), name='employer-job-stats'),
     path('<int:pk>/apply/', ApplyJobView.as_view(), name='apply-job'), # Apply to a specific job
     path('<int:pk>/applications/', JobApplicationsView.as_view(), name='job-applications'),
+    path('<int:pk>/applications/export/', JobApplicationsExportView.as_view(), name='job-applications-export'),
     path('applications/<int:pk>/', ApplicationUpdateView.as_view(), name='update-application'),
     path('<int:pk>/bookmark/', BookmarkJobView.as_view(), name='job-bookmark'),
     path('bookmarks/', BookmarkedJobsListView.as_view(), name='bookmarked-jobs-list'),
     path('applications/me/', CandidateApplicationsListView.as_view(), name='my-applications'),
+    path('resumes/uploads/', ResumeUploadTargetView.as_view(), name='resume-upload-target'),
+    path('resumes/uploads/<str:token>/', ResumeDirectUploadView.as_view(), name='resume-direct-upload'),
 ]
\ No newline at end of file
@@ -0,0 +1,151 @@
+"""
+Per-user "saved" and "applied" job state for decorating job lists.
+
+Each user has one Redis set holding `b:<job id>` for bookmarked jobs,
+`a:<job id>` for applied jobs and a `*` marker that says the set has been
+warmed from the database. A page of jobs is decorated with a single
+SMISMEMBER. The set is warmed on login (and lazily on a miss), updated
+by the write paths, and dropped when a change cannot be applied
+precisely. If Redis is unavailable the flags come from the database.
+
+Writes only patch a warmed set; otherwise they just touch the key, so a
+warm() that read the database before the change (it WATCHes the key)
+reads it again instead of caching the older state.
+"""
+import logging
+
+from django.conf import settings
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError, WatchError
+
+from talent_bridge.metrics import record_cache
+from .models import Application, Bookmark
+
+logger = logging.getLogger(__name__)
+
+STATE_KEY = 'jobs:user-state:{}'
+WARM_MARKER = '*'
+BOOKMARKED = 'b:{}'
+APPLIED = 'a:{}'
+WARM_ATTEMPTS = 3
+
+# KEYS[1]: the user's set. ARGV: the warm marker, how many members to add,
+# the members to add, then the members to remove.
+UPDATE_SCRIPT = """
+if redis.call('SISMEMBER', KEYS[1], ARGV[1]) == 0 then
+    -- Not warmed: write nothing that could outlive the TTL, but modify
+    -- the key so a warm() in progress retries.
+    redis.call('SADD', KEYS[1], ARGV[1])
+    redis.call('DEL', KEYS[1])
+    return 0
+end
+local added = tonumber(ARGV[2])
+if added > 0 then
+    redis.call('SADD', KEYS[1], unpack(ARGV, 3, 2 + added))
+end
+if #ARGV > 2 + added then
+    redis.call('SREM', KEYS[1], unpack(ARGV, 3 + added))
+end
+return 1
+"""
+
+
+def _redis():
+    return get_redis_connection('default')
+
+
+def _load(user_id):
+    bookmarked = set(Bookmark.objects.filter(user_id=user_id).values_list('job_id', flat=True))
+    applied = set(Application.objects.filter(candidate_id=user_id).values_list('job_id', flat=True))
+    return bookmarked, applied
+
+
+def warm(user_id):
+    """Loads the user's bookmarks and applications into Redis. Returns them."""
+    key = STATE_KEY.format(user_id)
+    loaded = None
+    try:
+        with _redis().pipeline(transaction=True) as pipe:
+            for _ in range(WARM_ATTEMPTS):
+                pipe.watch(key)
+                loaded = bookmarked, applied = _load(user_id)
+                members = [WARM_MARKER]
+                members += [BOOKMARKED.format(job_id) for job_id in bookmarked]
+                members += [APPLIED.format(job_id) for job_id in applied]
+                pipe.multi()
+                pipe.delete(key)
+                pipe.sadd(key, *members)
+                pipe.expire(key, settings.USER_JOB_STATE_TTL)
+                try:
+                    pipe.execute()
+                    break
+                except WatchError:
+                    # Written to while loading; what was read may be stale.
+                    loaded = None
+    except RedisError:
+        logger.warning("Could not warm job state for user %s", user_id, exc_info=True)
+    return loaded or _load(user_id)
+
+
+def lookup(user_id, job_ids):
+    """Returns `(bookmarked ids, applied ids)` among `job_ids` for the user."""
+    job_ids = list(job_ids)
+    if not job_ids:
+        return set(), set()
+
+    members = [WARM_MARKER]
+    members += [BOOKMARKED.format(job_id) for job_id in job_ids]
+    members += [APPLIED.format(job_id) for job_id in job_ids]
+    try:
+        flags = _redis().smismember(STATE_KEY.format(user_id), members)
+    except RedisError:
+        logger.warning("Job state lookup failed for user %s, using the database", user_id, exc_info=True)
+        record_cache(hit=False)
+        return (
+            set(Bookmark.objects.filter(user_id=user_id, job_id__in=job_ids).values_list('job_id', flat=True)),
+            set(Application.objects.filter(candidate_id=user_id, job_id__in=job_ids).values_list('job_id', flat=True)),
+        )
+
+    record_cache(hit=bool(flags[0]))
+    if not flags[0]:
+        bookmarked, applied = warm(user_id)
+        return bookmarked.intersection(job_ids), applied.intersection(job_ids)
+
+    count = len(job_ids)
+    bookmarked = {job_id for job_id, flag in zip(job_ids, flags[1:count + 1]) if flag}
+    applied = {job_id for job_id, flag in zip(job_ids, flags[count + 1:]) if flag}
+    return bookmarked, applied
+
+
+def _update(user_id, add=(), remove=()):
+    key = STATE_KEY.format(user_id)
+    try:
+        _redis().register_script(UPDATE_SCRIPT)(keys=[key], args=[WARM_MARKER, len(add), *add, *remove])
+    except RedisError:
+        # A stale set would keep showing the wrong badge, so try to drop it.
+        logger.warning("Could not update job state for user %s", user_id, exc_info=True)
+        forget(user_id)
+
+
+def bookmark_added(user_id, job_id):
+    _update(user_id, add=[BOOKMARKED.format(job_id)])
+
+
+def bookmark_removed(user_id, job_id):
+    _update(user_id, remove=[BOOKMARKED.format(job_id)])
+
+
+def application_added(user_id, job_id):
+    _update(user_id, add=[APPLIED.format(job_id)])
+
+
+def application_removed(user_id, job_id):
+    _update(user_id, remove=[APPLIED.format(job_id)])
+
+
+def forget(user_id):
+    """Drops the user's set; the next lookup warms it again."""
+    try:
+        _redis().delete(STATE_KEY.format(user_id))
+    except RedisError:
+        logger.warning("Could not drop job state for user %s", user_id, exc_info=True)
@@ -1,86 +1,339 @@
 from rest_framework import generics, status, permissions, parsers, filters
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
-from .models import Job, Application
-from .serializers import JobSerializer, ApplicationSerializer, CandidateApplicationSerializer
+from .models import Job, Application, Bookmark
+from .serializers import JobSerializer, CompactJobSerializer, ApplicationSerializer, CandidateApplicationSerializer
 from .permissions import IsEmployerOrReadOnly, IsOwnerOrReadOnly
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import NotFound, ValidationError, UnsupportedMediaType
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.core.cache import cache
+from django.core.files import File
+from django.conf import settings
+import hashlib
+import os
+import tempfile
 from django_filters.rest_framework import DjangoFilterBackend
-from .tasks import send_application_notification
+from . import outbox, user_state
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from .filters import JobFilter
+from .search import JobSearchFilter
+from .pagination import ListingPagination
+from .cache import CachedResponseMixin, bump_generation
+from .fast_serializers import FastCandidateApplicationSerializer, FastJobSerializer, FastListMixin
+from .storage import consume_upload_token, create_upload_target, resume_storage
+from .recommendations import mark_dirty, recommend
+from .statistics import create_statistics, employer_dashboard
+from .streaming import (
+    CSV_CONTENT_TYPES, NDJSON_CONTENT_TYPES, chunked, csv_response, ndjson_response,
+    read_csv_rows, read_ndjson_rows,
+)
 
-class JobListCreateView(generics.ListCreateAPIView):
-    queryset = Job.objects.select_related('employer').filter(is_active=True).order_by('-created_at')
+def get_employer_job(job_id, user):
+    """Fetches a job, making sure it belongs to the requesting employer."""
+    job = generics.get_object_or_404(Job, pk=job_id)
+
+    if job.employer_id != user.id:
+        raise ValidationError("You do not have permission to view these applications.")
+
+    return job
+
+class JobListCreateView(CachedResponseMixin, FastListMixin, generics.ListCreateAPIView):
+    """
+    GET: The public job board, as compact cards (CompactJobSerializer).
+    `?fields=` narrows both the payload and the columns read.
+    POST: Create a job as the logged-in employer.
+    """
+    queryset = Job.objects.select_related('employer').filter(is_active=True).order_by('-created_at', '-id')
 
     serializer_class = JobSerializer
+    fast_serializer_class = FastJobSerializer
+    pagination_class = ListingPagination
     permission_classes = [IsAuthenticatedOrReadOnly, IsEmployerOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, JobSearchFilter, filters.OrderingFilter]
     filterset_class = JobFilter 
     search_fields = ['title', 'description', 'requirements', 'company_name']
     ordering_fields = ['created_at', 'salary']
+    cache_query_params = [
+        *JobFilter.base_filters, 'search', 'ordering', 'page', 'pagination', 'cursor', 'fields',
+    ]
+
+    def get_serializer_class(self):
+        if self.request.method == 'GET':
+            return CompactJobSerializer
+        return JobSerializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method == 'GET':
+            queryset = CompactJobSerializer.optimize_queryset(queryset, self.request)
+        return queryset
 
     def perform_create(self, serializer):
         serializer.save(employer=self.request.user)
 
-class JobDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Job.objects.all()
+class JobDetailView(CachedResponseMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Job.objects.select_related('employer')
     serializer_class = JobSerializer
     permission_classes = [IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
+    scored_fields = ('title', 'description', 'requirements')
+    cache_query_params = ['fields']
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method == 'GET':
+            queryset = JobSerializer.optimize_queryset(queryset, self.request)
+        return queryset
+
+    def perform_update(self, serializer):
+        before = [getattr(serializer.instance, field) for field in self.scored_fields]
+        job = serializer.save()
+
+        # Applicants are rescored by score_pending_applications.
+        if before != [getattr(job, field) for field in self.scored_fields]:
+            Application.objects.filter(job=job).update(match_score=None)
+
+class RecommendedJobsView(APIView):
+    """
+    GET: Jobs recommended for the logged-in user, best first, from the
+    precomputed recommendation index. `?limit=` caps the list (default 20,
+    max 50). Users with no history get the most popular jobs, and everyone
+    gets the newest ones while Redis is unavailable.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    default_limit = 20
+    max_limit = 50
+
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            raise ValidationError({'limit': "Must be an integer."})
+        limit = max(1, min(limit, self.max_limit))
+
+        jobs = recommend(request.user, limit)
+        return Response(JobSerializer(jobs, many=True, context={'request': request}).data)
 
 class ApplyJobView(generics.CreateAPIView):
+    """
+    POST: Apply to a job as the logged-in candidate.
+
+    The resume is normally uploaded beforehand through ResumeUploadTargetView
+    and referenced here by `resume_key`; validation and text extraction run
+    in the background. Duplicate applications are caught by the
+    (job, candidate) unique constraint rather than a separate existence
+    check. Clients may send an `Idempotency-Key` header; a retry with the
+    same key replays the stored response without touching the database,
+    and one sent while the first request is still running gets a 409.
+    """
     serializer_class = ApplicationSerializer
     permission_classes = [permissions.IsAuthenticated]
-    parser_classes = [parsers.MultiPartParser, parsers.FormParser]
+    parser_classes = [parsers.JSONParser, parsers.MultiPartParser, parsers.FormParser]
     queryset = Application.objects.none()
-    
+    idempotency_timeout = 60 * 60 * 24
+    # How long a key stays reserved by a request that is still running.
+    idempotency_lock_timeout = 60
+    in_progress = 'in-progress'
+
+    def create(self, request, *args, **kwargs):
+        idempotency_key = request.headers.get('Idempotency-Key')
+        if not idempotency_key:
+            return super().create(request, *args, **kwargs)
+
+        cache_key = 'jobs:apply:idempotency:%s' % hashlib.sha256(
+            f"{request.user.pk}:{kwargs.get('pk')}:{idempotency_key}".encode()
+        ).hexdigest()
+        # Reserve the key first, so concurrent retries cannot both do the work.
+        if not cache.add(cache_key, self.in_progress, self.idempotency_lock_timeout):
+            replay = cache.get(cache_key)
+            if replay == self.in_progress:
+                return Response(
+                    {"detail": "A request with this Idempotency-Key is still being processed."},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            if replay is not None:
+                return Response(replay, status=status.HTTP_201_CREATED)
+
+        try:
+            response = super().create(request, *args, **kwargs)
+        except Exception:
+            cache.delete(cache_key)
+            raise
+        cache.set(cache_key, dict(response.data), self.idempotency_timeout)
+        return response
+
     def perform_create(self, serializer):
-        job_id = self.kwargs.get('pk')
-        job = generics.get_object_or_404(Job, pk=job_id)
-        
         if not self.request.user.is_candidate:
             raise ValidationError("Only candidates can apply for jobs.")
 
-        if Application.objects.filter(job=job, candidate=self.request.user).exists():
-            raise ValidationError("You have already applied for this job.")
+        # One query for everything the application and notification need.
+        job = generics.get_object_or_404(
+            Job.objects.select_related('employer').only('id', 'title', 'employer__email'),
+            pk=self.kwargs.get('pk'),
+        )
+
+        # The notification is recorded alongside the application and delivered
+        # by the outbox relay, keeping the broker off the request path.
+        try:
+            with transaction.atomic():
+                application = serializer.save(candidate=self.request.user, job=job, status='PENDING')
+                outbox.emit(
+                    'application.created',
+                    application_id=application.pk,
+                    employer_email=job.employer.email,
+                    job_title=job.title,
+                    candidate_email=self.request.user.email,
+                )
+                if application.resume:
+                    outbox.emit('application.resume_attached', application_id=application.pk)
+        except IntegrityError:
+            # Any other constraint, or the job being deleted meanwhile, is not a duplicate.
+            if Application.objects.filter(job_id=job.pk, candidate=self.request.user).exists():
+                raise ValidationError("You have already applied for this job.")
+            if not Job.objects.filter(pk=job.pk).exists():
+                raise NotFound()
+            raise
+
+class ResumeUploadTargetView(APIView):
+    """
+    POST: Reserve a storage key for a resume and get a short-lived URL to PUT
+    the file to. Pass the returned `key` as `resume_key` when applying.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        if not request.user.is_candidate:
+            raise ValidationError("Only candidates can upload resumes.")
+
+        filename = str(request.data.get('filename', '')).strip()
+        extension = os.path.splitext(filename)[1].lower()
+        if extension not in settings.RESUME_ALLOWED_EXTENSIONS:
+            raise ValidationError({'filename': f"Allowed file types: {', '.join(settings.RESUME_ALLOWED_EXTENSIONS)}."})
 
-        serializer.save(candidate=self.request.user, job=job, status='PENDING')
-        
         try:
-            send_application_notification.delay(
-                job.employer.email, 
-                job.title, 
-                self.request.user.email
-            )
-        except Exception as e:
-            print(f"Notification failed but application was saved: {e}")
+            size = int(request.data.get('size', 0))
+        except (TypeError, ValueError):
+            raise ValidationError({'size': "Must be an integer."})
+        if size > settings.RESUME_MAX_UPLOAD_SIZE:
+            raise ValidationError({'size': "Resume exceeds the maximum upload size."})
+
+        return Response(create_upload_target(request, request.user, filename), status=status.HTTP_201_CREATED)
+
+
+class ResumeDirectUploadView(APIView):
+    """
+    PUT: Local stand-in for a presigned storage URL, used when resumes are
+    not kept in a bucket. The signed token in the URL authorizes one upload
+    to a key that does not exist yet; a processed resume is never replaced.
+    """
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+    chunk_size = 64 * 1024
+
+    def put(self, request, token):
+        key = consume_upload_token(token)
+        if key is None:
+            raise ValidationError("Upload link is invalid, has expired or has already been used.")
+
+        limit = settings.RESUME_MAX_UPLOAD_SIZE
+        stream = request.stream
+        with tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as buffer:
+            size = 0
+            while stream is not None and (chunk := stream.read(self.chunk_size)):
+                size += len(chunk)
+                if size > limit:
+                    raise ValidationError("Resume exceeds the maximum upload size.")
+                buffer.write(chunk)
+
+            if not size:
+                raise ValidationError("Upload body is empty.")
+
+            buffer.seek(0)
+            storage = resume_storage()
+            if storage.exists(key):
+                raise ValidationError("A file has already been uploaded to this link.")
+            storage.save(key, File(buffer))
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
 
 class JobApplicationsView(generics.ListAPIView):
+    """
+    GET: List the applications for one of the employer's jobs, newest first,
+    or best fit first with `?ordering=-match_score` (page-number pagination
+    only; unscored applications come last).
+    """
     serializer_class = ApplicationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ListingPagination
 
     def get_queryset(self):
 
         if getattr(self, 'swagger_fake_view', False):
             return Application.objects.none()
         
-        job_id = self.kwargs.get('pk')
-        job = generics.get_object_or_404(Job, pk=job_id)
+        job = get_employer_job(self.kwargs.get('pk'), self.request.user)
+        queryset = Application.objects.filter(job=job).select_related('candidate', 'job')
+
+        if self.request.query_params.get('ordering') == '-match_score':
+            return queryset.order_by(F('match_score').desc(nulls_last=True), '-id')
+        return queryset.order_by('-created_at', '-id')
+
 
-        if job.employer != self.request.user:
-            raise ValidationError("You do not have permission to view these applications.")
+class JobApplicationsExportView(APIView):
+    """
+    GET: Stream every application for one of the employer's jobs as CSV
+    (default) or NDJSON (`?export_format=ndjson`), joined with the candidate
+    and their profile in a single query.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    columns = [
+        ('id', 'id'),
+        ('status', 'status'),
+        ('created_at', 'created_at'),
+        ('candidate_email', 'candidate__email'),
+        ('first_name', 'candidate__first_name'),
+        ('last_name', 'candidate__last_name'),
+        ('title', 'candidate__candidate_profile__title'),
+        ('skills', 'candidate__candidate_profile__skills'),
+        ('resume_url', 'candidate__candidate_profile__resume_url'),
+        ('github_url', 'candidate__candidate_profile__github_url'),
+        ('linkedin_url', 'candidate__candidate_profile__linkedin_url'),
+        ('resume', 'resume'),
+        ('cover_letter', 'cover_letter'),
+    ]
+    chunk_size = 2000
 
-        return Application.objects.filter(job=job).order_by('-created_at')
+    def get(self, request, pk):
+        job = get_employer_job(pk, request.user)
+        names = [name for name, _ in self.columns]
+        lookups = [lookup for _, lookup in self.columns]
+        resume_index = names.index('resume')
+        storage = Application._meta.get_field('resume').storage
+
+        def rows():
+            queryset = Application.objects.filter(job=job).order_by('id').values_list(*lookups)
+            for row in queryset.iterator(chunk_size=self.chunk_size):
+                row = list(row)
+                if row[resume_index]:
+                    row[resume_index] = request.build_absolute_uri(storage.url(row[resume_index]))
+                yield row
+
+        filename = f'job-{job.pk}-applications'
+        if request.query_params.get('export_format') == 'ndjson':
+            return ndjson_response(filename, (dict(zip(names, row)) for row in rows()))
+        return csv_response(filename, names, rows())
     
 class ApplicationUpdateView(generics.UpdateAPIView):
-    queryset = Application.objects.all()
+    # The response reads candidate.email and job.title.
+    queryset = Application.objects.select_related('candidate', 'job')
     serializer_class = ApplicationSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def perform_update(self, serializer):
-        application = self.get_object()
+        application = serializer.instance
         
-        if application.job.employer != self.request.user:
+        if application.job.employer_id != self.request.user.id:
             raise ValidationError("You cannot change the status of this application.")
         
         new_status = serializer.validated_data.get('status')
@@ -92,35 +345,61 @@ class ApplicationUpdateView(generics.UpdateAPIView):
 class BookmarkJobView(APIView):
     """
     POST: Toggle a bookmark on a job for the logged-in user.
+
+    Deletes the user's bookmark row if there is one, otherwise inserts it;
+    the (job, user) unique index settles concurrent toggles. Job.bookmark_count
+    is adjusted in the same transaction (on delete by jobs.signals).
     """
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, pk):
-        job = generics.get_object_or_404(Job, pk=pk)
-        
-        if request.user in job.bookmarks.all():
-            job.bookmarks.remove(request.user)
+        with transaction.atomic():
+            removed, _ = Bookmark.objects.filter(job_id=pk, user=request.user).delete()
+
+        if removed:
+            mark_dirty([pk])
+            user_state.bookmark_removed(request.user.pk, pk)
             return Response({"message": "Bookmark removed"}, status=status.HTTP_200_OK)
-        else:
-            job.bookmarks.add(request.user)
-            return Response({"message": "Job bookmarked"}, status=status.HTTP_201_CREATED)
+
+        try:
+            with transaction.atomic():
+                if not Job.objects.filter(pk=pk).update(bookmark_count=F('bookmark_count') + 1):
+                    raise NotFound()
+                Bookmark.objects.create(job_id=pk, user=request.user)
+        except IntegrityError:
+            # A concurrent request bookmarked it first.
+            pass
+        mark_dirty([pk])
+        user_state.bookmark_added(request.user.pk, pk)
+        return Response({"message": "Job bookmarked"}, status=status.HTTP_201_CREATED)
         
 class BookmarkedJobsListView(generics.ListAPIView):
     """
-    GET: List all jobs bookmarked by the logged-in candidate.
+    GET: List all jobs bookmarked by the logged-in candidate, most recently
+    bookmarked first.
     """
     serializer_class = JobSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return self.request.user.bookmarked_jobs.all()
+        return (
+            Job.objects.filter(bookmark__user=self.request.user)
+            .select_related('employer')
+            .order_by('-bookmark__created_at')
+        )
     
-class CandidateApplicationsListView(generics.ListAPIView):
+class CandidateApplicationsListView(FastListMixin, generics.ListAPIView):
     serializer_class = CandidateApplicationSerializer
+    fast_serializer_class = FastCandidateApplicationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ListingPagination
 
     def get_queryset(self):
-        return Application.objects.filter(candidate=self.request.user).order_by('-created_at')
+        return (
+            Application.objects.filter(candidate=self.request.user)
+            .select_related('job')
+            .order_by('-created_at', '-id')
+        )
     
 class EmployerJobListView(generics.ListAPIView):
     """
@@ -129,6 +408,106 @@ class EmployerJobListView(generics.ListAPIView):
     """
     serializer_class = JobSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ListingPagination
 
     def get_queryset(self):
-        return Job.objects.filter(employer=self.request.user).order_by('-created_at')
+        return Job.objects.select_related('employer').filter(employer=self.request.user).order_by('-created_at', '-id')
+
+
+class EmployerStatsView(APIView):
+    """
+    GET: Dashboard statistics for the logged-in employer: per-job application
+    counts by status and bookmark counts, their totals, and applications
+    received per day over the last `?days=` days (default 30, max 365).
+    Read from the summary tables maintained by jobs.signals.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsEmployerOrReadOnly]
+    default_days = 30
+    max_days = 365
+
+    def get(self, request):
+        try:
+            days = int(request.query_params.get('days', self.default_days))
+        except ValueError:
+            raise ValidationError({'days': "Must be an integer."})
+        days = max(1, min(days, self.max_days))
+
+        return Response(employer_dashboard(request.user, days))
+
+
+class JobBulkImportView(APIView):
+    """
+    POST: Create many jobs from a streamed CSV (text/csv) or NDJSON
+    (application/x-ndjson) body. Rows are validated with JobSerializer in
+    chunks and inserted with bulk_create; invalid rows are reported back by
+    line number and skipped.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsEmployerOrReadOnly]
+    chunk_size = 500
+    max_reported_errors = 1000
+
+    def post(self, request):
+        content_type = request.content_type.split(';')[0].strip().lower()
+        if content_type in CSV_CONTENT_TYPES:
+            rows = read_csv_rows(request)
+        elif content_type in NDJSON_CONTENT_TYPES:
+            rows = read_ndjson_rows(request)
+        else:
+            raise UnsupportedMediaType(content_type)
+
+        # Looked up once for the whole import instead of once per row.
+        profile = getattr(request.user, 'employer_profile', None)
+        default_company = getattr(profile, 'company_name', None) or ''
+
+        created, errors, error_count = 0, [], 0
+        for chunk in chunked(rows, self.chunk_size):
+            jobs = []
+            for line, row in chunk:
+                serializer = JobSerializer(data=row) if isinstance(row, dict) else None
+                if serializer is not None and serializer.is_valid():
+                    data = serializer.validated_data
+                    data.setdefault('company_name', default_company)
+                    jobs.append(Job(employer=request.user, **data))
+                    continue
+
+                error_count += 1
+                if len(errors) < self.max_reported_errors:
+                    detail = serializer.errors if serializer is not None else {'non_field_errors': ['Expected a JSON object.']}
+                    errors.append({'line': line, 'errors': detail})
+
+            with transaction.atomic():
+                Job.objects.bulk_create(jobs, batch_size=self.chunk_size)
+                create_statistics(jobs)
+            created += len(jobs)
+
+        if created:
+            # bulk_create bypasses post_save, so invalidate the job board here.
+            bump_generation()
+
+        return Response(
+            {'created': created, 'failed': error_count, 'errors': errors},
+            status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST,
+        )
+
+
+class EmployerJobExportView(APIView):
+    """
+    GET: Stream every job posted by the logged-in employer as CSV
+    (default) or NDJSON (`?export_format=ndjson`).
+    """
+    permission_classes = [permissions.IsAuthenticated, IsEmployerOrReadOnly]
+    fields = [
+        'id', 'title', 'company_name', 'location', 'job_type', 'remote_status',
+        'experience_level', 'salary_range', 'salary', 'description', 'requirements',
+        'is_active', 'deadline', 'created_at', 'applications_count',
+    ]
+    chunk_size = 2000
+
+    def get(self, request):
+        queryset = Job.objects.filter(employer=request.user).order_by('id')
+        if request.query_params.get('export_format') == 'ndjson':
+            rows = queryset.values(*self.fields).iterator(chunk_size=self.chunk_size)
+            return ndjson_response('jobs', rows)
+
+        rows = queryset.values_list(*self.fields).iterator(chunk_size=self.chunk_size)
+        return csv_response('jobs', self.fields, rows)
@@ -0,0 +1,226 @@
+"""
+Request metrics (see talent_bridge.middleware.RequestMetricsMiddleware).
+
+Every request is counted in the latency histogram. A sampled share of them
+(METRICS_SAMPLE_RATE) is also measured in detail: SQL queries and their
+time, cache hits and misses, serializer time and response size.
+
+Each process aggregates in memory, and a background thread adds its counts
+to one Redis hash every METRICS_FLUSH_INTERVAL seconds, so all workers
+report together and a request never waits on Redis. Fields of the hash are Prometheus sample
+names and `render()` turns the hash into the text exposition format for
+the /metrics endpoint.
+"""
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+METRICS_KEY = 'metrics:samples'
+PREFIX = 'talentbridge_'
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+# name: (type, help, buckets)
+METRICS = {
+    'http_requests_total': ('counter', "HTTP requests by view, method and status.", None),
+    'http_request_duration_seconds': ('histogram', "Time to produce the response.", SECONDS_BUCKETS),
+    'http_request_db_seconds': ('histogram', "SQL time per sampled request.", SECONDS_BUCKETS),
+    'http_request_queries': ('histogram', "SQL queries per sampled request.", QUERY_BUCKETS),
+    'http_request_serializer_seconds': ('histogram', "Serializer time per sampled request.", SECONDS_BUCKETS),
+    'http_response_size_bytes': ('histogram', "Response body size of sampled requests.", SIZE_BUCKETS),
+    'cache_requests_total': ('counter', "Cache lookups in sampled requests by result.", None),
+}
+
+
+class RequestMetrics:
+    """What a sampled request spent its time on."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.timers = defaultdict(float)
+        self._running = set()
+
+    def record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - start
+            self.queries += 1
+
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+def start_request():
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+@contextmanager
+def timer(name):
+    """
+    Adds the time spent in the block to the current sampled request's
+    `name` timer. Nested blocks for the same timer count once.
+    """
+    metrics = _current.get()
+    if metrics is None or name in metrics._running:
+        yield
+        return
+
+    metrics._running.add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.timers[name] += time.perf_counter() - start
+        metrics._running.discard(name)
+
+
+def record_cache(hit):
+    metrics = _current.get()
+    if metrics is not None:
+        if hit:
+            metrics.cache_hits += 1
+        else:
+            metrics.cache_misses += 1
+
+
+class TimedSerializerMixin:
+    """Counts a serializer's to_representation() towards the `serializer` timer."""
+
+    def to_representation(self, instance):
+        with timer('serializer'):
+            return super().to_representation(instance)
+
+
+def _labels(**labels):
+    return ','.join(f'{name}="{value}"' for name, value in labels.items())
+
+
+class Aggregator:
+    """This process's counts since the last flush."""
+
+    def __init__(self):
+        self.samples = defaultdict(float)
+        self.lock = threading.Lock()
+        # The process the flush thread runs in; a forked worker starts its own.
+        self.flusher_pid = None
+
+    def increment(self, name, amount=1, **labels):
+        with self.lock:
+            self.samples[f'{PREFIX}{name}{{{_labels(**labels)}}}'] += amount
+
+    def observe(self, name, value, **labels):
+        buckets = METRICS[name][2]
+        label_text = _labels(**labels)
+        with self.lock:
+            for bound in buckets:
+                if value <= bound:
+                    self.samples[f'{PREFIX}{name}_bucket{{{label_text},le="{bound}"}}'] += 1
+            self.samples[f'{PREFIX}{name}_bucket{{{label_text},le="+Inf"}}'] += 1
+            self.samples[f'{PREFIX}{name}_sum{{{label_text}}}'] += value
+            self.samples[f'{PREFIX}{name}_count{{{label_text}}}'] += 1
+
+    def start(self):
+        """Starts this process's flush thread unless it is running."""
+        if self.flusher_pid == os.getpid():
+            return
+        with self.lock:
+            if self.flusher_pid == os.getpid():
+                return
+            self.flusher_pid = os.getpid()
+        threading.Thread(target=self._flush_periodically, name='metrics-flush', daemon=True).start()
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(settings.METRICS_FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Metrics flush failed")
+
+    def flush(self):
+        with self.lock:
+            samples, self.samples = self.samples, defaultdict(float)
+        if not samples:
+            return
+        try:
+            pipe = get_redis_connection('default').pipeline(transaction=False)
+            for field, amount in samples.items():
+                pipe.hincrbyfloat(METRICS_KEY, field, amount)
+            pipe.execute()
+        except RedisError:
+            # Dropped rather than kept, so an outage cannot grow the buffer.
+            logger.warning("Could not flush %s metric samples", len(samples), exc_info=True)
+
+
+aggregator = Aggregator()
+
+
+def record_request(view, method, status, duration, metrics=None, response_size=None):
+    aggregator.increment('http_requests_total', view=view, method=method, status=status)
+    aggregator.observe('http_request_duration_seconds', duration, view=view, method=method)
+    if metrics is not None:
+        aggregator.observe('http_request_db_seconds', metrics.db_seconds, view=view)
+        aggregator.observe('http_request_queries', metrics.queries, view=view)
+        aggregator.observe('http_request_serializer_seconds', metrics.timers['serializer'], view=view)
+        if response_size is not None:
+            aggregator.observe('http_response_size_bytes', response_size, view=view)
+        if metrics.cache_hits:
+            aggregator.increment('cache_requests_total', metrics.cache_hits, view=view, result='hit')
+        if metrics.cache_misses:
+            aggregator.increment('cache_requests_total', metrics.cache_misses, view=view, result='miss')
+    aggregator.start()
+
+
+def _sort_key(field):
+    # Buckets in increasing `le` order, +Inf last.
+    head, _, le = field.partition(',le="')
+    return head, float(le.rstrip('"}').replace('+Inf', 'inf')) if le else 0.0
+
+
+def _base_name(field):
+    name = field.split('{', 1)[0].removeprefix(PREFIX)
+    for suffix in ('_bucket', '_sum', '_count'):
+        if name.endswith(suffix) and name.removesuffix(suffix) in METRICS:
+            return name.removesuffix(suffix)
+    return name
+
+
+def render():
+    """All workers' metrics in the Prometheus text exposition format."""
+    aggregator.flush()
+    samples = get_redis_connection('default').hgetall(METRICS_KEY)
+
+    by_metric = defaultdict(list)
+    for field, value in samples.items():
+        field = field.decode()
+        by_metric[_base_name(field)].append((field, float(value)))
+
+    lines = []
+    for name in sorted(by_metric):
+        kind, help_text = METRICS.get(name, ('untyped', '', None))[:2]
+        lines.append(f'# HELP {PREFIX}{name} {help_text}')
+        lines.append(f'# TYPE {PREFIX}{name} {kind}')
+        lines.extend(f'{field} {value}' for field, value in sorted(by_metric[name], key=lambda item: _sort_key(item[0])))
+    return '\n'.join(lines) + '\n'
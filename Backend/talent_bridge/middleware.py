@@ -0,0 +1,114 @@
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import metrics
+from .query_inspection import inspect_queries, log_report
+
+logger = logging.getLogger('talent_bridge.requests')
+
+
+class RequestMetricsMiddleware:
+    """
+    Records every request's latency and status in talent_bridge.metrics.
+
+    A METRICS_SAMPLE_RATE share of requests is measured in detail: their
+    SQL queries (through a database execute wrapper), cache hits and
+    misses, serializer time and response size. Sampled requests are logged
+    as one structured line, and they get a `Server-Timing` header when
+    METRICS_SERVER_TIMING is on.
+    """
+    excluded_paths = ('/metrics/', '/health/')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.path in self.excluded_paths:
+            return self.get_response(request)
+
+        sampled = random.random() < settings.METRICS_SAMPLE_RATE
+        start = time.perf_counter()
+        if not sampled:
+            response = self.get_response(request)
+            metrics.record_request(view_name(request), request.method, response.status_code,
+                                   time.perf_counter() - start)
+            return response
+
+        request_metrics, token = metrics.start_request()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(request_metrics.record_query))
+                response = self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        duration = time.perf_counter() - start
+
+        size = None if response.streaming else len(response.content)
+        view = view_name(request)
+        metrics.record_request(view, request.method, response.status_code, duration, request_metrics, size)
+
+        serializer_seconds = request_metrics.timers['serializer']
+        logger.info("Request finished", extra={
+            'method': request.method,
+            'path': request.path,
+            'view': view,
+            'status_code': response.status_code,
+            'duration_ms': round(duration * 1000, 2),
+            'db_queries': request_metrics.queries,
+            'db_ms': round(request_metrics.db_seconds * 1000, 2),
+            'cache_hits': request_metrics.cache_hits,
+            'cache_misses': request_metrics.cache_misses,
+            'serializer_ms': round(serializer_seconds * 1000, 2),
+            'response_bytes': size,
+        })
+
+        if settings.METRICS_SERVER_TIMING:
+            response['Server-Timing'] = ', '.join([
+                f'total;dur={duration * 1000:.1f}',
+                f'db;dur={request_metrics.db_seconds * 1000:.1f};desc="{request_metrics.queries} queries"',
+                f'cache;desc="{request_metrics.cache_hits} hits, {request_metrics.cache_misses} misses"',
+                f'serializer;dur={serializer_seconds * 1000:.1f}',
+            ])
+        return response
+
+
+def view_name(request):
+    # The URL name rather than the path, so the label set stays bounded.
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match.route
+
+
+class QueryInspectionMiddleware:
+    """
+    Logs repeated (N+1) and slow queries per request, attributed to the
+    code that ran them (see talent_bridge.query_inspection). Only loaded
+    when QUERY_INSPECTION is on. With DEBUG, the findings are also
+    summarized in an `X-Query-Inspection` response header.
+    """
+
+    def __init__(self, get_response):
+        if not settings.QUERY_INSPECTION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with inspect_queries() as inspector:
+            response = self.get_response(request)
+
+        report = inspector.report()
+        log_report(f'{request.method} {view_name(request)}', report)
+        if settings.DEBUG:
+            response['X-Query-Inspection'] = (
+                f"repeated={sum(finding['count'] for finding in report['repeated_queries'])}, "
+                f"slow={len(report['slow_queries'])}"
+            )
+        return response
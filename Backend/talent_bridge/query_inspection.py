@@ -0,0 +1,132 @@
+"""
+Opt-in query inspection (QUERY_INSPECTION, see settings).
+
+`inspect_queries()` wraps every database connection with an execute
+wrapper for the duration of a block, typically one request. It finds:
+  - repeated queries: the same SELECT shape run QUERY_INSPECTION_REPEAT_THRESHOLD
+    or more times, the usual sign of an N+1 from a lazy relation or a
+    per-row serializer method, and
+  - slow queries: statements over QUERY_INSPECTION_SLOW_MS, with their
+    EXPLAIN plan.
+Each finding names the innermost frame in the project's own code that
+issued the query, e.g. `jobs/serializers.py:120 in get_days_ago`.
+
+Capturing a stack per query is expensive, so this is meant for
+development, CI and the benchmark suite (benchmark_api
+--fail-on-repeated-queries), not for production traffic.
+"""
+import logging
+import re
+import sys
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+# `IN (%s, %s, %s)` lists of any length have the same shape.
+PLACEHOLDER_LIST = re.compile(r'\((?:%s, )+%s\)')
+IGNORED_PATHS = ('site-packages', 'dist-packages', __file__)
+
+
+def query_shape(sql):
+    return PLACEHOLDER_LIST.sub('(%s, ...)', sql)
+
+
+def caller(project_root, limit=3):
+    """The innermost `limit` frames of project code on the current stack."""
+    frames = []
+    frame = sys._getframe(2)
+    while frame is not None and len(frames) < limit:
+        filename = frame.f_code.co_filename
+        if filename.startswith(project_root) and not any(part in filename for part in IGNORED_PATHS):
+            relative = filename[len(project_root):].lstrip('/')
+            frames.append(f'{relative}:{frame.f_lineno} in {frame.f_code.co_name}')
+        frame = frame.f_back
+    return frames
+
+
+class QueryInspector:
+    def __init__(self):
+        self.project_root = str(settings.BASE_DIR)
+        self.repeat_threshold = settings.QUERY_INSPECTION_REPEAT_THRESHOLD
+        self.slow_seconds = settings.QUERY_INSPECTION_SLOW_MS / 1000
+        self.selects = defaultdict(list)
+        self.slow = []
+        self.explaining = False
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.explaining:
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration = time.perf_counter() - start
+
+        is_select = sql.lstrip()[:6].upper() == 'SELECT'
+        if is_select:
+            self.selects[query_shape(sql)].append((duration, tuple(caller(self.project_root))))
+        if duration >= self.slow_seconds:
+            self.slow.append({
+                'sql': sql,
+                'duration_ms': round(duration * 1000, 2),
+                'location': caller(self.project_root),
+                'plan': self.explain(context['connection'], sql, params) if is_select and not many else None,
+            })
+        return result
+
+    def explain(self, connection, sql, params):
+        self.explaining = True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+                return '\n'.join(str(row[-1]) for row in cursor.fetchall())
+        except DatabaseError as exc:
+            return f'EXPLAIN failed: {exc}'
+        finally:
+            self.explaining = False
+
+    def repeated(self):
+        """Shapes run at least the repeat threshold, most frequent first."""
+        findings = []
+        for shape, runs in self.selects.items():
+            if len(runs) < self.repeat_threshold:
+                continue
+            locations = defaultdict(int)
+            for _, stack in runs:
+                locations[stack[0] if stack else 'unknown'] += 1
+            findings.append({
+                'sql': shape,
+                'count': len(runs),
+                'total_ms': round(sum(duration for duration, _ in runs) * 1000, 2),
+                'locations': dict(sorted(locations.items(), key=lambda item: -item[1])),
+                'stack': list(runs[0][1]),
+            })
+        return sorted(findings, key=lambda finding: -finding['count'])
+
+    def report(self):
+        return {'repeated_queries': self.repeated(), 'slow_queries': self.slow}
+
+
+@contextmanager
+def inspect_queries():
+    """Inspects every query run on any connection inside the block."""
+    inspector = QueryInspector()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(inspector))
+        yield inspector
+
+
+def log_report(endpoint, report):
+    for finding in report['repeated_queries']:
+        logger.warning("Repeated query in %s: %s queries of one shape", endpoint, finding['count'], extra={
+            'endpoint': endpoint, **finding,
+        })
+    for finding in report['slow_queries']:
+        logger.warning("Slow query in %s: %s ms", endpoint, finding['duration_ms'], extra={
+            'endpoint': endpoint, **finding,
+        })
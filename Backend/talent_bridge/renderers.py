@@ -0,0 +1,31 @@
+"""
+orjson-backed JSON renderer, enabled with API_FAST_JSON (see settings).
+Produces the same compact UTF-8 JSON as DRF's JSONRenderer with the
+default COMPACT_JSON/UNICODE_JSON settings, several times faster.
+"""
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class ORJSONRenderer(JSONRenderer):
+    # Inherits JSONRenderer's media type and format, so content negotiation,
+    # `?format=json` and the response cache keys are unchanged.
+    #
+    # Types orjson does not know (Decimal, lazy translations, querysets...)
+    # go through DRF's encoder, and so do datetimes, which DRF formats
+    # differently (millisecond precision, "Z" for UTC).
+    default = staticmethod(JSONEncoder().default)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.get_indent(accepted_media_type, renderer_context):
+            option |= orjson.OPT_INDENT_2
+
+        ret = orjson.dumps(data, default=self.default, option=option)
+        # Escaped like JSONRenderer does, so the output is safe inside JavaScript.
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
@@ -49,6 +49,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'django_filters',
     'django_celery_results',
     'drf_yasg',
@@ -73,6 +74,7 @@ INSTALLED_APPS = [
 SITE_ID = 1
 
 MIDDLEWARE = [
+    'talent_bridge.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -85,6 +87,7 @@ MIDDLEWARE = [
 
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'talent_bridge.middleware.QueryInspectionMiddleware',
 ]
 
 ROOT_URLCONF = 'talent_bridge.urls'
@@ -156,9 +159,20 @@ CSRF_TRUSTED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Fast response path: orjson rendering (talent_bridge.renderers) and
+# values()-based serializers for the job board and candidate application
+# lists (jobs.fast_serializers). Output is identical; compare the costs
+# with `manage.py benchmark_serializers`.
+API_FAST_JSON = os.getenv('API_FAST_JSON') == 'True'
+API_FAST_SERIALIZERS = os.getenv('API_FAST_SERIALIZERS') == 'True'
+
 REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': (
+        'talent_bridge.renderers.ORJSONRenderer' if API_FAST_JSON else 'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -185,8 +199,18 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),  
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),  
     'AUTH_HEADER_TYPES': ('Bearer',),
+    # Checks the token version and renews the role claims on refresh.
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializers.CustomTokenRefreshSerializer',
 }
 
+# users.authentication: authenticated requests read the user from a cached
+# snapshot instead of the database. With JWT_STATELESS_ROLE_CLAIMS, the
+# token's signed role claims are trusted without any lookup; password
+# changes, role changes and deactivation then apply once the access token
+# expires and is refreshed (users.serializers.CustomTokenRefreshSerializer).
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv('AUTH_USER_CACHE_TIMEOUT', 300))
+JWT_STATELESS_ROLE_CLAIMS = os.getenv('JWT_STATELESS_ROLE_CLAIMS') == 'True'
+
 SWAGGER_SETTINGS = {
     'USE_SESSION_AUTH': False,
     'SECURITY_DEFINITIONS': {
@@ -205,12 +229,83 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 
 CELERY_BEAT_SCHEDULE = {
-    'deactivate-jobs-every-hour': {
+    'deactivate-expired-jobs': {
         'task': 'jobs.tasks.deactivate_expired_jobs',
-        'schedule': 3600.0, 
+        'schedule': float(os.getenv('JOB_EXPIRY_SWEEP_INTERVAL', 3600)),
+    },
+    'relay-outbox-every-5-seconds': {
+        'task': 'jobs.tasks.relay_outbox',
+        'schedule': 5.0,
+    },
+    'prune-outbox-daily': {
+        'task': 'jobs.tasks.prune_outbox',
+        'schedule': 86400.0,
+    },
+    'flush-application-notifications-every-minute': {
+        'task': 'jobs.tasks.flush_application_notifications',
+        'schedule': 60.0,
+    },
+    'score-pending-applications-every-minute': {
+        'task': 'jobs.tasks.score_pending_applications',
+        'schedule': 60.0,
+    },
+    'refresh-recommendations-every-5-minutes': {
+        'task': 'jobs.tasks.refresh_recommendations',
+        'schedule': 300.0,
+    },
+    'rebuild-recommendations-daily': {
+        'task': 'jobs.tasks.rebuild_recommendations',
+        'schedule': 86400.0,
     },
 }
 
+# Transactional outbox relay (jobs.outbox)
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', 100))
+OUTBOX_MAX_BATCHES_PER_RUN = int(os.getenv('OUTBOX_MAX_BATCHES_PER_RUN', 50))
+OUTBOX_RETENTION_DAYS = int(os.getenv('OUTBOX_RETENTION_DAYS', 7))
+# Seconds before a failed event is retried, doubled on every further attempt.
+OUTBOX_RETRY_DELAY = int(os.getenv('OUTBOX_RETRY_DELAY', 30))
+
+# New-application emails are coalesced into one digest per employer per interval
+APPLICATION_DIGEST_INTERVAL = int(os.getenv('APPLICATION_DIGEST_INTERVAL', 300))
+APPLICATION_DIGEST_BATCH_SIZE = int(os.getenv('APPLICATION_DIGEST_BATCH_SIZE', 50))
+# Digests claimed this long ago whose send task never finished are requeued.
+# Well past send_application_digests' retries (3 x 300s).
+APPLICATION_DIGEST_REQUEUE_AFTER = int(os.getenv('APPLICATION_DIGEST_REQUEUE_AFTER', 3600))
+
+# Per-user saved/applied job sets in Redis (jobs.user_state), warmed on login
+USER_JOB_STATE_TTL = int(os.getenv('USER_JOB_STATE_TTL', 24 * 60 * 60))
+
+# Expired job sweep. The sweep is an index range scan that finds nothing
+# most of the time, so JOB_EXPIRY_SWEEP_INTERVAL=60 is cheap and closes jobs
+# within a minute of their deadline.
+JOB_EXPIRY_BATCH_SIZE = int(os.getenv('JOB_EXPIRY_BATCH_SIZE', 500))
+JOB_EXPIRY_MAX_BATCHES = int(os.getenv('JOB_EXPIRY_MAX_BATCHES', 200))
+
+# Applicant match scoring (jobs.matching): jobs rescored per beat run
+MATCH_SCORING_JOBS_PER_RUN = int(os.getenv('MATCH_SCORING_JOBS_PER_RUN', 200))
+
+# Job recommendation index (jobs.recommendations)
+RECOMMENDATION_NEIGHBORS = int(os.getenv('RECOMMENDATION_NEIGHBORS', 50))
+RECOMMENDATION_HISTORY_DAYS = int(os.getenv('RECOMMENDATION_HISTORY_DAYS', 180))
+RECOMMENDATION_REFRESH_BATCH_SIZE = int(os.getenv('RECOMMENDATION_REFRESH_BATCH_SIZE', 1000))
+# Outlives a missed daily rebuild or two
+RECOMMENDATION_INDEX_TTL = 3 * 24 * 60 * 60
+
+# Request metrics (talent_bridge.metrics): every request is counted, this
+# share is measured in detail and logged. Aggregates are scraped at /metrics/.
+METRICS_SAMPLE_RATE = float(os.getenv('METRICS_SAMPLE_RATE', 1.0 if DEBUG else 0.05))
+METRICS_FLUSH_INTERVAL = int(os.getenv('METRICS_FLUSH_INTERVAL', 10))
+METRICS_SERVER_TIMING = os.getenv('METRICS_SERVER_TIMING', str(DEBUG)) == 'True'
+# Bearer token for /metrics/, which is closed without one unless DEBUG.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# N+1 and slow query detection (talent_bridge.query_inspection). Opt-in:
+# it captures a stack per query. benchmark_api uses the thresholds too.
+QUERY_INSPECTION = os.getenv('QUERY_INSPECTION') == 'True'
+QUERY_INSPECTION_REPEAT_THRESHOLD = int(os.getenv('QUERY_INSPECTION_REPEAT_THRESHOLD', 5))
+QUERY_INSPECTION_SLOW_MS = int(os.getenv('QUERY_INSPECTION_SLOW_MS', 100))
+
 # 2. Caching Configuration
 CACHES = {
     "default": {
@@ -222,9 +317,34 @@ CACHES = {
     }
 }
 
+# Anonymous job board responses, invalidated early by jobs.cache.bump_generation.
+# Application and bookmark counts in them can lag by up to this long.
+JOB_RESPONSE_CACHE_TIMEOUT = int(os.getenv('JOB_RESPONSE_CACHE_TIMEOUT', 300))
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Resume storage: local MEDIA_ROOT by default. Set RESUME_STORAGE_BUCKET to
+# use an S3-compatible bucket (AWS, or MinIO via RESUME_STORAGE_ENDPOINT_URL).
+if os.getenv('RESUME_STORAGE_BUCKET'):
+    RESUME_STORAGE = {
+        'BACKEND': 'storages.backends.s3.S3Storage',
+        'OPTIONS': {
+            'bucket_name': os.getenv('RESUME_STORAGE_BUCKET'),
+            'endpoint_url': os.getenv('RESUME_STORAGE_ENDPOINT_URL'),
+            'file_overwrite': False,
+            'default_acl': 'private',
+        },
+    }
+else:
+    RESUME_STORAGE = {'BACKEND': 'django.core.files.storage.FileSystemStorage'}
+
+RESUME_UPLOAD_URL_EXPIRY = 15 * 60
+RESUME_MAX_UPLOAD_SIZE = 5 * 1024 * 1024
+RESUME_ALLOWED_EXTENSIONS = ['.pdf', '.docx', '.txt']
+# Dotted paths to callables(name, content) that raise jobs.resumes.ResumeRejected
+RESUME_SCAN_HOOKS = []
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -283,6 +403,7 @@ REST_AUTH = {
     'JWT_AUTH_COOKIE': 'talentbridge-auth',
     'JWT_AUTH_REFRESH_COOKIE': 'talentbridge-refresh',
     'PASSWORD_RESET_SERIALIZER': 'users.serializers.APIPasswordResetSerializer',
+    'JWT_TOKEN_CLAIMS_SERIALIZER': 'users.serializers.CustomTokenObtainPairSerializer',
 }
 
 REST_USE_JWT = True
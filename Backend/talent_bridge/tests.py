@@ -0,0 +1,74 @@
+from unittest import mock
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django_redis import get_redis_connection
+from rest_framework.renderers import JSONRenderer
+
+from . import metrics
+from .middleware import RequestMetricsMiddleware
+from .renderers import ORJSONRenderer
+from .views import metrics as metrics_view
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    def test_output_matches_the_json_renderer(self):
+        data = {'title': 'Café\u2028line\u2029paragraph', 'salary': None, 'tags': ['a', 1, 2.5, True]}
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+
+class MetricsTests(SimpleTestCase):
+    def setUp(self):
+        get_redis_connection('default').delete(metrics.METRICS_KEY)
+        aggregator = mock.patch.object(metrics, 'aggregator', metrics.Aggregator())
+        self.aggregator = aggregator.start()
+        self.addCleanup(aggregator.stop)
+        thread = mock.patch.object(metrics.threading, 'Thread')
+        self.thread = thread.start()
+        self.addCleanup(thread.stop)
+
+    def test_requests_never_flush_to_redis(self):
+        with mock.patch.object(metrics, 'get_redis_connection') as redis:
+            metrics.record_request('job-list', 'GET', 200, 0.02)
+            metrics.record_request('job-list', 'GET', 200, 0.03)
+        redis.assert_not_called()
+        # One flush thread per process.
+        self.thread.return_value.start.assert_called_once_with()
+
+    def test_render(self):
+        for duration in (0.003, 0.3, 20):
+            metrics.record_request('job-list', 'GET', 200, duration)
+        lines = metrics.render().splitlines()
+
+        self.assertIn('# TYPE talentbridge_http_request_duration_seconds histogram', lines)
+        self.assertIn('talentbridge_http_requests_total{view="job-list",method="GET",status="200"} 3.0', lines)
+        buckets = [line for line in lines if line.startswith('talentbridge_http_request_duration_seconds_bucket')]
+        self.assertEqual(
+            [line.split('le="')[1].split('"')[0] for line in buckets],
+            [str(bound) for bound in metrics.SECONDS_BUCKETS] + ['+Inf'],
+        )
+        self.assertEqual([float(line.rsplit(' ', 1)[1]) for line in buckets], [1, 1, 1, 1, 1, 1, 2, 2, 2, 2, 2, 3])
+
+    def test_counts_from_every_flush_add_up(self):
+        metrics.record_request('job-list', 'GET', 200, 0.02)
+        self.aggregator.flush()
+        metrics.record_request('job-list', 'GET', 200, 0.02)
+        self.assertIn('talentbridge_http_requests_total{view="job-list",method="GET",status="200"} 2.0',
+                      metrics.render().splitlines())
+
+    def test_only_sampled_requests_are_measured(self):
+        middleware = RequestMetricsMiddleware(lambda request: HttpResponse('ok'))
+        for rate, sampled in ((0.0, False), (1.0, True)):
+            with override_settings(METRICS_SAMPLE_RATE=rate), mock.patch.object(metrics, 'record_request') as record:
+                middleware(RequestFactory().get('/api/v1/jobs/'))
+            self.assertEqual(len(record.call_args.args) > 4, sampled)
+
+    @override_settings(DEBUG=False, METRICS_TOKEN='')
+    def test_endpoint_needs_a_token_in_production(self):
+        self.assertEqual(metrics_view(RequestFactory().get('/metrics/')).status_code, 403)
+
+    @override_settings(DEBUG=False, METRICS_TOKEN='secret')
+    def test_endpoint_accepts_the_token(self):
+        request = RequestFactory()
+        self.assertEqual(metrics_view(request.get('/metrics/')).status_code, 403)
+        self.assertEqual(metrics_view(request.get('/metrics/', HTTP_AUTHORIZATION='Bearer secret')).status_code, 200)
@@ -22,7 +22,8 @@ from drf_yasg import openapi
 from django.conf import settings
 from django.conf.urls.static import static
 from django.views.generic import RedirectView
-from .views import health_check
+from users.views import CookieTokenRefreshView
+from .views import health_check, metrics
 
 
 api_patterns = [
@@ -47,6 +48,7 @@ schema_view = get_schema_view(
 urlpatterns = [
     path('', RedirectView.as_view(url='/api/swagger/', permanent=False)),
     path('health/', health_check, name='health_check'),
+    path('metrics/', metrics, name='metrics'),
     path('admin/', admin.site.urls),
     
     # register
@@ -59,6 +61,8 @@ urlpatterns = [
     re_path(r'^api/swagger(?P<format>\.json|\.yaml)$', schema_view.without_ui(cache_timeout=0), name='schema-json'),
 
     # outh
+    # Ahead of dj_rest_auth.urls so refreshes check the token version.
+    path('api/v1/dj-rest-auth/token/refresh/', CookieTokenRefreshView.as_view(), name='cookie_token_refresh'),
     path('api/v1/dj-rest-auth/', include('dj_rest_auth.urls')),
     path('api/v1/dj-rest-auth/registration/', include('dj_rest_auth.registration.urls')),
     path('api/v1/social/accounts/', include('allauth.socialaccount.urls')),
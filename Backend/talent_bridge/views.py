@@ -1,7 +1,13 @@
+import hmac
+
+from django.conf import settings
 from django.db import connections
 from django.db.utils import OperationalError
-from django.http import JsonResponse
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
 from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+from . import metrics as request_metrics
 
 def health_check(request):
     health = {"status": "healthy", "checks": {}}
@@ -26,4 +32,24 @@ def health_check(request):
 
     # If any check failed, return 503, else 200
     status_code = 200 if health["status"] == "healthy" else 503
-    return JsonResponse(health, status=status_code)
\ No newline at end of file
+    return JsonResponse(health, status=status_code)
+
+
+def metrics(request):
+    """
+    Prometheus scrape endpoint (see talent_bridge.metrics). Scrapers must
+    send METRICS_TOKEN as a bearer token; without a token the endpoint is
+    only open with DEBUG.
+    """
+    if settings.METRICS_TOKEN:
+        expected = f'Bearer {settings.METRICS_TOKEN}'
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), expected):
+            return HttpResponseForbidden()
+    elif not settings.DEBUG:
+        return HttpResponseForbidden()
+
+    try:
+        body = request_metrics.render()
+    except RedisError:
+        return HttpResponse("Metrics are unavailable.", status=503, content_type='text/plain')
+    return HttpResponse(body, content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,93 @@
+"""
+JWT authentication without a users-table query per request.
+
+Access tokens carry the user's `token_version` (see User.save) and role
+claims (CustomTokenObtainPairSerializer.get_token). CachedJWTAuthentication
+resolves the user from a snapshot of the fields the API reads, cached
+under the user id and token version for AUTH_USER_CACHE_TIMEOUT seconds.
+users.signals drops the snapshot when the user is saved and again once
+the save commits, and a password change bumps the version, so older
+tokens are refused.
+
+The user is built from the snapshot with the other fields deferred: they
+load on access, and save() only writes what was loaded.
+
+With JWT_STATELESS_ROLE_CLAIMS on, tokens that carry the role claims are
+trusted as is and no cache or database lookup happens at all. A password
+change, role change or deactivation then only takes effect when the access
+token expires (SIMPLE_JWT['ACCESS_TOKEN_LIFETIME']): refreshing goes
+through users.serializers.CustomTokenRefreshSerializer, which refuses
+refresh tokens from an older version and re-reads the role claims.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from talent_bridge.metrics import record_cache
+
+SNAPSHOT_KEY = 'users:auth:{}:{}'
+SNAPSHOT_FIELDS = (
+    'id', 'email', 'username', 'first_name', 'last_name',
+    'is_active', 'is_staff', 'is_superuser', 'is_employer', 'is_candidate', 'token_version',
+)
+TOKEN_VERSION_CLAIM = 'ver'
+ROLE_CLAIMS = ('email', 'is_employer', 'is_candidate', 'is_staff', 'is_superuser')
+
+
+def add_claims(token, user):
+    token[TOKEN_VERSION_CLAIM] = user.token_version
+    for claim in ROLE_CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+def forget(user_id, *versions):
+    cache.delete_many([SNAPSHOT_KEY.format(user_id, version) for version in versions])
+
+
+def _from_snapshot(snapshot):
+    User = get_user_model()
+    fields = [field.attname for field in User._meta.concrete_fields if field.attname in snapshot]
+    return User.from_db('default', fields, [snapshot[name] for name in fields])
+
+
+def _load_snapshot(user_id, version):
+    key = SNAPSHOT_KEY.format(user_id, version)
+    snapshot = cache.get(key)
+    record_cache(hit=snapshot is not None)
+    if snapshot is None:
+        snapshot = get_user_model().objects.filter(pk=user_id).values(*SNAPSHOT_FIELDS).first()
+        if snapshot is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        # Stored under the current version only, so a stale token can never
+        # cache a snapshot for itself.
+        cache.set(SNAPSHOT_KEY.format(user_id, snapshot['token_version']), snapshot,
+                  settings.AUTH_USER_CACHE_TIMEOUT)
+    return snapshot
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that reads users from cached snapshots (or token claims)."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+        # Tokens issued before versioning count as version 0.
+        version = validated_token.get(TOKEN_VERSION_CLAIM, 0)
+
+        if settings.JWT_STATELESS_ROLE_CLAIMS and all(claim in validated_token for claim in ROLE_CLAIMS):
+            snapshot = {claim: validated_token[claim] for claim in ROLE_CLAIMS}
+            return _from_snapshot({**snapshot, 'id': user_id, 'is_active': True, 'token_version': version})
+
+        snapshot = _load_snapshot(user_id, version)
+        if api_settings.CHECK_USER_IS_ACTIVE and not snapshot['is_active']:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if snapshot['token_version'] != version:
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return _from_snapshot(snapshot)
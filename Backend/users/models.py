@@ -9,6 +9,9 @@ class User(AbstractUser):
     email = models.EmailField(_('email address'), unique=True)
     is_employer = models.BooleanField(default=False)
     is_candidate = models.BooleanField(default=False)
+    # Carried in issued tokens (see users.authentication); bumped on every
+    # password change, which revokes the tokens issued before it.
+    token_version = models.PositiveIntegerField(default=0)
     
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']
@@ -16,6 +19,23 @@ class User(AbstractUser):
     def __str__(self):
         return self.email
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets users.signals drop the cached snapshot of the old version.
+        instance._loaded_token_version = instance.__dict__.get('token_version')
+        return instance
+
+    def save(self, *args, **kwargs):
+        # set_password() leaves the raw password in _password until saved.
+        # (Rehashing on login clears it first, so only real changes count.)
+        if self._password is not None and self.pk is not None:
+            self.token_version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'password' in update_fields:
+                kwargs['update_fields'] = {*update_fields, 'token_version'}
+        super().save(*args, **kwargs)
+
 class EmployerProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='employer_profile')
     company_name = models.CharField(max_length=255, blank=True, null=True)
@@ -1,7 +1,13 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_in
+from django.utils.translation import gettext_lazy as _
+from .authentication import TOKEN_VERSION_CLAIM, add_claims
 from .models import EmployerProfile, CandidateProfile
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from dj_rest_auth.jwt_auth import CookieTokenRefreshSerializer
 
 # API Password Reset Feature Imports
 from dj_rest_auth.serializers import PasswordResetSerializer
@@ -87,6 +93,11 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     Customizes the login response to include the user's role.
     This allows the Frontend to redirect to the correct dashboard immediately.
     """
+    @classmethod
+    def get_token(cls, user):
+        # Token version and role claims for users.authentication.
+        return add_claims(super().get_token(user), user)
+
     def validate(self, attrs):
         # 1. Get the standard token data (access/refresh)
         data = super().validate(attrs)
@@ -97,10 +108,58 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         data['first_name'] = self.user.first_name
         data['is_employer'] = self.user.is_employer
         data['is_candidate'] = self.user.is_candidate
+
+        # 3. Let the rest of the app react to the login (e.g. cache warming),
+        # as django.contrib.auth.login() would for a session login.
+        user_logged_in.send(sender=self.user.__class__, request=self.context.get('request'), user=self.user)
         
         return data
 
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refreshes only tokens issued at the user's current token_version and
+    puts the current role claims in the new access token, so a password or
+    role change reaches JWT_STATELESS_ROLE_CLAIMS clients at their next
+    refresh.
+    """
+    default_error_messages = {
+        **TokenRefreshSerializer.default_error_messages,
+        'password_changed': _("The user's password has been changed."),
+    }
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user = User.objects.filter(**{api_settings.USER_ID_FIELD: refresh.get(api_settings.USER_ID_CLAIM)}).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+        # Tokens issued before versioning count as version 0.
+        if refresh.get(TOKEN_VERSION_CLAIM, 0) != user.token_version:
+            raise AuthenticationFailed(self.error_messages['password_changed'], 'password_changed')
+
+        add_claims(refresh, user)
+        data = {'access': str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                try:
+                    refresh.blacklist()
+                except AttributeError:
+                    # The blacklist app is not installed.
+                    pass
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+            data['refresh'] = str(refresh)
+
+        return data
+
+
+class CustomCookieTokenRefreshSerializer(CookieTokenRefreshSerializer, CustomTokenRefreshSerializer):
+    """CustomTokenRefreshSerializer for dj-rest-auth's cookie refresh endpoint."""
+
 # --- API Password Reset Serializer Feature ---
+
 class APIPasswordResetSerializer(PasswordResetSerializer):
     def save(self):
         request = self.context.get('request')
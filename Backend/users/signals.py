@@ -0,0 +1,20 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import authentication
+from .models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_user_snapshot(sender, instance, **kwargs):
+    # After a password change the loaded version differs from the saved one.
+    loaded_version = getattr(instance, '_loaded_token_version', None)
+    user_id, versions = instance.pk, {instance.token_version, loaded_version} - {None}
+    authentication.forget(user_id, *versions)
+    # Again once committed: until then a concurrent request still reads the
+    # old row and may cache it.
+    transaction.on_commit(lambda: authentication.forget(user_id, *versions))
+    instance._loaded_token_version = instance.token_version
+
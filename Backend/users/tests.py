@@ -1,3 +1,100 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .authentication import SNAPSHOT_KEY
+from .models import CandidateProfile, User
+from .serializers import CustomTokenObtainPairSerializer
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='candidate', email='candidate@example.com', password='secret-pass-1', is_candidate=True,
+        )
+        self.client = APIClient()
+        self.authenticate(self.user)
+
+    def authenticate(self, user):
+        token = CustomTokenObtainPairSerializer.get_token(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_cached_snapshot_skips_the_user_query(self):
+        self.assertEqual(self.client.get(reverse('user-details')).status_code, 200)
+        # Only the view's own query: no user lookup, cached or not.
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('my-applications'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_user_saves_refresh_the_snapshot(self):
+        self.client.get(reverse('user-details'))
+        self.user.first_name = 'Ada'
+        self.user.save()
+        self.assertEqual(self.client.get(reverse('user-details')).data['first_name'], 'Ada')
+
+        # The snapshot holds no profile fields, so profile saves keep it.
+        CandidateProfile.objects.create(user=self.user)
+        with self.assertNumQueries(0):
+            self.client.get(reverse('user-details'))
+
+    def test_password_change_revokes_older_tokens(self):
+        self.client.get(reverse('user-details'))
+        self.user.set_password('secret-pass-2')
+        self.user.save()
+        self.assertEqual(self.client.get(reverse('user-details')).status_code, 401)
+
+        self.authenticate(self.user)
+        self.assertEqual(self.client.get(reverse('user-details')).status_code, 200)
+
+    def test_snapshots_cached_before_a_commit_are_dropped(self):
+        self.client.get(reverse('user-details'))
+        key = SNAPSHOT_KEY.format(self.user.pk, self.user.token_version)
+        stale = cache.get(key)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.user.is_active = False
+                self.user.save()
+                # A concurrent request still reads the committed, active row.
+                cache.set(key, stale)
+        self.assertEqual(self.client.get(reverse('user-details')).status_code, 401)
+
+    def test_inactive_users_are_refused(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(reverse('user-details')).status_code, 401)
+
+    @override_settings(JWT_STATELESS_ROLE_CLAIMS=True)
+    def test_stateless_mode_trusts_the_role_claims(self):
+        # Only the view's own query: no user lookup, cached or not.
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('my-applications'))
+        self.assertEqual(response.status_code, 200)
+
+
+class TokenRefreshTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='candidate', email='candidate@example.com', password='secret-pass-1', is_candidate=True,
+        )
+        self.refresh = str(CustomTokenObtainPairSerializer.get_token(self.user))
+        self.client = APIClient()
+
+    def test_refresh_renews_the_role_claims(self):
+        User.objects.filter(pk=self.user.pk).update(is_employer=True)
+        for url in (reverse('token_refresh'), reverse('cookie_token_refresh')):
+            response = self.client.post(url, {'refresh': self.refresh}, format='json')
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(AccessToken(response.data['access'])['is_employer'])
+
+    def test_password_change_revokes_refresh_tokens(self):
+        self.user.set_password('secret-pass-2')
+        self.user.save()
+        for url in (reverse('token_refresh'), reverse('cookie_token_refresh')):
+            self.assertEqual(self.client.post(url, {'refresh': self.refresh}, format='json').status_code, 401)
@@ -10,11 +10,13 @@ from .serializers import (
     EmployerRegistrationSerializer,
     EmployerProfileSerializer,
     BaseUserRegistrationSerializer,
+    CustomCookieTokenRefreshSerializer,
     CustomTokenObtainPairSerializer
 )
 
 from allauth.socialaccount.providers.google.views import GoogleOAuth2Adapter
 from allauth.socialaccount.providers.oauth2.client import OAuth2Client
+from dj_rest_auth.jwt_auth import get_refresh_view
 from dj_rest_auth.registration.views import SocialLoginView
 
 User = get_user_model()
@@ -70,4 +72,9 @@ class CustomLoginView(TokenObtainPairView):
 class GoogleLogin(SocialLoginView):
     adapter_class = GoogleOAuth2Adapter
     client_class = OAuth2Client
-    callback_url = "http://localhost:3000"
\ No newline at end of file
+    callback_url = "http://localhost:3000"
+
+
+class CookieTokenRefreshView(get_refresh_view()):
+    """dj-rest-auth's cookie-aware refresh, with the token_version check."""
+    serializer_class = CustomCookieTokenRefreshSerializer
@@ -307,7 +307,7 @@ export default function FindJobsPage() {
                     </div>
 
                     <p className="text-gray-600 text-sm mt-5 leading-relaxed line-clamp-2 pr-12">
-                      {job.description}
+                      {job.summary}
                     </p>
 
                     <div className="flex flex-wrap gap-2 mt-5">